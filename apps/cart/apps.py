@@ -5,3 +5,9 @@ class CartConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.cart'
     verbose_name = 'Carrito'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+        from .cart import merge_session_cart
+        # Fusionar el carrito de la sesión con el guardado del usuario al iniciar sesión
+        user_logged_in.connect(merge_session_cart, dispatch_uid='cart_merge_session_cart')
@@ -1,22 +1,54 @@
 """
 Carrito de compras - estilo WooCommerce.
 Soporta productos simples y variables, sesión o usuario.
+
+- Invitados: el carrito vive en la sesión (solo se escribe al primer cambio).
+- Usuarios autenticados: se guarda en Cart/CartLine; save() escribe solo las
+  líneas que cambiaron. Al iniciar sesión el carrito de la sesión se fusiona con
+  el guardado (merge_session_cart, señal user_logged_in).
+- Cada carrito guarda la versión de precios del catálogo con la que se calculó;
+  get_cart() vuelve a calcular los precios de todas las líneas (en la misma carga de
+  productos y variantes) solo si esa versión cambió, y avisa al cliente con un
+  mensaje por cada línea cuyo precio cambió.
+
+Usar get_cart(request): devuelve un único Cart por request, así el context processor,
+el sidebar y el checkout comparten las líneas ya cargadas (productos, variantes e
+imagen principal en tres consultas fijas).
 """
 from decimal import Decimal
 
 from django.conf import settings
 from django.core.cache import cache
 
+CART_PRICING_SESSION_KEY = 'cart_pricing_version'
+
+
+def get_cart(request):
+    """Cart del request (memoizado en request._cart), con precios al día."""
+    cart = getattr(request, '_cart', None)
+    if cart is None:
+        cart = request._cart = Cart(request)
+        cart.reprice_if_stale()
+    return cart
+
 
 class Cart:
-    """Manejo del carrito via sesión."""
-    
+    """Manejo del carrito via sesión o base de datos (usuario autenticado)."""
+
     def __init__(self, request):
         self.session = request.session
-        cart = self.session.get(settings.CART_SESSION_ID)
-        if not cart:
-            cart = self.session[settings.CART_SESSION_ID] = {}
-        self.cart = cart
+        self.request = request
+        user = getattr(request, 'user', None)
+        self.user = user if user is not None and user.is_authenticated else None
+        if self.user is not None:
+            self.cart, self.pricing_version = _load_lines(self.user)
+            self._stored = _snapshot(self.cart)
+            self._stored_version = self.pricing_version
+        else:
+            # Solo lectura hasta el primer cambio (save): un carrito vacío no escribe la sesión
+            self.cart = self.session.get(settings.CART_SESSION_ID) or {}
+            self.pricing_version = self.session.get(CART_PRICING_SESSION_KEY)
+        self._items = None
 
     def add(self, product, quantity=1, variant_id=None, override=False, price=None):
         """Añadir o actualizar producto en carrito. price: override (ej. precio mayorista)."""
@@ -31,6 +63,9 @@ class Cart:
             else:
                 self.cart[key]['quantity'] += quantity
         else:
+            if not self.cart:
+                from apps.products.catalog import get_pricing_version
+                self.pricing_version = get_pricing_version()
             if price is None:
                 price = product.price
                 if variant_id:
@@ -51,28 +86,93 @@ class Cart:
             del self.cart[key]
             self.save()
 
-    def __iter__(self):
-        from apps.products.models import Product
-        product_ids = set(item['product_id'] for item in self.cart.values())
+    def items(self):
+        """
+        Líneas hidratadas (cacheadas hasta el próximo cambio): product, variant,
+        image (principal o la primera), price (Decimal), total_price y key.
+        """
+        if self._items is None:
+            self._items = self._hydrate()
+        return self._items
+
+    def _hydrate(self):
+        from apps.products.models import Product, ProductImage, ProductVariant
+        product_ids = {item['product_id'] for item in self.cart.values()}
+        if not product_ids:
+            return []
+        variant_ids = {item['variant_id'] for item in self.cart.values() if item.get('variant_id')}
         products = {str(p.id): p for p in Product.objects.filter(id__in=product_ids)}
-        
+        variants = {}
+        if variant_ids:
+            variants = {
+                str(v.id): v
+                for v in ProductVariant.objects.filter(id__in=variant_ids, product_id__in=product_ids)
+            }
+        images = {}
+        for image in ProductImage.objects.filter(product_id__in=product_ids).order_by('-is_primary', 'order', 'id'):
+            images.setdefault(image.product_id, image)
+
+        items = []
         for key, raw_item in self.cart.items():
             # No mutar self.cart aquí: si guardamos Decimal en sesión rompe serialización JSON.
             item = raw_item.copy()
             product = products.get(item['product_id'])
-            if product:
-                item['product'] = product
-                item['price'] = Decimal(item['price'])
-                item['total_price'] = item['price'] * item['quantity']
-                if item.get('variant_id'):
-                    try:
-                        item['variant'] = product.variants.get(id=item['variant_id'])
-                    except:
-                        item['variant'] = None
-                else:
-                    item['variant'] = None
-                item['key'] = key
-                yield item
+            if not product:
+                continue
+            item['product'] = product
+            item['price'] = Decimal(item['price'])
+            item['total_price'] = item['price'] * item['quantity']
+            variant = variants.get(item.get('variant_id') or '')
+            item['variant'] = variant if variant and variant.product_id == product.id else None
+            item['image'] = images.get(product.id)
+            item['key'] = key
+            items.append(item)
+        return items
+
+    def __iter__(self):
+        return iter(self.items())
+
+    def _current_price(self, item):
+        """Precio vigente de una línea hidratada (mayorista si corresponde)."""
+        user = self.user if getattr(self.user, 'is_wholesale', False) else None
+        if item['variant'] is not None:
+            return item['variant'].get_price(user)
+        return item['product'].get_price(user)
+
+    def reprice_if_stale(self):
+        """
+        Si la versión de precios cambió desde que se calculó el carrito, actualiza el
+        precio de cada línea y avisa de los cambios. Devuelve [(item, precio_anterior)].
+        """
+        if not self.cart:
+            return []
+        from apps.products.catalog import get_pricing_version
+        version = get_pricing_version()
+        if self.pricing_version == version:
+            return []
+        changes = []
+        for item in self.items():
+            price = self._current_price(item)
+            if price is None or price == item['price']:
+                continue
+            changes.append((item, item['price']))
+            item['price'] = price
+            item['total_price'] = price * item['quantity']
+            self.cart[item['key']]['price'] = str(price)
+        self.pricing_version = version
+        # Las líneas ya hidratadas siguen siendo válidas: guardar sin invalidarlas
+        self._persist()
+        if changes:
+            from django.contrib import messages
+            from django.contrib.humanize.templatetags.humanize import intcomma
+            for item, old_price in changes:
+                messages.info(
+                    self.request,
+                    f'El precio de "{item["product"].name}" cambió de ${intcomma(int(old_price))} '
+                    f'a ${intcomma(int(item["price"]))}.',
+                    fail_silently=True,
+                )
+        return changes
 
     def __len__(self):
         return sum(item['quantity'] for item in self.cart.values())
@@ -84,12 +184,135 @@ class Cart:
         )
 
     def clear(self):
-        del self.session[settings.CART_SESSION_ID]
+        keys = list(self.cart)
+        self.cart = {}
         self.save()
+        user = getattr(self.request, 'user', None)
+        if self.user is None and user is not None and user.is_authenticated and keys:
+            # Sesión iniciada en este mismo request (checkout): el carrito de la sesión
+            # ya se fusionó en la base de datos, quitar allí las mismas líneas
+            from .models import CartLine
+            CartLine.objects.filter(cart__user=user, key__in=keys).delete()
 
     def save(self):
+        self._items = None
+        self._persist()
+
+    def _persist(self):
         # Blindaje: asegurar tipos serializables en sesión.
         for item in self.cart.values():
             if 'price' in item:
                 item['price'] = str(item['price'])
-        self.session.modified = True
+        if self.user is not None:
+            _store_lines(self.user, self._stored, self.cart, self.pricing_version, self._stored_version)
+            self._stored = _snapshot(self.cart)
+            self._stored_version = self.pricing_version
+        elif self.cart:
+            self.session[settings.CART_SESSION_ID] = self.cart
+            self.session[CART_PRICING_SESSION_KEY] = self.pricing_version
+            self.session.modified = True
+        else:
+            self.session.pop(settings.CART_SESSION_ID, None)
+            self.session.pop(CART_PRICING_SESSION_KEY, None)
+
+
+def _snapshot(cart):
+    return {key: (int(item['quantity']), str(item['price'])) for key, item in cart.items()}
+
+
+def _load_lines(user):
+    """Líneas guardadas del usuario con la misma forma que el carrito de sesión, y su versión de precios."""
+    from .models import CartLine
+    rows = CartLine.objects.filter(cart__user=user).order_by('pk').values_list(
+        'key', 'product_id', 'variant_id', 'quantity', 'price', 'cart__pricing_version'
+    )
+    cart = {}
+    pricing_version = None
+    for key, product_id, variant_id, quantity, price, pricing_version in rows:
+        cart[key] = {
+            'product_id': str(product_id),
+            'variant_id': str(variant_id) if variant_id else None,
+            'quantity': quantity,
+            'price': str(price),
+        }
+    return cart, pricing_version
+
+
+def _store_lines(user, stored, cart, pricing_version=None, stored_version=None):
+    """Escribe en Cart/CartLine solo lo que cambió respecto a `stored`."""
+    from django.db import transaction
+    from django.utils import timezone
+    from .models import Cart as StoredCart, CartLine
+
+    current = _snapshot(cart)
+    if current == stored and pricing_version == stored_version:
+        return
+    with transaction.atomic():
+        if not current:
+            StoredCart.objects.filter(user=user).delete()
+            return
+        stored_cart, created = StoredCart.objects.get_or_create(
+            user=user, defaults={'pricing_version': pricing_version}
+        )
+        if not created and current == stored:
+            # Solo se recalcularon precios sin cambios: no cuenta como actividad del cliente
+            StoredCart.objects.filter(pk=stored_cart.pk).update(pricing_version=pricing_version)
+            return
+        if not created:
+            StoredCart.objects.filter(pk=stored_cart.pk).update(
+                updated_at=timezone.now(), reminder_sent_at=None, pricing_version=pricing_version
+            )
+        removed = set(stored) - set(current)
+        if removed:
+            CartLine.objects.filter(cart=stored_cart, key__in=removed).delete()
+        new_lines = []
+        for key, (quantity, price) in current.items():
+            if key not in stored:
+                item = cart[key]
+                new_lines.append(CartLine(
+                    cart=stored_cart, key=key, product_id=int(item['product_id']),
+                    variant_id=int(item['variant_id']) if item.get('variant_id') else None,
+                    quantity=quantity, price=Decimal(price),
+                ))
+            elif stored[key] != (quantity, price):
+                CartLine.objects.filter(cart=stored_cart, key=key).update(
+                    quantity=quantity, price=Decimal(price)
+                )
+        if new_lines:
+            CartLine.objects.bulk_create(new_lines, ignore_conflicts=True)
+
+
+def merge_session_cart(sender, request, user, **kwargs):
+    """
+    Señal user_logged_in: suma el carrito de la sesión al guardado del usuario y lo
+    quita de la sesión.
+    """
+    if request is None or not hasattr(request, 'session'):
+        return
+    session_cart = request.session.get(settings.CART_SESSION_ID)
+    if not session_cart:
+        return
+    from apps.products.models import Product, ProductVariant
+
+    # Omitir productos o variantes que ya no existen
+    product_ids = {int(item['product_id']) for item in session_cart.values()}
+    variant_ids = {int(item['variant_id']) for item in session_cart.values() if item.get('variant_id')}
+    product_ids = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+    if variant_ids:
+        variant_ids = set(ProductVariant.objects.filter(id__in=variant_ids).values_list('id', flat=True))
+
+    merged, pricing_version = _load_lines(user)
+    stored = _snapshot(merged)
+    for key, item in session_cart.items():
+        if int(item['product_id']) not in product_ids:
+            continue
+        if item.get('variant_id') and int(item['variant_id']) not in variant_ids:
+            continue
+        if key in merged:
+            merged[key] = dict(merged[key], quantity=merged[key]['quantity'] + int(item['quantity']))
+        else:
+            merged[key] = dict(item)
+    # Líneas de distintos momentos: que se vuelvan a calcular los precios
+    _store_lines(user, stored, merged, None, pricing_version)
+    del request.session[settings.CART_SESSION_ID]
+    request.session.pop(CART_PRICING_SESSION_KEY, None)
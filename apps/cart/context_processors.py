@@ -1,7 +1,17 @@
 def cart(request):
     """Context processor para el carrito en todas las vistas."""
-    from .cart import Cart
-    cart = Cart(request)
+    if getattr(request, 'page_cache_render', False):
+        # Página cacheada para anónimos: carrito vacío, el sidebar lo carga por JSON
+        from decimal import Decimal
+        from apps.core.page_cache import CART_PLACEHOLDER
+        return {
+            'cart': [],
+            'cart_count': 0,
+            'cart_total': Decimal('0'),
+            'cart_deferred': CART_PLACEHOLDER,
+        }
+    from .cart import get_cart
+    cart = get_cart(request)
     return {
         'cart': cart,
         'cart_count': len(cart),
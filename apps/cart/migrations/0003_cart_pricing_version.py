@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_persistent_cart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='pricing_version',
+            field=models.BigIntegerField(blank=True, help_text='Versión de precios del catálogo con la que se calcularon las líneas.', null=True, verbose_name='Versión de precios'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 """Modelos del carrito."""
+from django.conf import settings
 from django.db import models
 
 
@@ -29,3 +30,50 @@ class AbandonedCartLead(models.Model):
 
     def __str__(self):
         return f"{self.email} - {self.created_at.date()}"
+
+
+class Cart(models.Model):
+    """
+    Carrito persistente de un usuario autenticado (el de invitados vive en la sesión).
+    Solo existe mientras tiene líneas; updated_at indexado para encontrar carritos
+    abandonados.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cart'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    reminder_sent_at = models.DateTimeField('Recordatorio enviado', null=True, blank=True)
+    pricing_version = models.BigIntegerField(
+        'Versión de precios', null=True, blank=True,
+        help_text='Versión de precios del catálogo con la que se calcularon las líneas.',
+    )
+
+    class Meta:
+        verbose_name = 'Carrito'
+        verbose_name_plural = 'Carritos'
+
+    def __str__(self):
+        return f"Carrito de {self.user}"
+
+
+class CartLine(models.Model):
+    """Línea del carrito persistente; key es la misma clave que en la sesión (producto_variante)."""
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='lines')
+    key = models.CharField(max_length=50)
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE)
+    variant = models.ForeignKey(
+        'products.ProductVariant', on_delete=models.CASCADE, null=True, blank=True
+    )
+    quantity = models.PositiveIntegerField(default=1)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        verbose_name = 'Línea de carrito'
+        verbose_name_plural = 'Líneas de carrito'
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'key'], name='cart_cartline_unique_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} x {self.quantity}"
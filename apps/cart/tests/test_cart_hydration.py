@@ -0,0 +1,68 @@
+"""
+Tests de la hidratación del carrito (consultas fijas y memoización por request).
+"""
+from decimal import Decimal
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from apps.cart.cart import get_cart
+from apps.products.models import Product, ProductImage, ProductVariant
+
+
+class CartHydrationTest(TestCase):
+    """Productos, variantes e imagen principal en tres consultas compartidas por el request."""
+
+    def setUp(self):
+        self.products = []
+        for i in range(3):
+            product = Product.objects.create(name=f'Cera {i}', sku=f'CERA-{i}', regular_price=Decimal('10'))
+            ProductImage.objects.create(product=product, image=f'products/cera-{i}-b.jpg', order=0)
+            ProductImage.objects.create(product=product, image=f'products/cera-{i}-a.jpg', order=1, is_primary=True)
+            self.products.append(product)
+        self.variant = ProductVariant.objects.create(
+            product=self.products[0], sku='CERA-0-M', attributes={'tamaño': 'M'}, regular_price=Decimal('12'),
+        )
+
+    def request(self):
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        return request
+
+    def test_fixed_queries_and_memoized(self):
+        request = self.request()
+        cart = get_cart(request)
+        for product in self.products:
+            cart.add(product, quantity=2)
+        cart.add(self.products[0], variant_id=self.variant.id)
+        self.assertIs(get_cart(request), cart)
+
+        with self.assertNumQueries(3):
+            items = list(cart)
+            list(get_cart(request))
+        self.assertEqual(len(items), 4)
+        variant_item = next(i for i in items if i['variant'])
+        self.assertEqual((variant_item['variant'], variant_item['price']), (self.variant, Decimal('12')))
+        self.assertTrue(all(i['image'].is_primary for i in items))
+
+        cart.remove(self.products[1].id)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(list(cart)), 3)
+
+    def test_sidebar_json_renders_images(self):
+        self.client.post(reverse('cart:add', args=[self.products[0].id]), {'quantity': 1}, secure=True)
+        response = self.client.get(reverse('cart:sidebar_json'), secure=True)
+        self.assertEqual(response.json()['count'], 1)
+        self.assertIn('cera-0-a.jpg', response.json()['html'])
+
+    def test_empty_cart_does_not_create_session(self):
+        response = self.client.get(reverse('cart:detail'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Session.objects.exists())
+
+        self.client.post(reverse('cart:add', args=[self.products[0].id]), {'quantity': 1}, secure=True)
+        self.assertEqual(Session.objects.count(), 1)
+        self.client.post(reverse('cart:remove', args=[self.products[0].id]), secure=True)
+        self.assertNotIn('cart', self.client.session)
@@ -0,0 +1,77 @@
+"""
+Tests del recálculo de precios del carrito según la versión de precios del catálogo.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.cart.cart import Cart
+from apps.cart.models import CartLine
+from apps.products.models import Product, ProductVariant
+
+
+class CartRepricingTest(TestCase):
+    """Las líneas se recalculan solo cuando cambia la versión y se avisa al cliente."""
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Cera', sku='CERA-1', regular_price=Decimal('10000'))
+
+    def add(self, product, **data):
+        self.client.post(reverse('cart:add', args=[product.id]), {'quantity': 2, **data}, secure=True)
+
+    def test_session_cart_repriced_once_with_notice(self):
+        self.add(self.product)
+        list(get_messages(self.client.get(reverse('cart:detail'), secure=True).wsgi_request))
+
+        self.product.regular_price = Decimal('8000')
+        self.product.save()
+
+        response = self.client.get(reverse('cart:detail'), secure=True)
+        notices = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertEqual(len(notices), 1)
+        self.assertTrue(notices[0].startswith('El precio de "Cera" cambió de $10'))
+        self.assertEqual(response.context['cart_total'], Decimal('16000'))
+        self.assertEqual(self.client.session['cart'][str(self.product.id)]['price'], '8000.00')
+
+        # Misma versión: no se vuelve a calcular ni a avisar
+        response = self.client.get(reverse('cart:detail'), secure=True)
+        self.assertEqual(list(get_messages(response.wsgi_request)), [])
+
+    def test_stored_cart_variant_price(self):
+        user = get_user_model().objects.create_user(username='ana', email='ana@test.com', password='testpass123')
+        self.client.force_login(user)
+        variant = ProductVariant.objects.create(
+            product=self.product, sku='CERA-1-M', attributes={'tamaño': 'M'}, regular_price=Decimal('12000'),
+        )
+        self.add(self.product, variant_id=variant.id)
+        self.client.get(reverse('cart:detail'), secure=True)
+
+        variant.sale_price = Decimal('11000')
+        variant.save()
+        self.client.get(reverse('cart:detail'), secure=True)
+        self.assertEqual(CartLine.objects.get().price, Decimal('11000'))
+
+    def test_version_shared_between_workers(self):
+        """Dos workers con cachés locales (y semillas) distintas ven la misma versión de precios."""
+        workers = [
+            (mock.patch('apps.products.catalog.cache', LocMemCache(f'worker-{i}', {})),
+             mock.patch('apps.products.catalog.time.time', return_value=1000.0 * (i + 1)))
+            for i in range(2)
+        ]
+        with workers[0][0], workers[0][1]:
+            self.add(self.product)
+        with workers[1][0], workers[1][1], mock.patch.object(Cart, '_persist') as persist:
+            self.client.get(reverse('cart:detail'), secure=True)
+        persist.assert_not_called()
+
+        with workers[0][0], workers[0][1]:
+            self.product.regular_price = Decimal('9000')
+            self.product.save()
+        with workers[1][0], workers[1][1]:
+            response = self.client.get(reverse('cart:detail'), secure=True)
+        self.assertEqual(response.context['cart_total'], Decimal('18000'))
@@ -0,0 +1,74 @@
+"""
+Tests del carrito persistente de usuarios autenticados.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.cart.models import Cart, CartLine
+from apps.products.models import Product
+
+
+class PersistentCartTest(TestCase):
+    """Líneas en base de datos, fusión al iniciar sesión y recordatorio de abandono."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='ana', email='ana@test.com', password='testpass123',
+        )
+        self.gel = Product.objects.create(name='Gel', sku='GEL-1', regular_price=Decimal('10'))
+        self.cera = Product.objects.create(name='Cera', sku='CERA-1', regular_price=Decimal('20'))
+
+    def add(self, client, product, quantity=1):
+        client.post(reverse('cart:add', args=[product.id]), {'quantity': quantity}, secure=True)
+
+    def test_lines_follow_user_across_devices(self):
+        self.client.force_login(self.user)
+        self.add(self.client, self.gel, 2)
+        self.assertNotIn('cart', self.client.session)
+        line = CartLine.objects.get(cart__user=self.user)
+        self.assertEqual((line.key, line.quantity, line.price), (str(self.gel.id), 2, Decimal('10')))
+
+        other_device = Client()
+        other_device.force_login(self.user)
+        response = other_device.get(reverse('cart:sidebar_json'), secure=True)
+        self.assertEqual(response.json()['count'], 2)
+
+        response = other_device.post(
+            reverse('cart:update_item', args=[str(self.gel.id)]), {'quantity': 5}, secure=True,
+        )
+        self.assertEqual(CartLine.objects.get(pk=line.pk).quantity, 5)
+
+        other_device.post(reverse('cart:remove', args=[self.gel.id]), secure=True)
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+
+    def test_session_cart_merged_on_login(self):
+        self.client.force_login(self.user)
+        self.add(self.client, self.gel, 1)
+        self.client.logout()
+
+        self.add(self.client, self.gel, 2)
+        self.add(self.client, self.cera, 1)
+        self.client.login(username='ana', password='testpass123')
+        self.assertNotIn('cart', self.client.session)
+        quantities = dict(CartLine.objects.values_list('product_id', 'quantity'))
+        self.assertEqual(quantities, {self.gel.id: 3, self.cera.id: 1})
+
+    def test_abandoned_cart_reminder(self):
+        self.client.force_login(self.user)
+        self.add(self.client, self.cera, 1)
+        Cart.objects.update(updated_at=timezone.now() - timedelta(hours=3))
+
+        call_command('send_abandoned_cart_reminders', '--hours', '1', stdout=StringIO())
+        self.assertEqual([m.to for m in mail.outbox], [['ana@test.com']])
+        self.assertIsNotNone(Cart.objects.get().reminder_sent_at)
+
+        call_command('send_abandoned_cart_reminders', '--hours', '1', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
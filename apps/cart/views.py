@@ -10,7 +10,7 @@ from django.utils.http import url_has_allowed_host_and_scheme
 from django.urls import reverse
 
 from apps.products.models import Product
-from .cart import Cart
+from .cart import get_cart
 from .models import AbandonedCartLead
 
 logger = logging.getLogger(__name__)
@@ -32,28 +32,21 @@ def cart_sidebar_json(request, toast_msg=None, toast_type='success', fb_add_to_c
     """Devuelve el HTML del sidebar + totales + toast para actualizaciones AJAX."""
     from apps.core.models import SiteSettings
     from django.contrib.humanize.templatetags.humanize import intcomma
-    cart = Cart(request)
+    cart = get_cart(request)
     settings = SiteSettings.get()
-    html = render_to_string(
-        'partials/cart_sidebar_items.html',
-        {'cart': cart, 'cart_count': len(cart),
-         'cart_total': cart.get_total_price(),
-         'site_settings': settings},
-        request=request
-    )
-    foot_html = render_to_string(
-        'partials/cart_sidebar_footer.html',
-        {'cart': cart, 'cart_count': len(cart),
-         'cart_total': cart.get_total_price(),
-         'site_settings': settings},
-        request=request
-    )
     total = cart.get_total_price()
+    context = {
+        'cart': cart, 'cart_count': len(cart),
+        'cart_total': total,
+        'site_settings': settings,
+    }
+    html = render_to_string('partials/cart_sidebar_items.html', context, request=request)
+    foot_html = render_to_string('partials/cart_sidebar_footer.html', context, request=request)
     currency = settings.currency or ''
     data = {
         'html': html,
         'foot_html': foot_html,
-        'count': len(cart),
+        'count': context['cart_count'],
         'total': f"{currency}{intcomma(int(total))}",
     }
     if toast_msg:
@@ -65,7 +58,7 @@ def cart_sidebar_json(request, toast_msg=None, toast_type='success', fb_add_to_c
 
 @require_POST
 def cart_add(request, product_id):
-    cart = Cart(request)
+    cart = get_cart(request)
     product = get_object_or_404(Product, id=product_id, is_active=True)
     try:
         quantity = int(request.POST.get('quantity', 1))
@@ -151,7 +144,7 @@ def cart_add(request, product_id):
 
 @require_POST
 def cart_remove(request, product_id):
-    cart = Cart(request)
+    cart = get_cart(request)
     variant_id = request.POST.get('variant_id') or None
     cart.remove(product_id, variant_id=variant_id)
     msg = 'Producto eliminado del carrito.'
@@ -163,7 +156,7 @@ def cart_remove(request, product_id):
 
 @require_POST
 def cart_clear(request):
-    cart = Cart(request)
+    cart = get_cart(request)
     cart.clear()
     msg = 'Carrito limpiado correctamente.'
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -174,7 +167,7 @@ def cart_clear(request):
 
 @require_POST
 def cart_update(request):
-    cart = Cart(request)
+    cart = get_cart(request)
     for key, item in cart.cart.items():
         qty = request.POST.get(f'quantity_{key}')
         if qty is not None:
@@ -198,7 +191,7 @@ def cart_update_item(request, item_key):
     from django.contrib.humanize.templatetags.humanize import intcomma
     from apps.core.models import SiteSettings
 
-    cart = Cart(request)
+    cart = get_cart(request)
     try:
         qty = int(request.POST.get('quantity', 1))
     except (ValueError, TypeError):
@@ -256,7 +249,7 @@ def cart_reminder(request):
         messages.warning(request, 'Ingresa tu correo para recibir el recordatorio.')
         return redirect('cart:detail')
 
-    cart = Cart(request)
+    cart = get_cart(request)
     if not cart:
         messages.info(request, 'Tu carrito está vacío.')
         return redirect('cart:detail')
@@ -5,3 +5,19 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
     verbose_name = 'Core'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from . import models
+        from .page_cache import bump_home_version
+        # Cambios en el home o en los ajustes del sitio invalidan las páginas cacheadas
+        for model in (
+            models.SiteSettings, models.HomeSection, models.HomeHeroSlide, models.HomeAboutBlock,
+            models.HomeMeatCategoryBlock, models.HomeBrandBlock, models.HomeBrand,
+            models.HomeTestimonial, models.HomePopupAnnouncement,
+        ):
+            for name, signal in (('save', post_save), ('delete', post_delete)):
+                signal.connect(
+                    bump_home_version, sender=model,
+                    dispatch_uid=f'core_page_cache_{name}_{model.__name__}',
+                )
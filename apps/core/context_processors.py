@@ -138,6 +138,9 @@ def site_settings(request):
 
 def django_messages_json(request):
     """Serializa los mensajes de Django a JSON para el sistema de toasts."""
+    if getattr(request, 'page_cache_render', False):
+        # No consumir mensajes en una página que se guardará en caché
+        return {'django_toast_messages': '[]'}
     from django.contrib.messages import get_messages
     storage = get_messages(request)
     msgs = [{'message': str(m), 'tags': m.tags} for m in storage]
@@ -0,0 +1,288 @@
+"""
+Procesado de imágenes con Pillow: normalización al subir y derivados responsive.
+
+Al guardar (formularios, admin, sincronización con Tersa) la imagen se orienta según
+EXIF, se eliminan los metadatos y se limita a IMAGE_MAX_DIMENSION px por lado.
+
+Los derivados son copias de ancho fijo (IMAGE_DERIVATIVE_WIDTHS) en WebP y en JPEG
+(PNG si la imagen tiene transparencia) bajo `derivatives/`, con un manifiesto JSON por
+imagen. Se generan por adelantado con `python manage.py build_image_derivatives`; si
+falta alguno, la plantilla ({% image_srcset %}) sirve la URL original y encarga la
+generación a un hilo en segundo plano (uno por proceso), con un candado en caché
+para que dos workers no codifiquen la misma imagen.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'derivatives'
+MANIFEST_CACHE_KEY = 'images:manifest:{}'
+BUILD_LOCK_KEY = 'images:building:{}'
+BUILD_LOCK_TIMEOUT = 10 * 60
+# Formatos que se re-codifican al subir y sus opciones de guardado en Pillow
+INGEST_FORMATS = {
+    'JPEG': {'quality': 90, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+# Campos de imagen con derivados: (app_label.Model, campo)
+IMAGE_FIELDS = (
+    ('products.ProductImage', 'image'),
+    ('products.ProductVariant', 'image'),
+    ('products.Brand', 'logo'),
+    ('products.Category', 'image'),
+    ('core.HomeHeroSlide', 'image'),
+)
+
+_builder = None
+_builder_lock = threading.Lock()
+
+
+def _widths():
+    return sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 480, 800, 1200, 1920)))
+
+
+def _quality():
+    return getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+
+
+def _has_alpha(img):
+    return img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def _open(content):
+    """Abre y orienta la imagen (None si no es una imagen válida)."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        img = Image.open(content)
+        img.load()
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None, None
+    source_format = img.format
+    return ImageOps.exif_transpose(img), source_format
+
+
+def normalize_upload(content, name):
+    """
+    Orienta, quita EXIF y limita el tamaño de una imagen subida o descargada.
+    Devuelve un ContentFile listo para guardar, o None si no hace falta tocarla (o no
+    es una imagen que sepamos re-codificar, p. ej. GIF animado).
+    """
+    from PIL import Image
+
+    try:
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        original = Image.open(content)
+        source_format = original.format
+        needs_work = bool(original.getexif()) or bool(original.info.get('exif'))
+        width, height = original.size
+    except Exception:
+        return None
+    if source_format not in INGEST_FORMATS or getattr(original, 'is_animated', False):
+        return None
+    max_dimension = getattr(settings, 'IMAGE_MAX_DIMENSION', 2400)
+    if max_dimension and max(width, height) > max_dimension:
+        needs_work = True
+    if not needs_work:
+        return None
+
+    img, _format = _open(content)
+    if img is None:
+        return None
+    if max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    if source_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    buffer = BytesIO()
+    img.save(buffer, format=source_format, **INGEST_FORMATS[source_format])
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return ContentFile(buffer.getvalue(), name=os.path.basename(name or 'image'))
+
+
+def normalize_field_file(field_file):
+    """Normaliza la imagen de un FieldFile aún no guardado (llamar antes de Model.save)."""
+    if not field_file or getattr(field_file, '_committed', True):
+        return
+    normalized = normalize_upload(field_file.file, field_file.name)
+    if normalized is not None:
+        field_file.file = normalized
+
+
+def _base_name(name):
+    root, _ext = os.path.splitext(name)
+    return f'{DERIVATIVES_DIR}/{root}'
+
+
+def _manifest_name(name):
+    return f'{_base_name(name)}.json'
+
+
+def derivative_name(name, width, ext):
+    return f'{_base_name(name)}-w{width}.{ext}'
+
+
+def _manifest_cache_key(name):
+    return MANIFEST_CACHE_KEY.format(hashlib.md5(name.encode()).hexdigest())
+
+
+def build_derivatives(field_file, force=False):
+    """
+    Genera los derivados WebP y JPEG/PNG de la imagen y guarda el manifiesto.
+    Devuelve el manifiesto ({'width', 'height', 'fallback', 'widths'}) o None si falla
+    o si otro proceso la está generando.
+    """
+    name = field_file.name
+    if not force:
+        manifest = _read_manifest(name)
+        if manifest is not None:
+            return manifest
+    lock_key = BUILD_LOCK_KEY.format(hashlib.md5(name.encode()).hexdigest())
+    if not cache.add(lock_key, 1, BUILD_LOCK_TIMEOUT):
+        return None
+    try:
+        return _build(field_file.storage, name)
+    finally:
+        cache.delete(lock_key)
+
+
+def _build(storage, name):
+    from PIL import Image
+
+    manifest_name = _manifest_name(name)
+    try:
+        with storage.open(name, 'rb') as fh:
+            img, _format = _open(fh)
+    except (OSError, ValueError):
+        img = None
+    if img is None:
+        logger.warning('No se pudieron generar derivados de %s', name)
+        # Evita reintentar en cada render; se vuelve a probar pasado un rato
+        cache.set(_manifest_cache_key(name), False, 60 * 60)
+        return None
+
+    width, height = img.size
+    fallback = 'png' if _has_alpha(img) else 'jpg'
+    widths = [w for w in _widths() if w < width] + [min(width, _widths()[-1])]
+    widths = sorted(set(widths))
+    for w in widths:
+        h = max(1, round(height * w / width))
+        resized = img.resize((w, h), Image.LANCZOS) if w != width else img
+        webp = resized.convert('RGBA' if fallback == 'png' else 'RGB')
+        _save(derivative_name(name, w, 'webp'), webp, 'WEBP', quality=_quality(), method=4)
+        if fallback == 'png':
+            _save(derivative_name(name, w, 'png'), resized.convert('RGBA'), 'PNG', optimize=True)
+        else:
+            _save(
+                derivative_name(name, w, 'jpg'), resized.convert('RGB'), 'JPEG',
+                quality=_quality(), optimize=True, progressive=True,
+            )
+    manifest = {'width': width, 'height': height, 'fallback': fallback, 'widths': widths}
+    if default_storage.exists(manifest_name):
+        default_storage.delete(manifest_name)
+    default_storage.save(manifest_name, ContentFile(json.dumps(manifest).encode()))
+    cache.set(_manifest_cache_key(name), manifest, None)
+    return manifest
+
+
+def _save(path, img, fmt, **options):
+    buffer = BytesIO()
+    img.save(buffer, format=fmt, **options)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(buffer.getvalue()))
+
+
+def _read_manifest(name):
+    key = _manifest_cache_key(name)
+    manifest = cache.get(key)
+    if manifest:
+        return manifest
+    manifest_name = _manifest_name(name)
+    try:
+        if not default_storage.exists(manifest_name):
+            return None
+        with default_storage.open(manifest_name, 'rb') as fh:
+            manifest = json.loads(fh.read().decode())
+    except (OSError, ValueError):
+        return None
+    cache.set(key, manifest, None)
+    return manifest
+
+
+def _build_in_background(storage, name, lock_key):
+    try:
+        if _read_manifest(name) is None:
+            _build(storage, name)
+    except Exception:
+        logger.exception('Error generando derivados de %s', name)
+    finally:
+        cache.delete(lock_key)
+
+
+def schedule_derivatives(field_file):
+    """Encarga los derivados a un hilo en segundo plano (si nadie los está generando ya)."""
+    global _builder
+    name = field_file.name
+    lock_key = BUILD_LOCK_KEY.format(hashlib.md5(name.encode()).hexdigest())
+    if not cache.add(lock_key, 1, BUILD_LOCK_TIMEOUT):
+        return
+    with _builder_lock:
+        if _builder is None:
+            _builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+    _builder.submit(_build_in_background, field_file.storage, name, lock_key)
+
+
+def get_derivatives(field_file):
+    """
+    Manifiesto de derivados. Si aún no existen devuelve None y los encarga en segundo
+    plano (o los genera aquí si IMAGE_DERIVATIVES_ASYNC=False).
+    """
+    if not field_file or not getattr(field_file, 'name', None):
+        return None
+    cached = cache.get(_manifest_cache_key(field_file.name))
+    if cached is not None:
+        return cached or None
+    manifest = _read_manifest(field_file.name)
+    if manifest is not None:
+        return manifest
+    if not getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+        return build_derivatives(field_file)
+    schedule_derivatives(field_file)
+    return None
+
+
+def derivative_urls(field_file, ext):
+    """[(ancho, url)] de los derivados en el formato dado ('webp' o el de respaldo)."""
+    manifest = get_derivatives(field_file)
+    if not manifest:
+        return []
+    if ext != 'webp':
+        ext = manifest['fallback']
+    return [(w, default_storage.url(derivative_name(field_file.name, w, ext))) for w in manifest['widths']]
+
+
+def iter_image_field_files():
+    """Recorre los FieldFile de IMAGE_FIELDS con imagen (para el comando de derivados)."""
+    from django.apps import apps
+
+    for label, field_name in IMAGE_FIELDS:
+        model = apps.get_model(label)
+        qs = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        for obj in qs.only('pk', field_name).iterator(chunk_size=200):
+            yield label, getattr(obj, field_name)
@@ -0,0 +1,132 @@
+"""
+Lectura incremental de arrays JSON grandes (catálogo de Tersa, datos geográficos):
+se decodifica un elemento a la vez sin cargar el archivo completo en memoria.
+
+Los límites de cada elemento se encuentran contando llaves/corchetes (fuera de las
+cadenas) con una expresión regular, en tiempo lineal; así un elemento de varios MB
+se puede saltar sin decodificarlo (iter_json_array_raw + object_fields).
+"""
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+# Siguiente llave/corchete fuera de cadenas (anclada: si no coincide falta texto)
+_BRACKET = re.compile(r'(?:[^"{}\[\]]|"[^"\\]*(?:\\.[^"\\]*)*")*([{}\[\]])')
+# Llave/corchete o cadena, para leer las claves de primer nivel
+_TOKEN = re.compile(r'[{}\[\]]|"[^"\\]*(?:\\.[^"\\]*)*"')
+_COLON = re.compile(r'\s*:\s*')
+
+
+def iter_json_array_raw(fp, chunk_size=CHUNK_SIZE):
+    """
+    Recorre los elementos de un array JSON leyendo el archivo (binario) por bloques y
+    devuelve el texto de cada uno sin decodificarlo. Si el documento no es un array no
+    devuelve nada.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+    started = False
+
+    def fill(size):
+        nonlocal buffer, pos, eof
+        buffer = buffer[pos:]
+        pos = 0
+        chunk = fp.read(size)
+        if not chunk:
+            eof = True
+        buffer += utf8.decode(chunk or b'', final=not chunk)
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                if started:
+                    raise ValueError('Array JSON incompleto')
+                return
+            fill(chunk_size)
+            continue
+        if not started:
+            if buffer[pos] != '[':
+                return
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == ']':
+            return
+
+        if buffer[pos] not in '{[':
+            # Escalar: es corto, se decodifica directamente
+            try:
+                _, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill(chunk_size)
+                continue
+            if end == len(buffer) and not eof:
+                # Un número al final del bloque puede estar cortado: leer más y repetir
+                fill(chunk_size)
+                continue
+            yield buffer[pos:end]
+            pos = end
+            continue
+
+        # Objeto o array: avanzar hasta cerrar el primer nivel
+        scan = pos
+        depth = 0
+        end = None
+        while end is None:
+            match = _BRACKET.match(buffer, scan)
+            if match:
+                scan = match.end()
+                depth += 1 if match.group(1) in '{[' else -1
+                if depth == 0:
+                    end = scan
+                continue
+            # El resto del bloque no cierra nada: leer más (el doble cada vez, para que
+            # un elemento grande no se vuelva a copiar muchas veces)
+            if eof:
+                raise ValueError('Array JSON incompleto')
+            scan -= pos
+            fill(max(chunk_size, len(buffer) - pos))
+        yield buffer[pos:end]
+        pos = end
+
+
+def iter_json_array(fp, chunk_size=CHUNK_SIZE):
+    """Como iter_json_array_raw, pero devuelve cada elemento ya decodificado."""
+    for text in iter_json_array_raw(fp, chunk_size=chunk_size):
+        yield json.loads(text)
+
+
+def object_fields(text, keys):
+    """
+    Valores de las claves de primer nivel de un objeto JSON (texto) sin decodificarlo
+    completo; se detiene al encontrarlas todas. Las claves ausentes no se incluyen.
+    """
+    decoder = json.JSONDecoder()
+    found = {}
+    depth = 0
+    pos = 0
+    while len(found) < len(keys):
+        match = _TOKEN.search(text, pos)
+        if not match:
+            break
+        pos = match.end()
+        token = match.group()
+        if token[0] != '"':
+            depth += 1 if token in '{[' else -1
+            continue
+        colon = _COLON.match(text, pos) if depth == 1 else None
+        if not colon:
+            continue
+        key = json.loads(token)
+        if key in keys and key not in found:
+            found[key], pos = decoder.raw_decode(text, colon.end())
+    return found
@@ -0,0 +1,44 @@
+"""
+Genera los derivados responsive (WebP y JPEG/PNG de ancho fijo) de las imágenes de
+productos, variantes, marcas, categorías y slides del home.
+
+Sin este comando los derivados se generan en segundo plano al primer uso en la
+plantilla (mientras tanto se sirve el original); ejecutarlo tras un despliegue o una
+sincronización masiva los deja listos desde la primera visita.
+
+Uso:
+  python manage.py build_image_derivatives
+  python manage.py build_image_derivatives --force
+  python manage.py build_image_derivatives --model products.ProductImage
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.images import IMAGE_FIELDS, build_derivatives, iter_image_field_files
+
+
+class Command(BaseCommand):
+    help = 'Genera los derivados responsive de las imágenes del catálogo y del home.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerar aunque ya existan (p. ej. tras cambiar IMAGE_DERIVATIVE_WIDTHS).',
+        )
+        parser.add_argument(
+            '--model',
+            choices=[label for label, _field in IMAGE_FIELDS],
+            help='Procesar solo este modelo.',
+        )
+
+    def handle(self, *args, **options):
+        built = failed = 0
+        for label, field_file in iter_image_field_files():
+            if options['model'] and label != options['model']:
+                continue
+            if build_derivatives(field_file, force=options['force']):
+                built += 1
+            else:
+                failed += 1
+                self.stderr.write(f'  {label}: no se pudo procesar {field_file.name}')
+        self.stdout.write(self.style.SUCCESS(f'Imágenes procesadas: {built}, con error: {failed}'))
@@ -1,25 +1,35 @@
 """
-Carga país Colombia con sus departamentos (estados) y ciudades desde un JSON.
-Formato esperado: array de países con "name", "iso2", "iso3", "phonecode", "states"
-y cada state con "name", "iso2", "cities" (array de {"name"}).
+Carga países con sus departamentos (estados) y ciudades desde un JSON (por defecto
+Colombia). Formato esperado: array de países con "name", "iso2", "iso3", "phonecode",
+"states" y cada state con "name", "iso2", "cities" (array de {"name"}).
+
+El archivo se lee país por país (no se carga completo en memoria); los países no
+pedidos se saltan sin decodificarlos. Los estados y ciudades se insertan con bulk_create por lotes, ignorando los que ya existen: volver
+a ejecutarlo solo agrega lo nuevo.
 
 Uso:
   python manage.py load_colombia_geo
   python manage.py load_colombia_geo --file "ruta/al/archivo/countries+states+cities.json"
+  python manage.py load_colombia_geo --country CO --country MX   # ISO2 o nombre
+  python manage.py load_colombia_geo --country "CO,EC,PE" --replace
 """
 import json
 import os
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
+from apps.core.json_stream import iter_json_array_raw, object_fields
 from apps.core.models import Country, State, City
 
 
 DEFAULT_JSON_PATH = r"C:\Users\User\Documents\ncs3\NSC-INTERNATIONAL\data\countries+states+cities.json"
+BATCH_SIZE = 2000
+NAME_MAX_LENGTH = 100
 
 
 class Command(BaseCommand):
-    help = 'Carga Colombia (país, departamentos/estados y ciudades) desde el JSON countries+states+cities.'
+    help = 'Carga países (por defecto Colombia) con departamentos/estados y ciudades desde el JSON countries+states+cities.'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -28,92 +38,118 @@ class Command(BaseCommand):
             default=DEFAULT_JSON_PATH,
             help=f'Ruta al archivo JSON (por defecto: {DEFAULT_JSON_PATH})',
         )
+        parser.add_argument(
+            '--country',
+            action='append',
+            default=None,
+            help='País a cargar por código ISO2 o nombre; se puede repetir o separar por comas (por defecto: CO).',
+        )
         parser.add_argument(
             '--replace',
             action='store_true',
-            help='Eliminar datos previos de Colombia antes de cargar (país y sus estados/ciudades).',
+            help='Eliminar datos previos de los países cargados antes de insertar (país y sus estados/ciudades).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Filas por INSERT (por defecto: {BATCH_SIZE}).',
         )
 
     def handle(self, *args, **options):
         filepath = options['file']
-        replace = options['replace']
+        wanted = {
+            code.strip().casefold()
+            for value in (options['country'] or ['CO'])
+            for code in value.split(',') if code.strip()
+        }
 
         if not os.path.isfile(filepath):
             self.stderr.write(self.style.ERROR(f'No se encontró el archivo: {filepath}'))
             return
 
         self.stdout.write(f'Leyendo {filepath}...')
+        found = set()
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
+            with open(filepath, 'rb') as f:
+                for text in iter_json_array_raw(f):
+                    if not text.startswith('{'):
+                        continue
+                    fields = object_fields(text, ('iso2', 'name'))
+                    keys = {
+                        str(fields.get('iso2') or '').strip().casefold(),
+                        str(fields.get('name') or '').strip().casefold(),
+                    } & wanted
+                    if not keys:
+                        continue
+                    self.load_country(json.loads(text), options['replace'], max(1, options['batch_size']))
+                    found |= keys
+                    if found >= wanted:
+                        break
+        except ValueError as e:
             self.stderr.write(self.style.ERROR(f'Error al leer el JSON: {e}'))
             return
 
-        if not isinstance(data, list):
-            self.stderr.write(self.style.ERROR('El JSON debe ser un array de países.'))
-            return
+        missing = wanted - found
+        if missing:
+            self.stderr.write(self.style.ERROR(
+                'No se encontraron en el JSON: ' + ', '.join(sorted(missing))
+            ))
 
-        colombia = None
-        for c in data:
-            if (c.get('name') or '').strip() == 'Colombia':
-                colombia = c
-                break
-
-        if not colombia:
-            self.stderr.write(self.style.ERROR('No se encontró "Colombia" en el JSON.'))
-            return
+    @transaction.atomic
+    def load_country(self, data, replace, batch_size):
+        name = data['name'].strip()
+        iso2 = data.get('iso2') or ''
+        iso3 = data.get('iso3') or ''
+        phonecode = str(data.get('phonecode') or '')
 
         if replace:
-            Country.objects.filter(name='Colombia').delete()
-            self.stdout.write('Datos previos de Colombia eliminados.')
+            Country.objects.filter(name=name).delete()
+            self.stdout.write(f'Datos previos de {name} eliminados.')
 
         country, created = Country.objects.get_or_create(
-            name='Colombia',
-            defaults={
-                'iso2': colombia.get('iso2') or 'CO',
-                'iso3': colombia.get('iso3') or 'COL',
-                'phonecode': str(colombia.get('phonecode') or '57'),
-            }
+            name=name,
+            defaults={'iso2': iso2, 'iso3': iso3, 'phonecode': phonecode},
         )
-        if created:
-            self.stdout.write(self.style.SUCCESS('País Colombia creado.'))
-        else:
-            country.iso2 = colombia.get('iso2') or 'CO'
-            country.iso3 = colombia.get('iso3') or 'COL'
-            country.phonecode = str(colombia.get('phonecode') or '57')
+        if not created and (country.iso2, country.iso3, country.phonecode) != (iso2, iso3, phonecode):
+            country.iso2, country.iso3, country.phonecode = iso2, iso3, phonecode
             country.save()
-            self.stdout.write('País Colombia actualizado.')
 
-        states_data = colombia.get('states') or []
-        states_created = 0
-        cities_created = 0
+        states_before = State.objects.filter(country=country).count()
+        cities_before = City.objects.filter(state__country=country).count()
+
+        states_data = [
+            ((st.get('name') or '').strip()[:NAME_MAX_LENGTH], st)
+            for st in data.get('states') or []
+        ]
+        State.objects.bulk_create(
+            [
+                State(country=country, name=state_name, iso2=(st.get('iso2') or '')[:10])
+                for state_name, st in states_data if state_name
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        state_ids = dict(State.objects.filter(country=country).values_list('name', 'id'))
 
-        for st in states_data:
-            state_name = (st.get('name') or '').strip()
-            if not state_name:
+        pending = []
+        for state_name, st in states_data:
+            state_id = state_ids.get(state_name)
+            if not state_id:
                 continue
-            state, state_created = State.objects.get_or_create(
-                country=country,
-                name=state_name,
-                defaults={'iso2': (st.get('iso2') or '')[:10]}
-            )
-            if state_created:
-                states_created += 1
-
             for ct in st.get('cities') or []:
-                city_name = (ct.get('name') or '').strip()
-                if not city_name:
-                    continue
-                _, city_created = City.objects.get_or_create(
-                    state=state,
-                    name=city_name
-                )
-                if city_created:
-                    cities_created += 1
-
+                city_name = (ct.get('name') or '').strip()[:NAME_MAX_LENGTH]
+                if city_name:
+                    pending.append(City(state_id=state_id, name=city_name))
+                if len(pending) >= batch_size:
+                    City.objects.bulk_create(pending, ignore_conflicts=True)
+                    pending = []
+        if pending:
+            City.objects.bulk_create(pending, ignore_conflicts=True)
+
+        states_total = State.objects.filter(country=country).count()
+        cities_total = City.objects.filter(state__country=country).count()
         self.stdout.write(self.style.SUCCESS(
-            f'Colombia cargada: 1 país, {State.objects.filter(country=country).count()} departamentos, '
-            f'{City.objects.filter(state__country=country).count()} ciudades. '
-            f'(Nuevos: {states_created} estados, {cities_created} ciudades)'
+            f'{name} cargado: {states_total} departamentos, {cities_total} ciudades. '
+            f'(Nuevos: {states_total - states_before} estados, {cities_total - cities_before} ciudades)'
         ))
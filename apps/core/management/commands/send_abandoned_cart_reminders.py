@@ -1,21 +1,24 @@
 """
-Envía recordatorios de carrito abandonado a leads que aún no han recibido uno.
+Envía recordatorios de carrito abandonado a leads que aún no han recibido uno y a
+usuarios con carrito guardado (Cart) sin cambios desde hace N horas.
 
 Uso:
   python manage.py send_abandoned_cart_reminders
   python manage.py send_abandoned_cart_reminders --hours 1
+  python manage.py send_abandoned_cart_reminders --max-days 7   # ignora carritos más antiguos
 """
 from decimal import Decimal
 from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
 from django.utils import timezone
 from datetime import timedelta
 
-from apps.cart.models import AbandonedCartLead
+from apps.cart.models import AbandonedCartLead, Cart, CartLine
 from apps.core.emails import notify_cart_abandoned
 
 
 class Command(BaseCommand):
-    help = 'Envía recordatorios de carrito abandonado a leads pendientes.'
+    help = 'Envía recordatorios de carrito abandonado a leads pendientes y carritos guardados de usuarios.'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -24,6 +27,12 @@ class Command(BaseCommand):
             default=1,
             help='Solo leads creados hace al menos N horas (default: 1)',
         )
+        parser.add_argument(
+            '--max-days',
+            type=int,
+            default=7,
+            help='Carritos de usuarios: ignorar los que no cambian hace más de N días (default: 7)',
+        )
         parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -35,6 +44,8 @@ class Command(BaseCommand):
         dry_run = options['dry_run']
         cutoff = timezone.now() - timedelta(hours=hours)
 
+        self.send_cart_reminders(cutoff, timezone.now() - timedelta(days=max(1, options['max_days'])), dry_run)
+
         qs = AbandonedCartLead.objects.filter(
             reminder_sent_at__isnull=True,
             created_at__lte=cutoff,
@@ -78,3 +89,43 @@ class Command(BaseCommand):
                 self.stderr.write(self.style.ERROR(f'  Error {lead.email}: {e}'))
 
         self.stdout.write(self.style.SUCCESS(f'Se enviaron {sent} recordatorio(s).'))
+
+    def send_cart_reminders(self, cutoff, oldest, dry_run):
+        """Carritos guardados de usuarios (un carrito solo existe si tiene líneas)."""
+        carts = list(
+            Cart.objects
+            .filter(reminder_sent_at__isnull=True, updated_at__lte=cutoff, updated_at__gte=oldest)
+            .exclude(user__email='')
+            .select_related('user')
+            .prefetch_related(Prefetch(
+                'lines', queryset=CartLine.objects.select_related('product', 'variant').order_by('pk')
+            ))
+        )
+        if not carts:
+            return
+        self.stdout.write(f'Carritos de usuarios a procesar: {len(carts)}')
+        if dry_run:
+            for cart in carts:
+                self.stdout.write(f'  - {cart.user.email} ({len(cart.lines.all())} items)')
+            return
+
+        sent = 0
+        for cart in carts:
+            cart_items = [
+                {
+                    'product_name': line.product.name,
+                    'variant': str(line.variant) if line.variant else '',
+                    'quantity': line.quantity,
+                    'total': line.price * line.quantity,
+                }
+                for line in cart.lines.all()
+            ]
+            try:
+                notify_cart_abandoned(cart.user.email, cart_items, sum(i['total'] for i in cart_items))
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'  Error {cart.user.email}: {e}'))
+                continue
+            Cart.objects.filter(pk=cart.pk).update(reminder_sent_at=timezone.now())
+            sent += 1
+            self.stdout.write(self.style.SUCCESS(f'  Enviado a {cart.user.email}'))
+        self.stdout.write(self.style.SUCCESS(f'Se enviaron {sent} recordatorio(s) de carritos guardados.'))
@@ -239,6 +239,11 @@ class HomeHeroSlide(models.Model):
     def __str__(self):
         return self.title[:50]
 
+    def save(self, *args, **kwargs):
+        from .images import normalize_field_file
+        normalize_field_file(self.image)
+        super().save(*args, **kwargs)
+
 
 class HomeAboutBlock(models.Model):
     """Bloque de contenido de la sección Sobre nosotros."""
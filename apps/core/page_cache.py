@@ -0,0 +1,151 @@
+"""
+Caché de página completa para visitantes anónimos (tienda, categorías y home).
+
+Solo se cachean GET/HEAD de usuarios anónimos sin mensajes pendientes. La clave
+incluye host, ruta y query string normalizada, además de la versión del catálogo y
+la del home/ajustes del sitio: al subir cualquiera de ellas las páginas viejas dejan
+de usarse.
+
+Lo propio de cada visitante se resuelve al servir la página:
+  - El token CSRF se guarda como marcador y se sustituye por get_token(request).
+  - El carrito se pinta vacío; si el visitante tiene sesión, el sidebar lo carga con
+    la llamada JSON existente (cart:sidebar_json).
+  - Con mensajes (cookie `messages`) o usuario autenticado no se usa la caché.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+HOME_VERSION_KEY = 'page_cache:home_version'
+PAGE_KEY = 'page_cache:page:{}:{}:{}'
+STATS_KEY = 'page_cache:stats:{}'
+STATS_SINCE_KEY = 'page_cache:stats:since'
+CSRF_PLACEHOLDER = '__page_cache_csrf__'
+CART_PLACEHOLDER = '__page_cache_cart__'
+
+
+def get_home_version():
+    """Versión de home/ajustes del sitio (se inicializa con un timestamp si no existe)."""
+    version = cache.get(HOME_VERSION_KEY)
+    if version is None:
+        cache.add(HOME_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(HOME_VERSION_KEY) or 0
+    return version
+
+
+def bump_home_version(**kwargs):
+    """Invalida las páginas cacheadas (secciones del home o ajustes del sitio). Sirve como receptor."""
+    try:
+        cache.incr(HOME_VERSION_KEY)
+    except ValueError:
+        cache.set(HOME_VERSION_KEY, int(time.time() * 1000), None)
+
+
+def _record(event):
+    key = STATS_KEY.format(event)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(STATS_SINCE_KEY, int(time.time()), None)
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_page_cache_stats():
+    """Aciertos, fallos y omisiones desde que se empezó a contar."""
+    from datetime import datetime, timezone as dt_timezone
+
+    stats = cache.get_many([STATS_KEY.format(e) for e in ('hit', 'miss', 'bypass')] + [STATS_SINCE_KEY])
+    hits = stats.get(STATS_KEY.format('hit'), 0)
+    misses = stats.get(STATS_KEY.format('miss'), 0)
+    since = stats.get(STATS_SINCE_KEY)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'bypass': stats.get(STATS_KEY.format('bypass'), 0),
+        'hit_ratio': round(100 * hits / (hits + misses), 1) if hits + misses else None,
+        'since': datetime.fromtimestamp(since, tz=dt_timezone.utc) if since else None,
+        'timeout': getattr(settings, 'PAGE_CACHE_TIMEOUT', 300),
+    }
+
+
+def page_cache_key(request, allowed_params=None):
+    """
+    Clave de la página o None si la petición no es cacheable.
+    allowed_params=None ignora la query string; si es un conjunto, cualquier otro
+    parámetro (utm_*, fbclid…) deja la petición fuera de la caché.
+    """
+    if not getattr(settings, 'PAGE_CACHE_TIMEOUT', 300):
+        return None
+    if request.method not in ('GET', 'HEAD') or 'messages' in request.COOKIES:
+        return None
+    if settings.SESSION_COOKIE_NAME in request.COOKIES and request.user.is_authenticated:
+        return None
+    query = ''
+    if allowed_params is not None:
+        if any(param not in allowed_params for param in request.GET):
+            return None
+        query = urlencode(sorted(
+            (k, v) for k, values in request.GET.lists() for v in values
+        ))
+    from apps.products.catalog import get_catalog_version
+
+    digest = hashlib.md5(
+        f'{request.scheme}://{request.get_host()}{request.path}?{query}'.encode()
+    ).hexdigest()
+    return PAGE_KEY.format(get_catalog_version(), get_home_version(), digest)
+
+
+def _serve(request, entry, state):
+    """Respuesta a partir de la página guardada, con los huecos de este visitante."""
+    content = entry['content']
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    has_session = settings.SESSION_COOKIE_NAME in request.COOKIES
+    content = content.replace(CART_PLACEHOLDER, '1' if has_session else '0')
+    response = HttpResponse(content, content_type=entry['content_type'])
+    response['X-Page-Cache'] = state
+    return response
+
+
+class AnonymousPageCacheMixin:
+    """
+    Mixin para vistas basadas en plantilla: sirve la página desde caché a anónimos.
+    page_cache_params: parámetros GET admitidos (None = se ignora la query string).
+    """
+    page_cache_params = None
+
+    def dispatch(self, request, *args, **kwargs):
+        key = page_cache_key(request, self.page_cache_params)
+        if key is None:
+            _record('bypass')
+            return super().dispatch(request, *args, **kwargs)
+        entry = cache.get(key)
+        if entry is not None:
+            _record('hit')
+            return _serve(request, entry, 'hit')
+
+        request.page_cache_render = True
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200 or not hasattr(response, 'render'):
+            return response
+        response.render()
+        entry = {
+            'content': response.content.decode(response.charset),
+            'content_type': response['Content-Type'],
+        }
+        cache.set(key, entry, getattr(settings, 'PAGE_CACHE_TIMEOUT', 300))
+        _record('miss')
+        return _serve(request, entry, 'miss')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if getattr(self.request, 'page_cache_render', False):
+            # {% csrf_token %} usa este valor; se sustituye al servir la página
+            context['csrf_token'] = CSRF_PLACEHOLDER
+        return context
@@ -0,0 +1,199 @@
+"""
+Paginación por cursor (keyset) para listados grandes.
+
+Con `?cursor=` en la URL la vista pagina con WHERE (columna de orden, id) > último visto
+en lugar de COUNT(*) + OFFSET. Sin ese parámetro se mantiene la paginación clásica
+`?page=N` (páginas indexables por SEO). El cursor va firmado para que no se pueda
+manipular a mano.
+
+Requisitos: el orden del queryset debe ser sobre campos o anotaciones no nulos; el
+desempate por `pk` se añade automáticamente.
+"""
+import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+
+CURSOR_SALT = 'core.pagination.keyset'
+
+
+class KeysetNotSupported(Exception):
+    """El orden del queryset no se puede paginar por cursor."""
+
+
+def _encode_value(value):
+    if isinstance(value, Decimal):
+        return ['d', str(value)]
+    if isinstance(value, datetime.datetime):
+        return ['t', value.isoformat()]
+    if isinstance(value, datetime.date):
+        return ['D', value.isoformat()]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return ['v', value]
+    raise KeysetNotSupported(f'Tipo no soportado en cursor: {type(value).__name__}')
+
+
+def _decode_value(item):
+    kind, raw = item
+    if kind == 'd':
+        return Decimal(raw)
+    if kind == 't':
+        return datetime.datetime.fromisoformat(raw)
+    if kind == 'D':
+        return datetime.date.fromisoformat(raw)
+    return raw
+
+
+def ordering_keys(queryset):
+    """Lista [(nombre, descendente)] del orden del queryset, terminando en pk."""
+    ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+    keys = []
+    for term in ordering:
+        if isinstance(term, str):
+            if term == '?':
+                raise KeysetNotSupported('Orden aleatorio')
+            desc = term.startswith('-')
+            name = term.lstrip('-')
+        elif isinstance(term, OrderBy) and isinstance(term.expression, F):
+            if term.nulls_first or term.nulls_last:
+                raise KeysetNotSupported('Orden con NULLS FIRST/LAST')
+            desc = term.descending
+            name = term.expression.name
+        else:
+            raise KeysetNotSupported(f'Orden no soportado: {term!r}')
+        if name in ('id', queryset.model._meta.pk.name):
+            name = 'pk'
+        keys.append((name, desc))
+        if name == 'pk':
+            break
+    if not keys or keys[-1][0] != 'pk':
+        keys.append(('pk', keys[-1][1] if keys else False))
+    return keys
+
+
+class KeysetPage:
+    """Página por cursor con la interfaz mínima de django.core.paginator.Page."""
+    is_keyset = True
+    paginator = None
+    number = None
+
+    def __init__(self, object_list, next_cursor, is_first):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return not self.is_first
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        return None
+
+
+def paginate_keyset(queryset, page_size, cursor=None):
+    """
+    Devuelve (object_list, next_cursor). Consulta page_size + 1 filas para saber si
+    hay más, sin COUNT. Lanza KeysetNotSupported o signing.BadSignature si aplica.
+    """
+    keys = ordering_keys(queryset)
+    aliases = []
+    annotations = {}
+    for i, (name, _desc) in enumerate(keys):
+        if name == 'pk':
+            aliases.append('pk')
+        else:
+            alias = f'_keyset_{i}'
+            annotations[alias] = F(name)
+            aliases.append(alias)
+    qs = queryset.annotate(**annotations).order_by(
+        *[('-' if desc else '') + alias for alias, (_name, desc) in zip(aliases, keys)]
+    )
+    if cursor:
+        values = [_decode_value(v) for v in signing.loads(cursor, salt=CURSOR_SALT)]
+        if len(values) != len(keys):
+            raise signing.BadSignature('Cursor de otro orden')
+        condition = Q()
+        for i, (alias, (_name, desc)) in enumerate(zip(aliases, keys)):
+            step = Q(**{f'{alias}__{"lt" if desc else "gt"}': values[i]})
+            for j in range(i):
+                step &= Q(**{aliases[j]: values[j]})
+            condition |= step
+        qs = qs.filter(condition)
+    rows = list(qs[:page_size + 1])
+    object_list = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = cursor_for(object_list[-1], aliases)
+    return object_list, next_cursor
+
+
+def cursor_for(obj, aliases):
+    """Cursor firmado que apunta a continuación de `obj`."""
+    values = [_encode_value(getattr(obj, alias)) for alias in aliases]
+    return signing.dumps(values, salt=CURSOR_SALT, compress=True)
+
+
+class KeysetPaginationMixin:
+    """
+    Mixin para ListView: `?cursor=` activa la paginación por cursor; si no, usa
+    paginate_queryset_by_number (por defecto la paginación clásica de ListView).
+    """
+    cursor_kwarg = 'cursor'
+
+    def is_keyset_request(self):
+        return self.cursor_kwarg in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.is_keyset_request():
+            cursor = self.request.GET.get(self.cursor_kwarg) or None
+            try:
+                object_list, next_cursor = paginate_keyset(queryset, page_size, cursor)
+            except (KeysetNotSupported, signing.BadSignature, ValueError, TypeError):
+                pass
+            else:
+                page = KeysetPage(object_list, next_cursor, is_first=cursor is None)
+                return None, page, object_list, page.has_other_pages()
+        return self.paginate_queryset_by_number(queryset, page_size)
+
+    def paginate_queryset_by_number(self, queryset, page_size):
+        return super().paginate_queryset(queryset, page_size)
+
+    def _cursor_after_page(self, page):
+        """Cursor tras la última fila de una página clásica (para pasar a scroll por cursor)."""
+        try:
+            names = [name for name, _desc in ordering_keys(self.object_list)]
+            if any('__' in name for name in names):
+                return None
+            return cursor_for(list(page.object_list)[-1], names)
+        except (KeysetNotSupported, AttributeError, IndexError):
+            return None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        next_cursor = getattr(page, 'next_cursor', None)
+        if page is not None and not getattr(page, 'is_keyset', False) and page.has_next():
+            next_cursor = self._cursor_after_page(page)
+        context['next_cursor'] = next_cursor
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        params.pop(self.cursor_kwarg, None)
+        context['keyset_first_url'] = '?' + params.urlencode() + ('&' if params else '') + f'{self.cursor_kwarg}='
+        context['keyset_next_url'] = None
+        if next_cursor:
+            params[self.cursor_kwarg] = next_cursor
+            context['keyset_next_url'] = '?' + params.urlencode()
+        return context
@@ -0,0 +1,175 @@
+"""
+Importación de precios de envío desde Excel (panel > Envíos > Importar).
+
+- Las ciudades se resuelven contra un índice en memoria (una sola consulta) con
+  nombres sin tildes ni mayúsculas: "Bogota, D.C." y "BOGOTÁ, D.C." son la misma.
+- Las filas se leen de forma perezosa (openpyxl en modo read_only).
+- Se compara con los precios existentes y solo se escriben los cambios con
+  bulk_create / bulk_update; en vista previa no se escribe nada.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import City, ShippingPrice
+from .text import normalize_text
+
+SHEET_NAME = 'Precios de envío'
+PRICE_STEP = Decimal('0.01')
+FIELDS = ('price', 'delivery_days_min', 'delivery_days_max', 'is_active')
+FIELD_LABELS = {
+    'price': 'Precio', 'delivery_days_min': 'Días mín',
+    'delivery_days_max': 'Días máx', 'is_active': 'Activo',
+}
+
+HEADER_ALIASES = {
+    'ciudad': 'ciudad', 'departamento': 'departamento', 'pais': 'pais',
+    'país': 'pais', 'precio': 'precio',
+    'días mín': 'dias_min', 'dias mín': 'dias_min', 'días min': 'dias_min', 'dias min': 'dias_min',
+    'dias mn': 'dias_min', 'días mn': 'dias_min',
+    'días máx': 'dias_max', 'dias máx': 'dias_max', 'días max': 'dias_max', 'dias max': 'dias_max',
+    'dias mx': 'dias_max', 'días mx': 'dias_max', 'estado': 'estado',
+}
+
+
+def column_map(header_row):
+    """Índice de columna por campo a partir de la fila de encabezados."""
+    header_row = [str(c).strip() if c is not None else '' for c in header_row]
+    col_map = {}
+    for i, h in enumerate(header_row):
+        h_clean = h.lower().strip()
+        key = HEADER_ALIASES.get(h_clean)
+        if key and key not in col_map:
+            col_map[key] = i
+        if not key and ('min' in h_clean or 'mín' in h_clean or 'mn' in h_clean) and ('dia' in h_clean or 'días' in h_clean or 'dias' in h_clean):
+            col_map.setdefault('dias_min', i)
+        if not key and ('max' in h_clean or 'máx' in h_clean or 'mx' in h_clean) and ('dia' in h_clean or 'días' in h_clean or 'dias' in h_clean):
+            col_map.setdefault('dias_max', i)
+
+    if len(header_row) >= 6 and 'dias_min' not in col_map:
+        col_map['dias_min'] = 4
+    if len(header_row) >= 7 and 'dias_max' not in col_map:
+        col_map['dias_max'] = 5
+    return col_map
+
+
+class CityIndex:
+    """Ciudades por (ciudad, departamento, país) normalizados; si falta el departamento, por (ciudad, país) cuando es única."""
+
+    def __init__(self):
+        self.by_state = {}
+        self.by_country = {}
+        rows = City.objects.values_list('id', 'name', 'state__name', 'state__country__name')
+        for city_id, city, state, country in rows.iterator(chunk_size=2000):
+            city, state, country = (normalize_text(v) for v in (city, state, country))
+            self.by_state[(city, state, country)] = city_id
+            key = (city, country)
+            self.by_country[key] = None if key in self.by_country else city_id
+
+    def lookup(self, city, state, country):
+        city, state, country = (normalize_text(v) for v in (city, state, country))
+        city_id = self.by_state.get((city, state, country))
+        if city_id is None and not state:
+            city_id = self.by_country.get((city, country))
+        return city_id
+
+
+def _display(value):
+    if isinstance(value, bool):
+        return 'Sí' if value else 'No'
+    return '' if value is None else str(value)
+
+
+def _parse_row(row, col_map):
+    def val(key, default=None):
+        idx = col_map.get(key)
+        if idx is None or idx >= len(row):
+            return default
+        v = row[idx]
+        if v is None or (isinstance(v, str) and not v.strip()):
+            return default
+        return v
+
+    def integer(key):
+        try:
+            return max(0, int(val(key, 0) or 0))
+        except (TypeError, ValueError):
+            return 0
+
+    try:
+        price = Decimal(str(val('precio', 0))).quantize(PRICE_STEP)
+    except (InvalidOperation, ValueError):
+        price = Decimal('0.00')
+    return {
+        'city': str(val('ciudad', '') or '').strip(),
+        'state': str(val('departamento', '') or '').strip(),
+        'country': str(val('pais', '') or '').strip() or 'Colombia',
+        'values': {
+            'price': price,
+            'delivery_days_min': integer('dias_min'),
+            'delivery_days_max': integer('dias_max'),
+            'is_active': str(val('estado', 'Activo') or 'Activo').strip().lower().startswith('activo'),
+        },
+    }
+
+
+class ShippingPriceImport:
+    """
+    Resultado de comparar las filas del Excel con los precios guardados:
+    to_create / to_update (instancias), changes (para la vista previa),
+    unchanged y not_found.
+    """
+
+    def __init__(self, rows, col_map):
+        index = CityIndex()
+        existing = {sp.city_id: sp for sp in ShippingPrice.objects.order_by()}
+        planned = {}
+        self.not_found = []
+        for row in rows:
+            data = _parse_row(list(row) if row else [], col_map)
+            if not data['city']:
+                continue
+            city_id = index.lookup(data['city'], data['state'], data['country'])
+            if city_id is None:
+                self.not_found.append(f"{data['city']}, {data['state']}, {data['country']}")
+                continue
+            # Si la ciudad se repite en el archivo gana la última fila
+            planned[city_id] = data
+
+        self.to_create = []
+        self.to_update = []
+        self.changes = []
+        self.unchanged = 0
+        for city_id, data in planned.items():
+            values = data['values']
+            current = existing.get(city_id)
+            if current is None:
+                self.to_create.append(ShippingPrice(city_id=city_id, **values))
+                self.changes.append({'row': data, 'action': 'create', 'fields': [
+                    (FIELD_LABELS[field], '', _display(values[field])) for field in FIELDS
+                ]})
+                continue
+            diff = [
+                (FIELD_LABELS[field], _display(getattr(current, field)), _display(values[field]))
+                for field in FIELDS if getattr(current, field) != values[field]
+            ]
+            if not diff:
+                self.unchanged += 1
+                continue
+            for field in FIELDS:
+                setattr(current, field, values[field])
+            self.to_update.append(current)
+            self.changes.append({'row': data, 'action': 'update', 'fields': diff})
+
+    @property
+    def created(self):
+        return len(self.to_create)
+
+    @property
+    def updated(self):
+        return len(self.to_update)
+
+    def apply(self):
+        with transaction.atomic():
+            ShippingPrice.objects.bulk_create(self.to_create, batch_size=500)
+            ShippingPrice.objects.bulk_update(self.to_update, FIELDS, batch_size=500)
@@ -27,3 +27,27 @@ def safe_file_url(field):
         return field.url
     except (ValueError, OSError, AttributeError):
         return ''
+
+
+@register.simple_tag
+def image_srcset(field, sizes='100vw', preload=False):
+    """
+    Atributos src/srcset/sizes de una imagen con derivados responsive (WebP en srcset,
+    JPEG/PNG en src). Con preload=True devuelve href/imagesrcset/imagesizes para
+    <link rel="preload">. Si no hay derivados, solo la URL original.
+    Uso: <img {% image_srcset product.images.first.image "(max-width: 575px) 50vw, 300px" %} alt="...">
+    """
+    from django.utils.html import format_html
+    from apps.core.images import derivative_urls
+
+    try:
+        webp = derivative_urls(field, 'webp')
+        fallback = derivative_urls(field, 'fallback')
+    except Exception:
+        webp = fallback = []
+    if not webp:
+        return format_html('{}="{}"', 'href' if preload else 'src', safe_file_url(field))
+    srcset = ', '.join(f'{url} {w}w' for w, url in webp)
+    if preload:
+        return format_html('href="{}" imagesrcset="{}" imagesizes="{}"', fallback[-1][1], srcset, sizes)
+    return format_html('src="{}" srcset="{}" sizes="{}"', fallback[-1][1], srcset, sizes)
@@ -0,0 +1,78 @@
+"""
+Tests del procesado de imágenes: normalización al subir y derivados responsive.
+"""
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from apps.core import images
+from apps.products.models import Product, ProductImage
+
+
+def make_jpeg(size, exif=True):
+    from PIL import Image
+    img = Image.new('RGB', size, color='blue')
+    buf = io.BytesIO()
+    options = {}
+    if exif:
+        data = Image.Exif()
+        data[0x010F] = 'Camara'  # Make
+        options['exif'] = data.tobytes()
+    img.save(buf, format='JPEG', **options)
+    return SimpleUploadedFile('foto.jpg', buf.getvalue(), content_type='image/jpeg')
+
+
+class ImageDerivativesTest(TestCase):
+    """Las imágenes se limitan al subir y el tag genera srcset con derivados."""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_MAX_DIMENSION=1000)
+        self.override.enable()
+        self.product = Product.objects.create(name='Cera', sku='IMG-1', regular_price=Decimal('10'))
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_upload_is_capped_and_stripped(self):
+        from PIL import Image
+        pi = ProductImage.objects.create(product=self.product, image=make_jpeg((2000, 1000)))
+        with default_storage.open(pi.image.name, 'rb') as fh:
+            stored = Image.open(fh)
+            self.assertEqual(stored.size, (1000, 500))
+            self.assertFalse(stored.getexif())
+
+    def render(self, image):
+        return Template(
+            '{% load core_extras %}<img {% image_srcset image "300px" %}>'
+        ).render(Context({'image': image}))
+
+    @override_settings(IMAGE_DERIVATIVES_ASYNC=False)
+    def test_srcset_tag_builds_derivatives(self):
+        pi = ProductImage.objects.create(product=self.product, image=make_jpeg((900, 900), exif=False))
+        html = self.render(pi.image)
+        self.assertIn('sizes="300px"', html)
+        for width in (320, 480, 800, 900):
+            self.assertIn(f'-w{width}.webp {width}w', html)
+        self.assertIn('-w900.jpg"', html)
+        self.assertTrue(default_storage.exists(f'derivatives/{pi.image.name.rsplit(".", 1)[0]}-w480.webp'))
+
+    def test_missing_derivatives_built_in_background(self):
+        """Sin derivados la plantilla sirve el original y no codifica en la petición."""
+        pi = ProductImage.objects.create(product=self.product, image=make_jpeg((900, 900), exif=False))
+        html = self.render(pi.image)
+        self.assertNotIn('srcset', html)
+        self.assertIn(f'src="{pi.image.url}"', html)
+
+        # Un solo hilo por proceso: cuando termina esta tarea ya terminó la anterior
+        images._builder.submit(lambda: None).result()
+        self.assertIn('-w900.webp 900w', self.render(pi.image))
@@ -0,0 +1,46 @@
+"""
+Tests de la lectura incremental de arrays JSON (json_stream).
+"""
+import io
+import json
+
+from django.test import SimpleTestCase
+
+from apps.core.json_stream import CHUNK_SIZE, iter_json_array, iter_json_array_raw, object_fields
+
+
+class CountingReader(io.BytesIO):
+    reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+class JsonStreamTest(SimpleTestCase):
+    """Elementos mucho más grandes que el bloque de lectura, en tiempo lineal."""
+
+    def test_large_element(self):
+        big = {
+            'name': 'Grande', 'iso2': 'GR',
+            'states': [
+                {'name': f'Estado {i} "{{[', 'cities': [{'name': f'Ciudad {j} ]}} \\ ñ'} for j in range(100)]}
+                for i in range(200)
+            ],
+        }
+        items = [big, 'x', 1.5, {'iso2': 'CO', 'name': 'Colombia'}]
+        body = json.dumps(items, ensure_ascii=False).encode()
+        self.assertGreater(len(body), 8 * CHUNK_SIZE)
+
+        reader = CountingReader(body)
+        self.assertEqual(list(iter_json_array(reader)), items)
+        # El bloque de lectura se duplica mientras el elemento no cierra
+        self.assertLess(reader.reads, 10)
+
+        raw = next(iter_json_array_raw(io.BytesIO(body), chunk_size=1000))
+        self.assertEqual(object_fields(raw, ('iso2', 'name')), {'iso2': 'GR', 'name': 'Grande'})
+        self.assertEqual(object_fields('{"a": {"iso2": "X"}, "b": 1}', ('iso2', 'b')), {'b': 1})
+
+    def test_incomplete_array(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.BytesIO(b'[{"a": [1, 2]}, {"b": "}')))
@@ -0,0 +1,53 @@
+"""
+Tests de la paginación por cursor (keyset) de listados.
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.core.pagination import paginate_keyset
+from apps.products.models import Product
+
+
+class KeysetPaginationTest(TestCase):
+    """El cursor recorre todas las filas sin repetir ni omitir y sin COUNT."""
+
+    def setUp(self):
+        # Precios repetidos para forzar el desempate por pk
+        for i in range(15):
+            Product.objects.create(
+                name=f'Producto {i}', sku=f'KS-{i}', regular_price=Decimal(10 + i % 3),
+            )
+
+    def test_walks_all_rows_in_order(self):
+        qs = Product.objects.order_by('-effective_price', 'name')
+        expected = list(qs.values_list('pk', flat=True))
+        seen = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(1):
+                rows, cursor = paginate_keyset(qs, 4, cursor)
+            seen.extend(p.pk for p in rows)
+            if not cursor:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_shop_cursor_mode(self):
+        url = reverse('products:list')
+        first = self.client.get(url, {'sort': 'price_asc'}, secure=True)
+        self.assertEqual(first.status_code, 200)
+        cursor = first.context['next_cursor']
+        self.assertTrue(cursor)
+        second = self.client.get(url, {'sort': 'price_asc', 'cursor': cursor}, secure=True)
+        self.assertEqual(second.status_code, 200)
+        self.assertIsNone(second.context['products_count'])
+        first_ids = {p.pk for p in first.context['products']}
+        second_ids = {p.pk for p in second.context['products']}
+        self.assertFalse(first_ids & second_ids)
+        self.assertEqual(len(first_ids | second_ids), 15)
+
+    def test_invalid_cursor_falls_back_to_pages(self):
+        response = self.client.get(reverse('products:list'), {'cursor': 'manipulado'}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['products_count'], 15)
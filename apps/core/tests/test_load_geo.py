@@ -0,0 +1,53 @@
+"""
+Tests de la carga de países/estados/ciudades (load_colombia_geo).
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.core.models import City, Country, State
+
+DATA = [
+    {'name': 'Chile', 'iso2': 'CL', 'iso3': 'CHL', 'phonecode': '56', 'states': [
+        {'name': 'Santiago', 'iso2': 'RM', 'cities': [{'name': 'Santiago'}]},
+    ]},
+    {'name': 'Colombia', 'iso2': 'CO', 'iso3': 'COL', 'phonecode': '57', 'states': [
+        {'name': 'Antioquia', 'iso2': 'ANT', 'cities': [{'name': 'Medellín'}, {'name': 'Envigado'}]},
+        {'name': 'Cundinamarca', 'iso2': 'CUN', 'cities': [{'name': 'Bogotá'}, {'name': 'Bogotá'}]},
+    ]},
+    {'name': 'México', 'iso2': 'MX', 'iso3': 'MEX', 'phonecode': '52', 'states': [
+        {'name': 'Jalisco', 'iso2': 'JAL', 'cities': [{'name': 'Guadalajara'}]},
+    ]},
+]
+
+
+class LoadGeoCommandTest(TestCase):
+    """Solo carga los países pedidos y se puede repetir sin duplicar."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(DATA, fh, ensure_ascii=False)
+        self.addCleanup(os.remove, self.path)
+
+    def load(self, *args):
+        call_command('load_colombia_geo', '--file', self.path, '--batch-size', '2', *args,
+                     stdout=StringIO(), stderr=StringIO())
+
+    def test_default_country_and_rerun(self):
+        self.load()
+        self.assertEqual(list(Country.objects.values_list('name', flat=True)), ['Colombia'])
+        self.assertEqual(State.objects.count(), 2)
+        self.assertEqual(City.objects.filter(state__country__iso2='CO').count(), 3)
+
+        self.load()
+        self.assertEqual(City.objects.count(), 3)
+
+    def test_country_list(self):
+        self.load('--country', 'mx,Chile')
+        self.assertEqual(list(Country.objects.values_list('iso2', flat=True)), ['CL', 'MX'])
+        self.assertTrue(City.objects.filter(name='Guadalajara', state__name='Jalisco').exists())
@@ -0,0 +1,53 @@
+"""
+Tests de la caché de página completa para visitantes anónimos.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.core.models import SiteSettings
+from apps.core.page_cache import CART_PLACEHOLDER, CSRF_PLACEHOLDER, get_page_cache_stats
+from apps.products.models import Product
+
+
+class AnonymousPageCacheTest(TestCase):
+    """La tienda se sirve desde caché con los huecos del visitante resueltos."""
+
+    def setUp(self):
+        cache.clear()
+        SiteSettings.get()
+        Product.objects.create(name='Cera mate', sku='PC-1', regular_price=Decimal('20'))
+        self.url = reverse('products:list')
+
+    def test_hit_after_miss_and_invalidation(self):
+        first = self.client.get(self.url, {'sort': 'name'}, secure=True)
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        second = self.client.get(self.url, {'sort': 'name'}, secure=True)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        content = second.content.decode()
+        self.assertIn('Cera mate', content)
+        self.assertNotIn(CSRF_PLACEHOLDER, content)
+        self.assertNotIn(CART_PLACEHOLDER, content)
+        self.assertIn('csrfmiddlewaretoken', content)
+
+        Product.objects.create(name='Pomada', sku='PC-2', regular_price=Decimal('25'))
+        third = self.client.get(self.url, {'sort': 'name'}, secure=True)
+        self.assertEqual(third['X-Page-Cache'], 'miss')
+        self.assertIn('Pomada', third.content.decode())
+        stats = get_page_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_bypass_for_users_and_unknown_params(self):
+        user = get_user_model().objects.create_user(
+            username='cliente', email='cliente@test.com', password='x'
+        )
+        self.client.force_login(user)
+        response = self.client.get(self.url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.client.logout()
+        response = self.client.get(self.url, {'utm_source': 'ads'}, secure=True)
+        self.assertFalse(response.has_header('X-Page-Cache'))
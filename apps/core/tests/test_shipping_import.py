@@ -0,0 +1,66 @@
+"""
+Tests de la importación de precios de envío desde Excel.
+"""
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from openpyxl import Workbook
+
+from apps.core.models import City, Country, ShippingPrice, State
+
+
+def excel(rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Precios de envío'
+    ws.append(['Ciudad', 'Departamento', 'País', 'Precio', 'Días mín', 'Días máx', 'Estado'])
+    for row in rows:
+        ws.append(row)
+    output = io.BytesIO()
+    wb.save(output)
+    return SimpleUploadedFile('precios.xlsx', output.getvalue())
+
+
+class ShippingPriceImportTest(TestCase):
+    """Índice de ciudades sin tildes, vista previa sin escritura y escritura en bloque."""
+
+    def setUp(self):
+        colombia = Country.objects.create(name='Colombia', iso2='CO')
+        antioquia = State.objects.create(country=colombia, name='Antioquia')
+        bogota_dc = State.objects.create(country=colombia, name='Bogotá D.C.')
+        self.medellin = City.objects.create(state=antioquia, name='Medellín')
+        self.bogota = City.objects.create(state=bogota_dc, name='Bogotá')
+        ShippingPrice.objects.create(city=self.medellin, price=Decimal('9000'),
+                                     delivery_days_min=1, delivery_days_max=2)
+        user = get_user_model().objects.create_user(
+            username='staff', email='staff@test.com', password='testpass123', role='staff',
+        )
+        self.client.force_login(user)
+        self.url = reverse('core:admin_panel:shipping_price_import_excel')
+        self.rows = [
+            ['MEDELLIN', 'antioquia', 'Colombia', 12000, 1, 3, 'Activo'],
+            ['Bogota', 'BOGOTA D.C.', 'Colombia', 8000, 1, 2, 'Inactivo'],
+            ['Cali', 'Valle', 'Colombia', 7000, 2, 4, 'Activo'],
+        ]
+
+    def test_dry_run_then_import(self):
+        response = self.client.post(self.url, {'excel_file': excel(self.rows), 'dry_run': '1'}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        preview = response.context['preview']
+        self.assertEqual((preview.created, preview.updated, len(preview.not_found)), (1, 1, 1))
+        self.assertContains(response, '9000.00 → 12000.00')
+        self.assertEqual(ShippingPrice.objects.count(), 1)
+
+        response = self.client.post(self.url, {'excel_file': excel(self.rows)}, secure=True)
+        self.assertRedirects(response, reverse('core:admin_panel:shipping_price_list'),
+                             fetch_redirect_response=False)
+        self.assertEqual(ShippingPrice.objects.get(city=self.medellin).price, Decimal('12000'))
+        bogota = ShippingPrice.objects.get(city=self.bogota)
+        self.assertFalse(bogota.is_active)
+
+        response = self.client.post(self.url, {'excel_file': excel(self.rows), 'dry_run': '1'}, secure=True)
+        self.assertEqual(response.context['preview'].unchanged, 2)
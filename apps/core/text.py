@@ -0,0 +1,17 @@
+"""
+Normalización de texto para comparar y buscar sin tildes ni mayúsculas (búsqueda de
+productos, ciudades del Excel de precios de envío).
+"""
+import unicodedata
+
+from django.utils.html import strip_tags
+
+
+def normalize_text(text):
+    """Minúsculas, sin HTML ni tildes y con espacios colapsados."""
+    if not text:
+        return ''
+    text = strip_tags(str(text))
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
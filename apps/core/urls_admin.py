@@ -72,6 +72,7 @@ urlpatterns = [
     # Configuración
     path('configuracion/', views_admin.SiteSettingsUpdateView.as_view(), name='config'),
     path('configuracion/meta-calidad/', views_admin.MetaDatasetQualityView.as_view(), name='meta_dataset_quality'),
+    path('sincronizaciones/', views_admin.SyncRunListView.as_view(), name='sync_run_list'),
     # Secciones del Home
     path('secciones/', views_admin.HomeSectionsConfigView.as_view(), name='home_sections'),
     path('secciones/hero/', views_admin.HomeHeroSlideListView.as_view(), name='home_hero_list'),
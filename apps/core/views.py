@@ -8,6 +8,8 @@ from django.views.generic import TemplateView
 from django.views.decorators.http import require_GET, require_POST
 from django.contrib import messages
 
+from .page_cache import AnonymousPageCacheMixin
+
 
 def dashboard_required(view):
     """Solo staff y admin pueden acceder al dashboard."""
@@ -22,13 +24,11 @@ def dashboard_required(view):
     return login_required(wrapped)
 
 
-class HomeView(TemplateView):
+class HomeView(AnonymousPageCacheMixin, TemplateView):
     template_name = 'index-dark.html'
 
     def get_context_data(self, **kwargs):
-        from django.db.models import Sum
-        from apps.orders.models import OrderItem
-        from apps.products.models import Product, Category, Brand
+        from apps.products.models import Product, Category, Brand, ProductSalesStats
 
         from .models import SiteSettings, HomeSection, HomeHeroSlide, HomeAboutBlock, HomeMeatCategoryBlock, HomeBrandBlock, HomeTestimonial, HomePopupAnnouncement
 
@@ -38,13 +38,11 @@ class HomeView(TemplateView):
         if not site_settings.show_out_of_stock_products:
             base_product_qs = base_product_qs.filter(Product.q_in_stock())
         # Productos populares = más vendidos (por cantidad en pedidos completados/procesando)
-        sold = (
-            OrderItem.objects.filter(order__status__in=['completed', 'processing', 'shipped'])
-            .values('product_id')
-            .annotate(total_sold=Sum('quantity'))
-            .order_by('-total_sold')[:8]
+        product_ids = list(
+            ProductSalesStats.objects.filter(units_sold__gt=0)
+            .order_by('-units_sold')
+            .values_list('product_id', flat=True)[:8]
         )
-        product_ids = [x['product_id'] for x in sold]
         products = list(base_product_qs.filter(id__in=product_ids))
         product_by_id = {p.id: p for p in products}
         featured_products = [product_by_id[pid] for pid in product_ids if pid in product_by_id]
@@ -260,6 +258,7 @@ def dashboard_view(request):
     from apps.orders.models import Order
     from apps.products.models import Product
     from .models import SecurityEvent
+    from .page_cache import get_page_cache_stats
 
     total_orders = Order.objects.count()
     total_products = Product.objects.filter(is_active=True).count()
@@ -290,4 +289,5 @@ def dashboard_view(request):
         'low_stock': low_stock,
         'security_summary': security_summary,
         'recent_security_events': recent_security_events,
+        'page_cache_stats': get_page_cache_stats(),
     })
@@ -44,6 +44,7 @@ from .models import (
     NewsletterSubscriber,
     ContactSubmission,
 )
+from .pagination import KeysetPaginationMixin
 
 
 class StaffRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -329,12 +330,8 @@ class ProductListView(StaffRequiredMixin, ListView):
         qs = Product.objects.select_related('brand').prefetch_related('categories', 'images')
         search = (self.request.GET.get('q') or '').strip()
         if search:
-            qs = qs.filter(
-                Q(name__icontains=search) |
-                Q(sku__icontains=search) |
-                Q(codigo__icontains=search) |
-                Q(short_description__icontains=search)
-            )
+            from apps.products.search import search_products
+            qs = search_products(qs, search)
         status = self.request.GET.get('status')
         if status == 'active':
             qs = qs.filter(is_active=True)
@@ -354,7 +351,9 @@ class ProductListView(StaffRequiredMixin, ListView):
             qs = qs.filter(is_featured=True)
         elif featured == '0':
             qs = qs.filter(is_featured=False)
-        sort = self.request.GET.get('sort', '-created_at')
+        sort = self.request.GET.get('sort')
+        if search and not sort:
+            return qs.order_by('-search_rank', '-created_at')
         allowed_sort = {'name': 'name', '-name': '-name', 'price': 'regular_price', '-price': '-regular_price',
                        'created': '-created_at', '-created': 'created_at', 'sku': 'sku'}
         order = allowed_sort.get(sort, '-created_at')
@@ -375,11 +374,21 @@ def sync_tersa_products_view(request):
         return redirect('core:admin_panel:product_list')
     try:
         from apps.integrations.services import sync_tersa_products
-        result = sync_tersa_products(brands=['BARBERSHOP', 'BARBER UP'], download_images=True)
+        from apps.integrations.sync_runs import track_sync_run
+        with track_sync_run('tersa_products', 'dashboard') as run:
+            result = sync_tersa_products(
+                brands=['BARBERSHOP', 'BARBER UP'], download_images=True, images_in_background=True,
+            )
+            run.record(result)
+        if result.get('catalog_unchanged'):
+            messages.info(request, 'Tersa: el catálogo no cambió desde la última sincronización.')
+            return redirect('core:admin_panel:product_list')
         messages.success(
             request,
             f'Tersa: {result["total"]} productos (BARBERSHOP, BARBER UP + IDs extra). '
-            f'{result["created"]} creados, {result["updated"]} actualizados.'
+            f'{result["created"]} creados, {result["updated"]} actualizados, '
+            f'{result["unchanged"]} sin cambios. '
+            'Las imágenes nuevas se descargan en segundo plano.'
         )
     except Exception as e:
         messages.error(request, f'Error al sincronizar Tersa: {e}')
@@ -685,7 +694,7 @@ def review_delete_view(request, pk):
 
 # --- Clientes ---
 
-class CustomerListView(StaffRequiredMixin, ListView):
+class CustomerListView(StaffRequiredMixin, KeysetPaginationMixin, ListView):
     model = User
     template_name = 'dashboard/customer_list.html'
     context_object_name = 'customers'
@@ -898,7 +907,7 @@ def newsletter_delete_view(request, pk):
 # --- Pedidos ---
 
 @method_decorator(never_cache, name='dispatch')
-class OrderListView(StaffRequiredMixin, ListView):
+class OrderListView(StaffRequiredMixin, KeysetPaginationMixin, ListView):
     model = Order
     template_name = 'dashboard/order_list.html'
     context_object_name = 'orders'
@@ -1008,6 +1017,8 @@ class OrderListView(StaffRequiredMixin, ListView):
             if latest_tx and latest_tx.status == 'APPROVED':
                 order.payment_status = 'paid'
                 order.save(update_fields=['payment_status', 'updated_at'])
+                from apps.integrations.erp_outbox import enqueue_order
+                enqueue_order(order)
         return context
 
 
@@ -1375,38 +1386,17 @@ def shipping_price_import_excel_view(request):
         messages.error(request, f'No se pudo leer el archivo Excel: {e}')
         return redirect('core:admin_panel:shipping_price_import_excel')
 
-    ws = wb['Precios de envío'] if 'Precios de envío' in wb.sheetnames else wb.active
-    rows = list(ws.iter_rows(values_only=True))
-    if not rows:
+    from .shipping_import import SHEET_NAME, ShippingPriceImport, column_map
+
+    ws = wb[SHEET_NAME] if SHEET_NAME in wb.sheetnames else wb.active
+    rows = ws.iter_rows(values_only=True)
+    header_row = next(rows, None)
+    if not header_row:
         messages.error(request, 'El archivo está vacío o no tiene filas.')
         wb.close()
         return redirect('core:admin_panel:shipping_price_import_excel')
 
-    header_row = [str(c).strip() if c is not None else '' for c in rows[0]]
-    col_map = {}
-    aliases = {
-        'ciudad': 'ciudad', 'departamento': 'departamento', 'pais': 'pais',
-        'país': 'pais', 'precio': 'precio',
-        'días mín': 'dias_min', 'dias mín': 'dias_min', 'días min': 'dias_min', 'dias min': 'dias_min',
-        'dias mn': 'dias_min', 'días mn': 'dias_min',
-        'días máx': 'dias_max', 'dias máx': 'dias_max', 'días max': 'dias_max', 'dias max': 'dias_max',
-        'dias mx': 'dias_max', 'días mx': 'dias_max', 'estado': 'estado',
-    }
-    for i, h in enumerate(header_row):
-        h_clean = h.lower().strip()
-        key = aliases.get(h_clean)
-        if key and key not in col_map:
-            col_map[key] = i
-        if not key and ('min' in h_clean or 'mín' in h_clean or 'mn' in h_clean) and ('dia' in h_clean or 'días' in h_clean or 'dias' in h_clean):
-            col_map.setdefault('dias_min', i)
-        if not key and ('max' in h_clean or 'máx' in h_clean or 'mx' in h_clean) and ('dia' in h_clean or 'días' in h_clean or 'dias' in h_clean):
-            col_map.setdefault('dias_max', i)
-
-    if len(header_row) >= 6 and 'dias_min' not in col_map:
-        col_map['dias_min'] = 4
-    if len(header_row) >= 7 and 'dias_max' not in col_map:
-        col_map['dias_max'] = 5
-
+    col_map = column_map(header_row)
     if 'ciudad' not in col_map or 'precio' not in col_map:
         messages.error(
             request,
@@ -1415,76 +1405,27 @@ def shipping_price_import_excel_view(request):
         wb.close()
         return redirect('core:admin_panel:shipping_price_import_excel')
 
-    created = 0
-    updated = 0
-    not_found = []
-
-    def _val(row, key, default=None):
-        idx = col_map.get(key)
-        if idx is None or idx >= len(row):
-            return default
-        v = row[idx]
-        if v is None or (isinstance(v, str) and not v.strip()):
-            return default
-        return v
-
-    for row in rows[1:]:
-        row = list(row) if row else []
-        ciudad = str(_val(row, 'ciudad', '') or '').strip()
-        if not ciudad:
-            continue
-        departamento = str(_val(row, 'departamento', '') or '').strip()
-        pais = str(_val(row, 'pais', '') or '').strip() or 'Colombia'
-        try:
-            price_val = _val(row, 'precio', 0)
-            price = float(price_val) if price_val is not None else 0
-        except (TypeError, ValueError):
-            price = 0
-        try:
-            dmin = int(_val(row, 'dias_min', 0) or 0)
-        except (TypeError, ValueError):
-            dmin = 0
-        try:
-            dmax = int(_val(row, 'dias_max', 0) or 0)
-        except (TypeError, ValueError):
-            dmax = 0
-        estado = str(_val(row, 'estado', 'Activo') or 'Activo').strip().lower()
-        is_active = estado.startswith('activo')
-
-        city = City.objects.filter(
-            name__iexact=ciudad,
-            state__name__iexact=departamento,
-            state__country__name__iexact=pais,
-        ).select_related('state', 'state__country').first()
-
-        if not city:
-            not_found.append(f'{ciudad}, {departamento}, {pais}')
-            continue
-
-        _, was_created = ShippingPrice.objects.update_or_create(
-            city=city,
-            defaults={
-                'price': price,
-                'delivery_days_min': max(0, dmin),
-                'delivery_days_max': max(0, dmax),
-                'is_active': is_active,
-            },
-        )
-        if was_created:
-            created += 1
-        else:
-            updated += 1
-
+    result = ShippingPriceImport(rows, col_map)
     wb.close()
 
+    if request.POST.get('dry_run'):
+        return render(request, 'dashboard/shipping_price_import.html', {
+            'preview': result,
+            'file_name': file.name,
+        })
+
+    result.apply()
     msg_parts = []
-    if created:
-        msg_parts.append(f'{created} creados')
-    if updated:
-        msg_parts.append(f'{updated} actualizados')
+    if result.created:
+        msg_parts.append(f'{result.created} creados')
+    if result.updated:
+        msg_parts.append(f'{result.updated} actualizados')
+    if result.unchanged:
+        msg_parts.append(f'{result.unchanged} sin cambios')
     if not msg_parts:
         msg_parts.append('0 registros procesados')
     messages.success(request, 'Importación completada: ' + ', '.join(msg_parts))
+    not_found = result.not_found
     if not_found:
         samples = not_found[:5]
         extra = f' ({len(not_found)} total)' if len(not_found) > 5 else ''
@@ -1588,6 +1529,58 @@ class MetaDatasetQualityView(StaffRequiredMixin, TemplateView):
         return ctx
 
 
+class SyncRunListView(StaffRequiredMixin, TemplateView):
+    """Ejecuciones de sincronización: tendencia diaria de rendimiento y las más lentas."""
+    template_name = 'dashboard/sync_run_list.html'
+    trend_days = 30
+
+    def get_context_data(self, **kwargs):
+        from datetime import timedelta
+        from django.db.models import Avg, Max, Sum
+        from django.db.models.functions import TruncDate
+        from django.utils import timezone
+        from apps.integrations.models import SyncRun
+
+        ctx = super().get_context_data(**kwargs)
+        sources = dict(SyncRun.SOURCE_CHOICES)
+        source = self.request.GET.get('source', '')
+        runs = SyncRun.objects.all()
+        if source in sources:
+            runs = runs.filter(source=source)
+        finished = runs.filter(
+            started_at__gte=timezone.now() - timedelta(days=self.trend_days), duration__isnull=False,
+        )
+        trend = list(
+            finished.annotate(day=TruncDate('started_at'))
+            .values('day', 'source')
+            .annotate(
+                runs=Count('id'),
+                failures=Count('id', filter=Q(status='error')),
+                avg_duration=Avg('duration'),
+                max_duration=Max('duration'),
+                avg_fetch=Avg('fetch_seconds'),
+                avg_db=Avg('db_seconds'),
+                rows=Sum('total_rows'),
+                seconds=Sum('duration'),
+            )
+            .order_by('-day', 'source')
+        )
+        peak = max((row['avg_duration'] or 0 for row in trend), default=0)
+        for row in trend:
+            row['source_label'] = sources.get(row['source'], row['source'])
+            row['rows_per_second'] = round(row['rows'] / row['seconds'], 1) if row['seconds'] else None
+            row['bar'] = round(100 * (row['avg_duration'] or 0) / peak) if peak else 0
+        ctx.update({
+            'trend': trend,
+            'trend_days': self.trend_days,
+            'slowest': finished.order_by('-duration')[:10],
+            'recent': runs[:50],
+            'sources': SyncRun.SOURCE_CHOICES,
+            'current_source': source,
+        })
+        return ctx
+
+
 # --- Secciones del Home ---
 
 class HomeSectionsConfigView(StaffRequiredMixin, ListView):
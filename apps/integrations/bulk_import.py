@@ -0,0 +1,205 @@
+"""
+Upsert masivo de productos para los importadores (Tersa y API genérica).
+
+En lugar de get_or_create / update_or_create por producto:
+- precarga en diccionarios los productos de la API (por external_id y SKU), las
+  categorías y las marcas (por slug);
+- calcula un hash del contenido de cada item y lo compara con el de la fila actual:
+  si coincide el producto no se toca;
+- escribe los cambios con bulk_create / bulk_update por lotes en una transacción,
+  recalculando columnas desnormalizadas y search_document como haría Product.save.
+
+Devuelve conteos (created / updated / unchanged / skipped) y tiempos por fase.
+"""
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+class ProductBulkImporter:
+    """
+    Un importador por sincronización: add() por cada item (category()/brand() para
+    resolver relaciones) y commit() al final.
+    """
+    batch_size = 500
+    source = 'api'
+
+    def __init__(self):
+        self.stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+        self.timings = {}
+        self._to_create = []
+        self._to_update = {}
+        self._update_fields = set()
+        with self.phase('preload'):
+            self._preload()
+
+    @contextmanager
+    def phase(self, name):
+        """Acumula en timings[name] los segundos del bloque."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0) + time.perf_counter() - start, 3)
+
+    def _preload(self):
+        from apps.products.models import Brand, Category, Product
+
+        products = list(
+            Product.objects.filter(source=self.source)
+            .select_related('brand').prefetch_related('variants').order_by()
+        )
+        self._by_external_id = {p.external_id: p for p in products if p.external_id}
+        self._by_sku = {p.sku: p for p in products if p.sku}
+        # Slugs y SKUs ocupados por cualquier producto (únicos en BD)
+        self._slugs = dict(Product.objects.order_by().values_list('slug', 'pk'))
+        self._skus = dict(Product.objects.exclude(sku='').order_by().values_list('sku', 'pk'))
+        self._categories = {c.slug: c for c in Category.objects.order_by()}
+        self._brands = {b.slug: b for b in Brand.objects.order_by()}
+        self._seen = set()
+
+    def category(self, name, slug=None):
+        """Categoría por slug (la crea si no existe)."""
+        from apps.products.models import Category
+
+        slug = slug or slugify(name) or 'general'
+        if slug not in self._categories:
+            self._categories[slug], _ = Category.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'is_active': True}
+            )
+        return self._categories[slug]
+
+    def brand(self, name, slug=None):
+        """Marca por slug (la crea si no existe)."""
+        from apps.products.models import Brand
+
+        slug = slug or slugify(name) or name.lower().replace(' ', '-')
+        if slug not in self._brands:
+            self._brands[slug], _ = Brand.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'is_active': True}
+            )
+        return self._brands[slug]
+
+    @staticmethod
+    def _field_value(field, value):
+        """Valor comparable de un campo (Decimal con sus decimales, FK por pk, etc.)."""
+        if isinstance(field, models.ForeignKey):
+            return getattr(value, 'pk', value)
+        value = field.to_python(value)
+        if isinstance(field, models.DecimalField) and value is not None:
+            return format(value, f'.{field.decimal_places}f')
+        return value
+
+    @classmethod
+    def content_hash(cls, values):
+        from apps.products.models import Product
+
+        normalized = {
+            name: cls._field_value(Product._meta.get_field(name), value)
+            for name, value in sorted(values.items())
+        }
+        return hashlib.sha1(json.dumps(normalized, default=str, sort_keys=True).encode()).hexdigest()
+
+    def _current_values(self, product, fields):
+        return {name: getattr(product, name) for name in fields}
+
+    def _claim(self, registry, value, pk):
+        """True si value (slug/SKU) está libre o ya es de este producto; lo reserva."""
+        if not value:
+            return True
+        owner = registry.get(value)
+        if owner is not None and owner != pk:
+            return False
+        registry[value] = pk
+        return True
+
+    def add(self, defaults, external_id='', sku='', category=None):
+        """
+        Encola el upsert de un item. Busca por external_id (o por SKU si no hay) entre
+        los productos de la API. Devuelve el Product (sin pk hasta commit() si es nuevo)
+        o None si se omite (sin identificador, repetido en el lote o slug/SKU en uso).
+        """
+        from apps.products.models import Product
+
+        key = ('external_id', external_id) if external_id else ('sku', sku)
+        if not key[1] or key in self._seen:
+            self.stats['skipped'] += 1
+            return None
+        self._seen.add(key)
+        product = self._by_external_id.get(external_id) if external_id else self._by_sku.get(sku)
+
+        if product is None:
+            product = Product(**{'source': self.source, **defaults})
+            # Marcador hasta tener pk: no puede coincidir con ningún pk real
+            marker = ('new', key)
+            if not self._claim(self._slugs, product.slug, marker) or not self._claim(self._skus, product.sku, marker):
+                self.stats['skipped'] += 1
+                return None
+            product._import_category = category
+            self._to_create.append(product)
+            return product
+
+        if self.content_hash(defaults) == self.content_hash(self._current_values(product, defaults)):
+            self.stats['unchanged'] += 1
+            return product
+        if (not self._claim(self._slugs, defaults.get('slug'), product.pk)
+                or not self._claim(self._skus, defaults.get('sku'), product.pk)):
+            self.stats['skipped'] += 1
+            return product
+        for name, value in defaults.items():
+            setattr(product, name, value)
+        self._update_fields.update(defaults)
+        self._to_update[product.pk] = product
+        return product
+
+    def _prepare_for_write(self, product, variants):
+        """Lo que haría Product.save: columnas desnormalizadas y texto de búsqueda."""
+        from apps.products.search import build_search_document
+
+        product.apply_denormalized(variants=variants)
+        product.search_document = build_search_document(product)
+
+    def commit(self):
+        """Escribe lo encolado en una transacción y devuelve stats + timings."""
+        from apps.products.catalog import bump_catalog_version
+        from apps.products.search import get_search_backend
+
+        created = self._to_create
+        updated = list(self._to_update.values())
+        if created or updated:
+            with self.phase('write'), transaction.atomic():
+                self._write(created, updated)
+            with self.phase('index'):
+                get_search_backend().index(created + updated)
+                bump_catalog_version()
+
+        self.stats['created'] = len(created)
+        self.stats['updated'] = len(updated)
+        return {**self.stats, 'timings': self.timings}
+
+    def _write(self, created, updated):
+        """bulk_create de los nuevos (con su categoría) y bulk_update de los modificados."""
+        from apps.products.models import Product
+
+        now = timezone.now()
+        for product in created:
+            self._prepare_for_write(product, variants=[])
+        Product.objects.bulk_create(created, batch_size=self.batch_size)
+        through = Product.categories.through
+        through.objects.bulk_create([
+            through(product_id=p.pk, category_id=p._import_category.pk)
+            for p in created if p._import_category
+        ], batch_size=self.batch_size)
+
+        for product in updated:
+            self._prepare_for_write(product, variants=list(product.variants.all()))
+            # bulk_update no aplica auto_now; updated_at también cambia la clave de la ficha
+            product.updated_at = now
+        if updated:
+            fields = self._update_fields | set(Product.DENORMALIZED_FIELDS) | {'search_document', 'updated_at'}
+            Product.objects.bulk_update(updated, sorted(fields), batch_size=self.batch_size)
@@ -0,0 +1,194 @@
+"""
+Descarga concurrente de imágenes para los importadores (Tersa).
+
+- Pool de hilos con una sesión HTTP compartida (keep-alive) y concurrencia acotada
+  (TERSA_IMAGE_WORKERS).
+- Peticiones condicionales con ETag / Last-Modified guardados en RemoteImage: si la
+  imagen no cambió (304) se reutiliza el archivo ya guardado.
+- Deduplicación por SHA-256 del contenido: la misma imagen en varias URLs se guarda
+  una sola vez.
+
+Los hilos solo hacen red; la escritura en almacenamiento y base de datos se hace en el
+hilo que llama. Se invoca después del upsert de productos, así el catálogo queda
+guardado aunque las imágenes tarden o fallen.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# Carpeta de ProductImage.image (upload_to)
+PRODUCT_IMAGES_DIR = 'products'
+MIN_IMAGE_BYTES = 100
+
+
+def _max_workers():
+    return max(1, getattr(settings, 'TERSA_IMAGE_WORKERS', 8))
+
+
+def build_session(pool_size):
+    """Sesión con keep-alive, pool del tamaño de la concurrencia y reintentos ante 5xx."""
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=('GET',))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _fetch(session, url, etag='', last_modified=''):
+    """GET condicional. Devuelve (status, content, etag, last_modified, content_type)."""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    resp = session.get(url, headers=headers, timeout=15)
+    if resp.status_code == 304:
+        return 304, b'', etag, last_modified, ''
+    resp.raise_for_status()
+    return (
+        resp.status_code, resp.content,
+        resp.headers.get('ETag', ''), resp.headers.get('Last-Modified', ''),
+        resp.headers.get('Content-Type', ''),
+    )
+
+
+def image_file_name(url, content, content_type=''):
+    """Nombre de archivo seguro a partir de la URL, con extensión según tipo o magic bytes."""
+    ext = '.jpg'
+    if 'png' in content_type:
+        ext = '.png'
+    elif 'webp' in content_type:
+        ext = '.webp'
+    elif content[:8] == b'\x89PNG\r\n\x1a\n':
+        ext = '.png'
+    name = re.sub(r'[^\w\-.]', '_', os.path.basename(url.split('?')[0])) or 'image'
+    if not name.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
+        name += ext
+    return name[:100]
+
+
+def _store(url, content, content_type):
+    """Guarda el original normalizado en el almacenamiento y devuelve su nombre."""
+    from apps.core.images import normalize_upload
+
+    name = image_file_name(url, content, content_type)
+    raw = ContentFile(content)
+    return default_storage.save(f'{PRODUCT_IMAGES_DIR}/{name}', normalize_upload(raw, name) or raw)
+
+
+def download_product_images(jobs, max_workers=None):
+    """
+    Descarga y asigna imágenes principales. jobs: iterable de (product_id, url, alt_text).
+    Solo se asigna a productos que sigan sin imágenes. Devuelve un resumen con
+    downloaded / not_modified / deduplicated / failed / assigned.
+    """
+    from apps.products.models import ProductImage
+    from .models import RemoteImage
+
+    stats = {'downloaded': 0, 'not_modified': 0, 'deduplicated': 0, 'failed': 0, 'assigned': 0}
+    jobs = [job for job in jobs if job[1]]
+    if not jobs:
+        return stats
+    with_images = set(
+        ProductImage.objects.filter(product_id__in={job[0] for job in jobs})
+        .values_list('product_id', flat=True)
+    )
+    by_url = {}
+    for product_id, url, alt_text in jobs:
+        if product_id not in with_images:
+            by_url.setdefault(url, []).append((product_id, alt_text))
+    if not by_url:
+        return stats
+
+    records = {r.url: r for r in RemoteImage.objects.filter(url__in=by_url.keys())}
+    workers = min(max_workers or _max_workers(), len(by_url))
+    session = build_session(workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-download') as pool:
+            futures = {}
+            for url in by_url:
+                record = records.get(url)
+                validators = ('', '')
+                if record and record.file and default_storage.exists(record.file):
+                    validators = (record.etag, record.last_modified)
+                futures[pool.submit(_fetch, session, url, *validators)] = url
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    status, content, etag, last_modified, content_type = future.result()
+                except Exception as e:
+                    stats['failed'] += 1
+                    logger.warning('No se pudo descargar imagen %s: %s', url, e)
+                    continue
+                record = records.get(url) or RemoteImage(url=url)
+                if status == 304:
+                    stats['not_modified'] += 1
+                else:
+                    if len(content) < MIN_IMAGE_BYTES:
+                        stats['failed'] += 1
+                        continue
+                    content_hash = hashlib.sha256(content).hexdigest()
+                    twin = (
+                        RemoteImage.objects.filter(content_hash=content_hash)
+                        .exclude(file='').exclude(url=url).first()
+                    )
+                    if twin and default_storage.exists(twin.file):
+                        record.file = twin.file
+                        stats['deduplicated'] += 1
+                    elif (record.file and record.content_hash == content_hash
+                          and default_storage.exists(record.file)):
+                        # El servidor no respondió 304 pero el contenido es el mismo
+                        stats['not_modified'] += 1
+                    else:
+                        try:
+                            record.file = _store(url, content, content_type)
+                        except Exception as e:
+                            stats['failed'] += 1
+                            logger.warning('No se pudo guardar imagen %s: %s', url, e)
+                            continue
+                        stats['downloaded'] += 1
+                    record.content_hash = content_hash
+                    record.etag = etag
+                    record.last_modified = last_modified
+                record.save()
+                for product_id, alt_text in by_url[url]:
+                    ProductImage.objects.create(
+                        product_id=product_id, image=record.file, order=0, is_primary=True,
+                        alt_text=(alt_text or '')[:255],
+                    )
+                    stats['assigned'] += 1
+    finally:
+        session.close()
+    return stats
+
+
+def download_product_images_in_background(jobs, max_workers=None):
+    """Lanza download_product_images en un hilo (para no bloquear una petición web)."""
+    def run():
+        try:
+            close_old_connections()
+            stats = download_product_images(jobs, max_workers=max_workers)
+            logger.info('Imágenes de productos: %s', stats)
+        except Exception:
+            logger.exception('Error descargando imágenes de productos')
+        finally:
+            close_old_connections()
+
+    thread = threading.Thread(target=run, name='product-image-download', daemon=True)
+    thread.start()
+    return thread
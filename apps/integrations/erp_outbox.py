@@ -0,0 +1,226 @@
+"""
+Envío de pedidos al ERP a través de una cola en base de datos (ErpOrderOutbox).
+
+- enqueue_order(order) se llama cuando el pedido queda pagado, dentro de la misma
+  transacción: el request de pago no hace la llamada HTTP.
+- process_outbox() (comando process_erp_outbox) toma los pedidos vencidos, los
+  reserva por ERP_OUTBOX_LEASE segundos para que dos workers no envíen el mismo y
+  los manda con una sesión HTTP compartida (keep-alive):
+    * si ERP_API_BATCH_URL está definido, ERP_BATCH_SIZE pedidos por petición
+      ({"orders": [...]} -> {"results": [{"order_number", "id" | "error"}]});
+    * si no, un POST por pedido a ERP_API_URL.
+- Un fallo reprograma el pedido con espera exponencial (ERP_OUTBOX_BACKOFF * 2^n,
+  tope ERP_OUTBOX_MAX_BACKOFF); tras ERP_OUTBOX_MAX_ATTEMPTS queda como 'failed'.
+- Si el ERP responde con id se guarda en Order.erp_order_id.
+"""
+import logging
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_session = None
+
+
+def erp_enabled():
+    return bool(getattr(settings, 'ERP_API_URL', '') or getattr(settings, 'ERP_API_BATCH_URL', ''))
+
+
+def build_order_payload(order):
+    """Datos del pedido que recibe el ERP."""
+    return {
+        'order_number': order.order_number,
+        'customer_email': order.billing_email,
+        'customer_name': f"{order.billing_first_name} {order.billing_last_name}",
+        'total': str(order.total),
+        'items': [
+            {
+                'product_id': item.product_id,
+                'product_name': item.product_name,
+                'quantity': item.quantity,
+                'price': str(item.price),
+            }
+            for item in order.items.all()
+        ],
+    }
+
+
+def erp_headers():
+    headers = {'Content-Type': 'application/json'}
+    if settings.ERP_API_KEY:
+        headers['Authorization'] = f'Bearer {settings.ERP_API_KEY}'
+        headers['X-API-Key'] = settings.ERP_API_KEY
+    return headers
+
+
+def get_session():
+    """
+    Sesión HTTP del proceso (pool keep-alive). Sin reintentos automáticos: los POST los
+    reintenta la cola. Las cabeceras (API key) se envían en cada POST, no en la sesión,
+    para que un cambio de ERP_API_KEY llegue a un worker en ejecución.
+    """
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+    return _session
+
+
+def _erp_id(data):
+    if not isinstance(data, dict):
+        return ''
+    erp_id = data.get('id') or data.get('order_id')
+    return str(erp_id) if erp_id else ''
+
+
+def enqueue_order(order):
+    """Encola el pedido para el ERP (idempotente). No hace nada si el ERP no está configurado."""
+    from .models import ErpOrderOutbox
+
+    if not erp_enabled() or order.erp_order_id:
+        return None
+    entry, _ = ErpOrderOutbox.objects.get_or_create(order=order)
+    return entry
+
+
+def backoff_seconds(attempts):
+    base = getattr(settings, 'ERP_OUTBOX_BACKOFF', 60)
+    return min(base * 2 ** max(attempts - 1, 0), getattr(settings, 'ERP_OUTBOX_MAX_BACKOFF', 3600))
+
+
+def _claim(limit):
+    """Reserva hasta `limit` pedidos vencidos moviendo su próximo intento (lease)."""
+    from apps.orders.models import OrderItem
+    from .models import ErpOrderOutbox
+
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            ErpOrderOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')[:limit]
+        )
+        if not entries:
+            return []
+        lease = now + timedelta(seconds=getattr(settings, 'ERP_OUTBOX_LEASE', 300))
+        ErpOrderOutbox.objects.filter(pk__in=[e.pk for e in entries]).update(next_attempt_at=lease)
+    return list(
+        ErpOrderOutbox.objects
+        .filter(pk__in=[e.pk for e in entries])
+        .select_related('order')
+        .prefetch_related(Prefetch('order__items', queryset=OrderItem.objects.order_by('pk')))
+        .order_by('next_attempt_at', 'pk')
+    )
+
+
+def _send_batch(session, entries, timeout):
+    """Un POST con varios pedidos. Devuelve {order_number: (erp_id, error)}."""
+    response = session.post(
+        settings.ERP_API_BATCH_URL,
+        json={'orders': [build_order_payload(e.order) for e in entries]},
+        headers=erp_headers(),
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    data = response.json()
+    results = data.get('results', []) if isinstance(data, dict) else data
+    outcome = {}
+    for index, item in enumerate(results or []):
+        if not isinstance(item, dict):
+            continue
+        number = item.get('order_number') or (entries[index].order.order_number if index < len(entries) else '')
+        outcome[number] = (_erp_id(item), str(item.get('error') or ''))
+    return outcome
+
+
+def _send_one(session, entry, timeout):
+    response = session.post(
+        settings.ERP_API_URL, json=build_order_payload(entry.order), headers=erp_headers(), timeout=timeout,
+    )
+    response.raise_for_status()
+    return _erp_id(response.json()), ''
+
+
+def process_outbox(limit=None):
+    """
+    Envía los pedidos vencidos de la cola. Devuelve
+    {'sent', 'retried', 'failed', 'requests'}.
+    """
+    from apps.orders.models import Order
+    from .models import ErpOrderOutbox
+
+    result = {'sent': 0, 'retried': 0, 'failed': 0, 'requests': 0}
+    if not erp_enabled():
+        return result
+    batch_size = max(1, getattr(settings, 'ERP_BATCH_SIZE', 20))
+    max_attempts = getattr(settings, 'ERP_OUTBOX_MAX_ATTEMPTS', 10)
+    timeout = getattr(settings, 'ERP_TIMEOUT', 30)
+    batch_url = getattr(settings, 'ERP_API_BATCH_URL', '')
+    session = get_session()
+
+    processed = 0
+    while limit is None or processed < limit:
+        entries = _claim(batch_size if limit is None else min(batch_size, limit - processed))
+        if not entries:
+            break
+        processed += len(entries)
+
+        outcome = {}
+        if batch_url:
+            result['requests'] += 1
+            try:
+                outcome = _send_batch(session, entries, timeout)
+            except (requests.RequestException, ValueError) as exc:
+                outcome = {e.order.order_number: ('', str(exc)) for e in entries}
+        else:
+            for entry in entries:
+                result['requests'] += 1
+                try:
+                    outcome[entry.order.order_number] = _send_one(session, entry, timeout)
+                except (requests.RequestException, ValueError) as exc:
+                    outcome[entry.order.order_number] = ('', str(exc))
+
+        now = timezone.now()
+        sent_orders = []
+        for entry in entries:
+            erp_id, error = outcome.get(entry.order.order_number, ('', 'Sin respuesta del ERP para el pedido'))
+            entry.attempts += 1
+            if not error:
+                entry.status = 'sent'
+                entry.sent_at = now
+                entry.last_error = ''
+                if erp_id:
+                    entry.order.erp_order_id = erp_id
+                    sent_orders.append(entry.order)
+                result['sent'] += 1
+                continue
+            entry.last_error = error[:4000]
+            if entry.attempts >= max_attempts:
+                entry.status = 'failed'
+                result['failed'] += 1
+                logger.error('Pedido %s no enviado al ERP tras %s intentos: %s',
+                             entry.order.order_number, entry.attempts, error)
+            else:
+                entry.next_attempt_at = now + timedelta(seconds=backoff_seconds(entry.attempts))
+                result['retried'] += 1
+                logger.warning('Pedido %s no enviado al ERP (intento %s): %s',
+                               entry.order.order_number, entry.attempts, error)
+
+        with transaction.atomic():
+            ErpOrderOutbox.objects.bulk_update(
+                entries, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+            )
+            if sent_orders:
+                Order.objects.bulk_update(sent_orders, ['erp_order_id'])
+    return result
@@ -0,0 +1,51 @@
+"""
+Comando: process_erp_outbox
+Envía al ERP los pedidos pagados que están en la cola (ErpOrderOutbox): por lotes si
+ERP_API_BATCH_URL está definido, con reintentos y espera exponencial.
+
+Uso:
+    python manage.py process_erp_outbox                 # vacía la cola y termina (cron)
+    python manage.py process_erp_outbox --limit 200
+    python manage.py process_erp_outbox --loop 30       # worker: revisa la cola cada 30 s
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.integrations.erp_outbox import erp_enabled, process_outbox
+
+
+class Command(BaseCommand):
+    help = 'Envía al ERP los pedidos pendientes de la cola.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Máximo de pedidos a procesar en cada pasada.',
+        )
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            metavar='SEGUNDOS',
+            help='Sigue en ejecución revisando la cola cada SEGUNDOS.',
+        )
+
+    def handle(self, *args, **options):
+        if not erp_enabled():
+            self.stdout.write(self.style.WARNING('ERP_API_URL / ERP_API_BATCH_URL no configurados.'))
+            return
+        while True:
+            close_old_connections()
+            result = process_outbox(limit=options['limit'])
+            if any(result.values()) or not options['loop']:
+                self.stdout.write(
+                    f'ERP: {result["sent"]} enviados, {result["retried"]} para reintentar, '
+                    f'{result["failed"]} fallidos ({result["requests"]} peticiones).'
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['loop'])
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 
 from apps.integrations.services import sync_products_from_api
+from apps.integrations.sync_runs import track_sync_run
 
 
 class Command(BaseCommand):
@@ -8,9 +9,13 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         try:
-            result = sync_products_from_api()
+            with track_sync_run('products_api', 'command') as run:
+                result = sync_products_from_api()
+                run.record(result)
             self.stdout.write(self.style.SUCCESS(
-                f'Sincronización completada: {result["created"]} creados, {result["updated"]} actualizados.'
+                f'Sincronización completada: {result["created"]} creados, {result["updated"]} actualizados, '
+                f'{result["unchanged"]} sin cambios, {result["skipped"]} omitidos.'
             ))
+            self.stdout.write('Tiempos (s): ' + ', '.join(f'{k}={v}' for k, v in result['timings'].items()))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Error: {e}'))
@@ -8,6 +8,7 @@ Uso:
     python manage.py sync_stock --dry-run          # muestra cambios sin guardar
     python manage.py sync_stock --verbose          # lista cada producto
     python manage.py sync_stock --show-not-found   # lista productos de API sin match local
+    python manage.py sync_stock --force            # aunque el catálogo de Tersa no haya cambiado
 """
 from django.core.management.base import BaseCommand
 
@@ -16,6 +17,7 @@ from apps.integrations.services import (
     TERSA_EXTRA_PRODUCT_IDS,
     sync_tersa_stock,
 )
+from apps.integrations.sync_runs import track_sync_run
 
 
 class Command(BaseCommand):
@@ -34,6 +36,12 @@ class Command(BaseCommand):
             default=False,
             help='Muestra el detalle de cada producto procesado.',
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            default=False,
+            help='Aplica el stock aunque el catálogo de Tersa no haya cambiado desde la última vez.',
+        )
         parser.add_argument(
             '--show-not-found',
             action='store_true',
@@ -52,15 +60,32 @@ class Command(BaseCommand):
         self.stdout.write('Consultando API Tersa...')
 
         try:
-            result = sync_tersa_stock(
-                brands=TERSA_BRANDS,
-                extra_ids=TERSA_EXTRA_PRODUCT_IDS,
-                dry_run=dry_run,
-            )
+            if dry_run:
+                result = sync_tersa_stock(
+                    brands=TERSA_BRANDS,
+                    extra_ids=TERSA_EXTRA_PRODUCT_IDS,
+                    dry_run=True,
+                    force=options['force'],
+                )
+            else:
+                with track_sync_run('tersa_stock', 'command') as run:
+                    result = sync_tersa_stock(
+                        brands=TERSA_BRANDS,
+                        extra_ids=TERSA_EXTRA_PRODUCT_IDS,
+                        force=options['force'],
+                    )
+                    run.record(result)
         except Exception as exc:
             self.stdout.write(self.style.ERROR(f'Error al consultar la API: {exc}'))
             raise
 
+        if result.get('catalog_unchanged'):
+            self.stdout.write(self.style.SUCCESS(
+                'El catálogo de Tersa no cambió desde la última sincronización; nada que hacer '
+                '(usa --force para aplicarlo igualmente).'
+            ))
+            return
+
         # ── Detalle por producto ────────────────────────────────────────────
         for r in result['results']:
             if r['status'] == 'updated':
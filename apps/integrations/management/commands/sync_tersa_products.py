@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 
 from apps.integrations.services import sync_tersa_products, TERSA_BRANDS
+from apps.integrations.sync_runs import track_sync_run
 
 
 class Command(BaseCommand):
@@ -12,17 +13,39 @@ class Command(BaseCommand):
             action='store_true',
             help='No descargar imágenes de productos',
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Sincronizar aunque el catálogo de Tersa no haya cambiado',
+        )
 
     def handle(self, *args, **options):
         try:
-            result = sync_tersa_products(
-                brands=TERSA_BRANDS,
-                download_images=not options.get('no_images', False),
-            )
+            with track_sync_run('tersa_products', 'command') as run:
+                result = sync_tersa_products(
+                    brands=TERSA_BRANDS,
+                    download_images=not options.get('no_images', False),
+                    force=options['force'],
+                )
+                run.record(result)
+            if result.get('catalog_unchanged'):
+                self.stdout.write(self.style.SUCCESS(
+                    'Tersa: el catálogo no cambió desde la última sincronización (usa --force para repetirla).'
+                ))
+                return
             self.stdout.write(self.style.SUCCESS(
                 f'Tersa: {result["total"]} productos de API (BARBERSHOP, BARBER UP). '
-                f'{result["created"]} creados, {result["updated"]} actualizados.'
+                f'{result["created"]} creados, {result["updated"]} actualizados, '
+                f'{result["unchanged"]} sin cambios, {result["skipped"]} omitidos.'
             ))
+            images = result.get('images')
+            if images:
+                self.stdout.write(
+                    f'Imágenes: {images["downloaded"]} descargadas, {images["not_modified"]} sin cambios, '
+                    f'{images["deduplicated"]} deduplicadas, {images["failed"]} con error, '
+                    f'{images["assigned"]} asignadas.'
+                )
+            self.stdout.write('Tiempos (s): ' + ', '.join(f'{k}={v}' for k, v in result['timings'].items()))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Error: {e}'))
             raise
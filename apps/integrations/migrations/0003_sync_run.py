@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0002_stock_sync_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('tersa_products', 'Productos Tersa'), ('tersa_stock', 'Stock Tersa'), ('stock_push', 'Stock recibido (endpoint)'), ('products_api', 'Productos API')], max_length=30, verbose_name='Origen')),
+                ('trigger', models.CharField(choices=[('command', 'Comando'), ('dashboard', 'Panel'), ('admin', 'Admin Django'), ('api', 'API')], max_length=20, verbose_name='Lanzada desde')),
+                ('status', models.CharField(choices=[('running', 'En curso'), ('ok', 'Correcta'), ('unchanged', 'Sin cambios en origen'), ('error', 'Error')], default='running', max_length=20, verbose_name='Estado')),
+                ('started_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('duration', models.FloatField(blank=True, null=True, verbose_name='Duración (s)')),
+                ('fetch_seconds', models.FloatField(blank=True, null=True, verbose_name='Descarga (s)')),
+                ('parse_seconds', models.FloatField(blank=True, null=True, verbose_name='Procesado (s)')),
+                ('db_seconds', models.FloatField(blank=True, null=True, verbose_name='Base de datos (s)')),
+                ('images_seconds', models.FloatField(blank=True, null=True, verbose_name='Imágenes (s)')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Filas recibidas')),
+                ('created', models.PositiveIntegerField(default=0, verbose_name='Creadas')),
+                ('updated', models.PositiveIntegerField(default=0, verbose_name='Actualizadas')),
+                ('unchanged', models.PositiveIntegerField(default=0, verbose_name='Sin cambios')),
+                ('skipped', models.PositiveIntegerField(default=0, verbose_name='Omitidas')),
+                ('not_found', models.PositiveIntegerField(default=0, verbose_name='No encontradas')),
+                ('errors', models.PositiveIntegerField(default=0, verbose_name='Con error')),
+                ('payload_bytes', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Tamaño del payload (bytes)')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+            ],
+            options={
+                'verbose_name': 'Ejecución de sincronización',
+                'verbose_name_plural': 'Ejecuciones de sincronización',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['source', '-started_at'], name='integ_syncrun_source_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0003_sync_run'),
+        ('orders', '0012_add_meta_referrer_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErpOrderOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('sent', 'Enviado'), ('failed', 'Fallido')], default='pending', max_length=20, verbose_name='Estado')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='erp_outbox', to='orders.order', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'Pedido en cola para ERP',
+                'verbose_name_plural': 'Pedidos en cola para ERP',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='integ_erpoutbox_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,180 @@
+from django.db import models
+from django.utils import timezone
+
+
+class RemoteImage(models.Model):
+    """
+    Imagen remota ya descargada por un importador: validadores HTTP (ETag /
+    Last-Modified) para pedirla de forma condicional y hash del contenido para no
+    guardar dos veces el mismo archivo.
+    """
+    url = models.URLField('URL', max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField('SHA-256', max_length=64, blank=True, db_index=True)
+    file = models.CharField('Archivo', max_length=255, blank=True)
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Imagen remota'
+        verbose_name_plural = 'Imágenes remotas'
+
+    def __str__(self):
+        return self.url
+
+
+class StockSyncBatch(models.Model):
+    """
+    Lote de stock ya aplicado por /api/integraciones/sync-stock/ (X-Sync-Batch-Id).
+    Si el emisor reintenta el mismo lote se devuelve el resultado guardado sin
+    volver a aplicarlo.
+    """
+    batch_id = models.CharField('ID de lote', max_length=64, unique=True)
+    result = models.JSONField('Resultado', default=dict)
+    received_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Lote de stock'
+        verbose_name_plural = 'Lotes de stock'
+
+    def __str__(self):
+        return self.batch_id
+
+
+class SyncRun(models.Model):
+    """
+    Ejecución de una sincronización (importadores de Tersa/API y endpoint de stock):
+    duración por fase, filas por resultado y tamaño del payload, para ver en el panel
+    si el import se vuelve más lento o si la API de origen tarda más.
+    """
+    SOURCE_CHOICES = [
+        ('tersa_products', 'Productos Tersa'),
+        ('tersa_stock', 'Stock Tersa'),
+        ('stock_push', 'Stock recibido (endpoint)'),
+        ('products_api', 'Productos API'),
+    ]
+    TRIGGER_CHOICES = [
+        ('command', 'Comando'),
+        ('dashboard', 'Panel'),
+        ('admin', 'Admin Django'),
+        ('api', 'API'),
+    ]
+    STATUS_CHOICES = [
+        ('running', 'En curso'),
+        ('ok', 'Correcta'),
+        ('unchanged', 'Sin cambios en origen'),
+        ('error', 'Error'),
+    ]
+    source = models.CharField('Origen', max_length=30, choices=SOURCE_CHOICES)
+    trigger = models.CharField('Lanzada desde', max_length=20, choices=TRIGGER_CHOICES)
+    status = models.CharField('Estado', max_length=20, choices=STATUS_CHOICES, default='running')
+    started_at = models.DateTimeField('Inicio', default=timezone.now, db_index=True)
+    finished_at = models.DateTimeField('Fin', null=True, blank=True)
+    duration = models.FloatField('Duración (s)', null=True, blank=True)
+    fetch_seconds = models.FloatField('Descarga (s)', null=True, blank=True)
+    parse_seconds = models.FloatField('Procesado (s)', null=True, blank=True)
+    db_seconds = models.FloatField('Base de datos (s)', null=True, blank=True)
+    images_seconds = models.FloatField('Imágenes (s)', null=True, blank=True)
+    total_rows = models.PositiveIntegerField('Filas recibidas', default=0)
+    created = models.PositiveIntegerField('Creadas', default=0)
+    updated = models.PositiveIntegerField('Actualizadas', default=0)
+    unchanged = models.PositiveIntegerField('Sin cambios', default=0)
+    skipped = models.PositiveIntegerField('Omitidas', default=0)
+    not_found = models.PositiveIntegerField('No encontradas', default=0)
+    errors = models.PositiveIntegerField('Con error', default=0)
+    payload_bytes = models.PositiveBigIntegerField('Tamaño del payload (bytes)', null=True, blank=True)
+    error = models.TextField('Error', blank=True)
+
+    # Fases de los resultados de los servicios (result['timings']) -> columna
+    PHASE_FIELDS = {
+        'fetch': 'fetch_seconds',
+        'parse': 'parse_seconds',
+        'prepare': 'parse_seconds',
+        'preload': 'db_seconds',
+        'write': 'db_seconds',
+        'index': 'db_seconds',
+        'db': 'db_seconds',
+        'images': 'images_seconds',
+    }
+    COUNT_FIELDS = ('created', 'updated', 'unchanged', 'skipped', 'not_found', 'errors')
+
+    class Meta:
+        verbose_name = 'Ejecución de sincronización'
+        verbose_name_plural = 'Ejecuciones de sincronización'
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['source', '-started_at'], name='integ_syncrun_source_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_source_display()} {self.started_at:%Y-%m-%d %H:%M}'
+
+    @property
+    def rows_per_second(self):
+        if not self.duration or not self.total_rows:
+            return None
+        return round(self.total_rows / self.duration, 1)
+
+    def record(self, result):
+        """Copia conteos, tiempos por fase y tamaño desde el dict que devuelve el servicio."""
+        for field in self.COUNT_FIELDS:
+            if isinstance(result.get(field), int):
+                setattr(self, field, result[field])
+        for key in ('total', 'total_api', 'total_received'):
+            if isinstance(result.get(key), int):
+                self.total_rows = result[key]
+                break
+        for phase, seconds in (result.get('timings') or {}).items():
+            field = self.PHASE_FIELDS.get(phase)
+            if field:
+                setattr(self, field, round((getattr(self, field) or 0) + seconds, 3))
+        if result.get('payload_bytes') is not None:
+            self.payload_bytes = result['payload_bytes']
+        images = result.get('images') or {}
+        self.errors += images.get('failed', 0)
+        if result.get('catalog_unchanged'):
+            self.status = 'unchanged'
+
+    def fail(self, error):
+        self.status = 'error'
+        self.error = str(error)[:4000]
+
+    def finish(self):
+        self.finished_at = timezone.now()
+        self.duration = round((self.finished_at - self.started_at).total_seconds(), 3)
+        if self.status == 'running':
+            self.status = 'ok'
+        self.save()
+
+
+class ErpOrderOutbox(models.Model):
+    """
+    Pedido pendiente de enviar al ERP. Se crea en la misma transacción en que el
+    pedido queda pagado y lo envía el comando process_erp_outbox (por lotes, con
+    reintentos y espera exponencial), así el request de pago no espera al ERP.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('sent', 'Enviado'),
+        ('failed', 'Fallido'),
+    ]
+    order = models.OneToOneField(
+        'orders.Order', on_delete=models.CASCADE, related_name='erp_outbox', verbose_name='Pedido'
+    )
+    status = models.CharField('Estado', max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField('Intentos', default=0)
+    next_attempt_at = models.DateTimeField('Próximo intento', default=timezone.now)
+    last_error = models.TextField('Último error', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField('Enviado', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Pedido en cola para ERP'
+        verbose_name_plural = 'Pedidos en cola para ERP'
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='integ_erpoutbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.order_id} ({self.get_status_display()})'
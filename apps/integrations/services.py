@@ -2,16 +2,16 @@
 Servicios de integración con API de productos y ERP.
 Configura PRODUCTS_API_URL, PRODUCTS_API_KEY, ERP_API_URL, ERP_API_KEY en .env
 """
+import hashlib
+import json
 import logging
-import os
-import re
+import time
 
 import requests
 from decimal import Decimal
 from io import BytesIO
 
 from django.conf import settings
-from django.core.files.base import ContentFile
 from django.utils.text import slugify
 
 logger = logging.getLogger(__name__)
@@ -26,157 +26,148 @@ TERSA_EXTRA_PRODUCT_IDS = [
 ]
 
 
-def fetch_tersa_products(brands=None, extra_ids=None):
+def fetch_tersa_products(brands=None, extra_ids=None, catalog=None):
     """
     Obtiene productos desde la API de Tersa Cosmeticos.
     Filtra por nombre_marca en BARBERSHOP y BARBER UP, más los IDs extra indicados.
+    Usa la descarga cacheada y condicional de tersa_catalog (compartida entre
+    sincronizaciones); se puede pasar un catalog ya obtenido.
     """
+    from .tersa_catalog import get_tersa_catalog
+
     brands = brands or TERSA_BRANDS
     extra_ids = extra_ids if extra_ids is not None else TERSA_EXTRA_PRODUCT_IDS
     extra_set = {str(i).strip() for i in extra_ids if i}
     try:
-        response = requests.get(TERSA_API_URL, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        if not isinstance(data, list):
-            return []
+        catalog = catalog or get_tersa_catalog(TERSA_API_URL)
         brand_set = {b.upper() for b in brands}
         return [
-            p for p in data
-            if (p.get('nombre_marca') or '').strip().upper() in brand_set
-            or str(p.get('id', '')).strip() in extra_set
+            p for p in catalog
+            if isinstance(p, dict) and (
+                (p.get('nombre_marca') or '').strip().upper() in brand_set
+                or str(p.get('id', '')).strip() in extra_set
+            )
         ]
     except Exception as e:
         logger.exception("Error fetching Tersa products")
         raise Exception(f"Error fetching Tersa API: {e}")
 
 
-def _download_image(url):
-    """Descarga imagen desde URL y devuelve (filename, ContentFile) o None si falla."""
-    if not url or url.endswith('/media/0') or url == '/media/0':
-        return None
+def _tersa_consumer(name, brands, extra_ids):
+    """Clave de un consumidor del catálogo (incluye los filtros: otro filtro = otra sincronización)."""
+    brands = sorted(b.upper() for b in (brands or TERSA_BRANDS))
+    extra_ids = sorted(str(i) for i in (extra_ids if extra_ids is not None else TERSA_EXTRA_PRODUCT_IDS))
+    return f"{name}:{hashlib.md5(json.dumps([brands, extra_ids]).encode()).hexdigest()[:12]}"
+
+
+def _get_tersa_catalog():
+    from .tersa_catalog import get_tersa_catalog
+
     try:
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        if not resp.content or len(resp.content) < 100:
-            return None
-        ext = '.jpg'
-        ct = resp.headers.get('Content-Type', '')
-        if 'png' in ct:
-            ext = '.png'
-        elif 'webp' in ct:
-            ext = '.webp'
-        else:
-            # Inferir por magic bytes
-            if resp.content[:8] == b'\x89PNG\r\n\x1a\n':
-                ext = '.png'
-            elif resp.content[:2] == b'\xff\xd8':
-                ext = '.jpg'
-        name = re.sub(r'[^\w\-.]', '_', os.path.basename(url.split('?')[0])) or 'image'
-        if not name.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-            name += ext
-        return (name[:100], ContentFile(resp.content))
-    except Exception:
-        return None
+        return get_tersa_catalog(TERSA_API_URL)
+    except Exception as e:
+        logger.exception("Error fetching Tersa products")
+        raise Exception(f"Error fetching Tersa API: {e}")
 
 
-def sync_tersa_products(brands=None, download_images=True):
+def sync_tersa_products(brands=None, download_images=True, images_in_background=False, force=False):
     """
     Sincroniza productos desde la API Tersa (solo BARBERSHOP y BARBER UP).
-    Crea/actualiza Product, Brand y Category según corresponda.
+    Crea/actualiza Product, Brand y Category en bloque (ver bulk_import.py). Las
+    imágenes de los productos sin imagen se descargan después, en paralelo (ver
+    downloads.py); con images_in_background=True en un hilo aparte para no bloquear
+    al llamador.
+    Si el catálogo de Tersa no cambió desde la última sincronización con los mismos
+    filtros no se hace nada (catalog_unchanged=True), salvo con force=True.
     """
-    from apps.products.models import Product, ProductImage, Category, Brand
-
-    data = fetch_tersa_products(brands=brands)
-    created = updated = 0
-
-    for item in data:
-        external_id = str(item.get('id', ''))
-        nombre = (item.get('nombre_producto') or 'Sin nombre').strip()
-        attr = (item.get('nombreAtributo') or '').strip()
-        if attr and attr.upper() != 'SIN ATRIBUTO':
-            nombre = f"{nombre} {attr}"
-        sku = (item.get('codigo') or '').strip() or (f"TERSA-{external_id}" if external_id else None)
-        precio = item.get('precio5') or item.get('precio_min') or 0
-        try:
-            price = Decimal(str(precio))
-        except Exception:
-            price = Decimal('0')
-        ficha = item.get('ficha_tecnica') or {}
-        descripcion = ficha.get('descripcion', '') or ''
-        short = (descripcion[:500] + '...') if len(descripcion) > 500 else descripcion
-        cat_name = (ficha.get('categoria') or '').strip()
-        if not cat_name or cat_name.upper() in ('SIN CATEGORIA', 'S/A', 'N/A'):
-            cat_name = 'General'
-        category = None
-        if cat_name:
-            cat_slug = slugify(cat_name) or 'general'
-            category, _ = Category.objects.get_or_create(
-                slug=cat_slug,
-                defaults={'name': cat_name, 'is_active': True}
-            )
-        brand_name = (item.get('nombre_marca') or '').strip()
-        brand = None
-        if brand_name:
-            brand_slug = slugify(brand_name) or brand_name.lower().replace(' ', '-')
-            brand, _ = Brand.objects.get_or_create(
-                slug=brand_slug,
-                defaults={'name': brand_name, 'is_active': True}
-            )
-        base_slug = slugify(nombre)
-        slug = f"{base_slug}-{external_id}" if external_id else f"{base_slug}-{hash(nombre) % 10**8}"
-        estado = item.get('estado', True)
-        if isinstance(estado, str):
-            estado = estado.lower() in ('true', '1', 'si', 'yes', 'activo')
-
-        # SKU único: TERSA-{id} para evitar colisiones con codigo repetido
-        api_sku = f"TERSA-{external_id}" if external_id else (sku or f"TERSA-{hash(nombre) % 10**10}")
-        codigo_api = (item.get('codigo') or '').strip()
-        defaults = {
-            'name': nombre,
-            'slug': slug,
-            'sku': api_sku,
-            'codigo': codigo_api,
-            'external_id': external_id,
-            'regular_price': price,
-            'short_description': short,
-            'description': descripcion,
-            'is_active': estado,
-            'source': 'api',
-            # Stock gestionado exclusivamente por push_stock_barbershop (bodega 2).
-            # El importador no sobreescribe stock ni umbral.
-            'manage_stock': True,
+    from .bulk_import import ProductBulkImporter
+    from .downloads import download_product_images, download_product_images_in_background
+
+    fetch_start = time.perf_counter()
+    catalog = _get_tersa_catalog()
+    consumer = _tersa_consumer('products', brands, None)
+    if not force and catalog.is_processed(consumer):
+        return {
+            'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'total': 0,
+            'catalog_unchanged': True, 'payload_bytes': catalog.size,
+            'timings': {'fetch': round(time.perf_counter() - fetch_start, 3)},
         }
-        if brand:
-            defaults['brand'] = brand
-        lookup = {'external_id': external_id, 'source': 'api'} if external_id else {'sku': api_sku, 'source': 'api'}
-        product, created_flag = Product.objects.update_or_create(defaults=defaults, **lookup)
-        # Asignar categorías solo si el producto es nuevo; si ya existía no las tocamos
-        if created_flag:
-            if category:
-                product.categories.set([category])
-            else:
-                product.categories.clear()
-        if created_flag:
-            created += 1
-        else:
-            updated += 1
+    data = fetch_tersa_products(brands=brands, catalog=catalog)
+    fetch_seconds = round(time.perf_counter() - fetch_start, 3)
+    importer = ProductBulkImporter()
+    pending_images = []
+
+    with importer.phase('prepare'):
+        for item in data:
+            external_id = str(item.get('id', ''))
+            nombre = (item.get('nombre_producto') or 'Sin nombre').strip()
+            attr = (item.get('nombreAtributo') or '').strip()
+            if attr and attr.upper() != 'SIN ATRIBUTO':
+                nombre = f"{nombre} {attr}"
+            sku = (item.get('codigo') or '').strip() or (f"TERSA-{external_id}" if external_id else None)
+            precio = item.get('precio5') or item.get('precio_min') or 0
+            try:
+                price = Decimal(str(precio))
+            except Exception:
+                price = Decimal('0')
+            ficha = item.get('ficha_tecnica') or {}
+            descripcion = ficha.get('descripcion', '') or ''
+            short = (descripcion[:500] + '...') if len(descripcion) > 500 else descripcion
+            cat_name = (ficha.get('categoria') or '').strip()
+            if not cat_name or cat_name.upper() in ('SIN CATEGORIA', 'S/A', 'N/A'):
+                cat_name = 'General'
+            category = importer.category(cat_name)
+            brand_name = (item.get('nombre_marca') or '').strip()
+            brand = importer.brand(brand_name) if brand_name else None
+            base_slug = slugify(nombre)
+            slug = f"{base_slug}-{external_id}" if external_id else f"{base_slug}-{hash(nombre) % 10**8}"
+            estado = item.get('estado', True)
+            if isinstance(estado, str):
+                estado = estado.lower() in ('true', '1', 'si', 'yes', 'activo')
+
+            # SKU único: TERSA-{id} para evitar colisiones con codigo repetido
+            api_sku = f"TERSA-{external_id}" if external_id else (sku or f"TERSA-{hash(nombre) % 10**10}")
+            codigo_api = (item.get('codigo') or '').strip()
+            defaults = {
+                'name': nombre,
+                'slug': slug,
+                'sku': api_sku,
+                'codigo': codigo_api,
+                'external_id': external_id,
+                'regular_price': price,
+                'short_description': short,
+                'description': descripcion,
+                'is_active': estado,
+                'source': 'api',
+                # Stock gestionado exclusivamente por push_stock_barbershop (bodega 2).
+                # El importador no sobreescribe stock ni umbral.
+                'manage_stock': True,
+            }
+            if brand:
+                defaults['brand'] = brand
+            # Categorías solo para productos nuevos; si ya existía no las tocamos
+            product = importer.add(defaults, external_id=external_id, sku=api_sku, category=category)
 
-        # Imagen: descargar si no hay imágenes y la API tiene URL
-        if download_images and not product.images.exists():
+            # Imagen: se encola y se descarga al terminar el catálogo (solo si el producto no tiene)
             img_path = item.get('imagen') or ''
-            if img_path and not img_path.endswith('/media/0'):
+            if product and download_images and img_path and not img_path.endswith('/media/0'):
                 url = img_path if img_path.startswith('http') else f"{TERSA_BASE_URL.rstrip('/')}{img_path}"
-                result = _download_image(url)
-                if result:
-                    filename, content = result
-                    try:
-                        pi = ProductImage(product=product, order=0, is_primary=True, alt_text=nombre[:255])
-                        pi.image.save(filename, content, save=True)
-                    except Exception as e:
-                        logger.warning("No se pudo guardar imagen para %s: %s", sku, e)
-
-    return {'created': created, 'updated': updated, 'total': len(data)}
+                pending_images.append((product, url, nombre))
+
+    result = importer.commit()
+    catalog.mark_processed(consumer)
+    result['timings'] = {'fetch': fetch_seconds, **result['timings']}
+    result['total'] = len(data)
+    result['payload_bytes'] = catalog.size
+    image_jobs = [(product.pk, url, alt) for product, url, alt in pending_images]
+    if image_jobs:
+        if images_in_background:
+            download_product_images_in_background(image_jobs)
+        else:
+            images_start = time.perf_counter()
+            result['images'] = download_product_images(image_jobs)
+            result['timings']['images'] = round(time.perf_counter() - images_start, 3)
+    return result
 
 
 def fetch_products_from_api():
@@ -206,30 +197,30 @@ def fetch_products_from_api():
 
 
 def sync_products_from_api():
-    """Sincroniza productos desde API al modelo local."""
-    from apps.products.models import Product, Category
+    """Sincroniza productos desde API al modelo local (upsert en bloque, ver bulk_import.py)."""
+    from .bulk_import import ProductBulkImporter
 
+    fetch_start = time.perf_counter()
     data = fetch_products_from_api()
-    created = updated = 0
-
-    for item in data:
-        external_id = str(item.get('id') or item.get('external_id', '')).strip() or None
-        name = item.get('name') or item.get('title') or item.get('nombre', 'Sin nombre')
-        sku = item.get('sku') or item.get('codigo') or (f"API-{external_id}" if external_id else None)
-        codigo_api = (item.get('codigo') or '').strip()
-        price = item.get('price') or item.get('precio') or item.get('regular_price', 0)
-        if isinstance(price, str):
-            price = Decimal(price.replace(',', '.'))
-        else:
-            price = Decimal(str(price))
-        description = item.get('description') or item.get('descripcion', '')
-        image_url = item.get('image') or item.get('imagen') or item.get('thumbnail')
-        api_sku = sku or (f"API-{external_id}" if external_id else f"API-{hash(name) % 10**10}")
-        base_slug = slugify(name)
-        slug = f"{base_slug}-{external_id}" if external_id else f"{base_slug}-{hash(name) % 10**6}"
-        lookup = {'external_id': external_id, 'source': 'api'} if external_id else {'sku': api_sku, 'source': 'api'}
-        product, created_flag = Product.objects.update_or_create(
-            defaults={
+    fetch_seconds = round(time.perf_counter() - fetch_start, 3)
+    importer = ProductBulkImporter()
+
+    with importer.phase('prepare'):
+        for item in data:
+            external_id = str(item.get('id') or item.get('external_id', '')).strip() or None
+            name = item.get('name') or item.get('title') or item.get('nombre', 'Sin nombre')
+            sku = item.get('sku') or item.get('codigo') or (f"API-{external_id}" if external_id else None)
+            codigo_api = (item.get('codigo') or '').strip()
+            price = item.get('price') or item.get('precio') or item.get('regular_price', 0)
+            if isinstance(price, str):
+                price = Decimal(price.replace(',', '.'))
+            else:
+                price = Decimal(str(price))
+            description = item.get('description') or item.get('descripcion', '')
+            api_sku = sku or (f"API-{external_id}" if external_id else f"API-{hash(name) % 10**10}")
+            base_slug = slugify(name)
+            slug = f"{base_slug}-{external_id}" if external_id else f"{base_slug}-{hash(name) % 10**6}"
+            importer.add({
                 'name': name,
                 'slug': slug,
                 'sku': api_sku,
@@ -239,45 +230,28 @@ def sync_products_from_api():
                 'short_description': description[:500] if description else '',
                 'description': description,
                 'is_active': item.get('is_active', item.get('activo', True)),
-            },
-            **lookup
-        )
-        if created_flag:
-            created += 1
-        else:
-            updated += 1
+            }, external_id=external_id or '', sku=api_sku)
 
-    return {'created': created, 'updated': updated}
+    result = importer.commit()
+    result['timings'] = {'fetch': fetch_seconds, **result['timings']}
+    result['total'] = len(data)
+    return result
 
 
 def send_order_to_erp(order):
-    """Envía pedido al ERP Django."""
+    """
+    Envía un pedido al ERP Django de forma síncrona. El flujo normal es la cola
+    (erp_outbox.enqueue_order + comando process_erp_outbox).
+    """
+    from .erp_outbox import build_order_payload, erp_headers
+
     url = settings.ERP_API_URL
     if not url:
         return None
-    headers = {'Content-Type': 'application/json'}
-    if settings.ERP_API_KEY:
-        headers['Authorization'] = f'Bearer {settings.ERP_API_KEY}'
-        headers['X-API-Key'] = settings.ERP_API_KEY
-
-    payload = {
-        'order_number': order.order_number,
-        'customer_email': order.billing_email,
-        'customer_name': f"{order.billing_first_name} {order.billing_last_name}",
-        'total': str(order.total),
-        'items': [
-            {
-                'product_id': item.product.id,
-                'product_name': item.product_name,
-                'quantity': item.quantity,
-                'price': str(item.price),
-            }
-            for item in order.items.all()
-        ],
-    }
+    payload = build_order_payload(order)
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = requests.post(url, headers=erp_headers(), json=payload, timeout=30)
         response.raise_for_status()
         data = response.json()
         erp_id = data.get('id') or data.get('order_id')
@@ -298,7 +272,7 @@ def sync_products_from_api_task():
 # Sincronización de stock desde TersaSoft → productos locales
 # ---------------------------------------------------------------------------
 
-def fetch_tersa_stock(brands=None, extra_ids=None):
+def fetch_tersa_stock(brands=None, extra_ids=None, catalog=None):
     """
     Llama a la API pública de Tersa y devuelve un dict:
       external_id (str) -> existencia (int)
@@ -306,7 +280,7 @@ def fetch_tersa_stock(brands=None, extra_ids=None):
     Filtra las mismas marcas y IDs extra que fetch_tersa_products.
     Se usa 'existencia' del objeto para obtener el stock actual.
     """
-    products = fetch_tersa_products(brands=brands, extra_ids=extra_ids)
+    products = fetch_tersa_products(brands=brands, extra_ids=extra_ids, catalog=catalog)
     stock_map = {}
     for item in products:
         ext_id = str(item.get('id', '')).strip()
@@ -320,34 +294,42 @@ def fetch_tersa_stock(brands=None, extra_ids=None):
     return stock_map
 
 
-def sync_tersa_stock(brands=None, extra_ids=None, dry_run=False):
-    """
-    Actualiza SOLO stock_quantity en los productos locales cuyo
-    external_id coincide con un producto de la API Tersa.
+# Tamaño de lote para external_id__in y bulk_update (bajo el límite de variables de SQLite)
+STOCK_BATCH_SIZE = 1000
 
-    Parámetros:
-      brands    – lista de marcas a filtrar (default: TERSA_BRANDS)
-      extra_ids – IDs adicionales a incluir (default: TERSA_EXTRA_PRODUCT_IDS)
-      dry_run   – si True, no guarda cambios en BD
 
-    Retorna dict con claves:
-      updated      – productos actualizados
-      unchanged    – stock ya era igual
-      not_found    – external_id no existe en BD local
-      total_api    – total de productos recibidos de la API
+def apply_stock_map(stock_map, dry_run=False):
     """
+    Aplica un dict external_id -> stock a los productos de la API. El stock local se
+    lee con external_id__in por lotes, la diferencia se calcula en memoria y los
+    cambios se guardan con bulk_update en una transacción.
+
+    Retorna dict con updated / unchanged / not_found, results (detalle por producto)
+    y timings.
+    """
+    from django.db import transaction
+    from django.utils import timezone
     from apps.products.models import Product
 
-    stock_map = fetch_tersa_stock(brands=brands, extra_ids=extra_ids)
-    total_api = len(stock_map)
+    start = time.perf_counter()
+    # Si un external_id se repite en BD se usa el producto más reciente (como el antiguo .first())
+    local = {}
+    ext_ids = list(stock_map)
+    for i in range(0, len(ext_ids), STOCK_BATCH_SIZE):
+        rows = (
+            Product.objects.filter(source='api', external_id__in=ext_ids[i:i + STOCK_BATCH_SIZE])
+            .order_by('-created_at')
+            .values_list('pk', 'external_id', 'name', 'sku', 'stock_quantity')
+        )
+        for pk, ext_id, name, sku, stock in rows:
+            local.setdefault(ext_id, (pk, name, sku, stock))
 
     updated = unchanged = not_found = 0
     results = []
+    changes = {}
 
     for ext_id, new_stock in stock_map.items():
-        product = Product.objects.filter(external_id=ext_id, source='api').first()
-
-        if not product:
+        if ext_id not in local:
             not_found += 1
             results.append({
                 'status': 'not_found',
@@ -356,38 +338,119 @@ def sync_tersa_stock(brands=None, extra_ids=None, dry_run=False):
             })
             continue
 
-        if product.stock_quantity == new_stock:
+        pk, name, sku, old_stock = local[ext_id]
+        if old_stock == new_stock:
             unchanged += 1
             results.append({
                 'status': 'unchanged',
                 'external_id': ext_id,
-                'name': product.name,
-                'sku': product.sku,
+                'name': name,
+                'sku': sku,
                 'stock': new_stock,
             })
             continue
 
-        old_stock = product.stock_quantity
-        if not dry_run:
-            product.stock_quantity = new_stock
-            product.manage_stock = True
-            product.save(update_fields=['stock_quantity', 'manage_stock', 'updated_at'])
-
+        changes[pk] = new_stock
         updated += 1
         results.append({
             'status': 'updated',
             'external_id': ext_id,
-            'name': product.name,
-            'sku': product.sku,
+            'name': name,
+            'sku': sku,
             'old_stock': old_stock,
             'new_stock': new_stock,
         })
 
+    if changes and not dry_run:
+        now = timezone.now()
+        with transaction.atomic():
+            # UPDATE ... CASE WHEN por lotes; updated_at a mano (bulk_update no aplica auto_now)
+            Product.objects.bulk_update(
+                [
+                    Product(pk=pk, stock_quantity=stock, manage_stock=True, updated_at=now)
+                    for pk, stock in changes.items()
+                ],
+                ['stock_quantity', 'manage_stock', 'updated_at'],
+                batch_size=STOCK_BATCH_SIZE,
+            )
+            # Disponibilidad desnormalizada (sube la versión del catálogo si cambia)
+            Product.refresh_denormalized_for(changes)
+
     return {
         'updated': updated,
         'unchanged': unchanged,
         'not_found': not_found,
-        'total_api': total_api,
         'results': results,
-        'dry_run': dry_run,
+        'timings': {'db': round(time.perf_counter() - start, 3)},
+    }
+
+
+def stock_manifest():
+    """
+    Stock actual de los productos de la API: {'count', 'checksum', 'stock'} con
+    stock = {external_id: stock_quantity}. El checksum (SHA-1 de las parejas
+    ordenadas) permite al emisor saber si hay algo que enviar sin comparar fila a fila.
+    """
+    from apps.products.models import Product
+
+    stock = {}
+    rows = (
+        Product.objects.filter(source='api').exclude(external_id='')
+        .order_by('-created_at').values_list('external_id', 'stock_quantity')
+    )
+    for ext_id, quantity in rows:
+        stock.setdefault(ext_id, quantity)
+    return {
+        'count': len(stock),
+        'checksum': stock_checksum(stock),
+        'stock': stock,
     }
+
+
+def stock_checksum(stock):
+    """SHA-1 de 'external_id:stock' ordenado; el emisor lo calcula igual sobre su bodega."""
+    digest = hashlib.sha1()
+    for ext_id in sorted(stock):
+        digest.update(f'{ext_id}:{stock[ext_id]}\n'.encode())
+    return digest.hexdigest()
+
+
+def sync_tersa_stock(brands=None, extra_ids=None, dry_run=False, force=False):
+    """
+    Actualiza SOLO stock_quantity en los productos locales cuyo
+    external_id coincide con un producto de la API Tersa (ver apply_stock_map).
+
+    Parámetros:
+      brands    – lista de marcas a filtrar (default: TERSA_BRANDS)
+      extra_ids – IDs adicionales a incluir (default: TERSA_EXTRA_PRODUCT_IDS)
+      dry_run   – si True, no guarda cambios en BD
+      force     – aplicar aunque el catálogo no haya cambiado desde la última vez
+
+    Retorna dict con claves:
+      updated      – productos actualizados
+      unchanged    – stock ya era igual
+      not_found    – external_id no existe en BD local
+      total_api    – total de productos recibidos de la API
+      catalog_unchanged – True si se omitió porque el catálogo no cambió
+    """
+    start = time.perf_counter()
+    catalog = _get_tersa_catalog()
+    timings = {'fetch': round(time.perf_counter() - start, 3)}
+    consumer = _tersa_consumer('stock', brands, extra_ids)
+    if not force and not dry_run and catalog.is_processed(consumer):
+        return {
+            'updated': 0, 'unchanged': 0, 'not_found': 0, 'total_api': 0,
+            'results': [], 'dry_run': dry_run, 'catalog_unchanged': True,
+            'payload_bytes': catalog.size, 'timings': timings,
+        }
+    start = time.perf_counter()
+    stock_map = fetch_tersa_stock(brands=brands, extra_ids=extra_ids, catalog=catalog)
+    timings['parse'] = round(time.perf_counter() - start, 3)
+    result = apply_stock_map(stock_map, dry_run=dry_run)
+    if not dry_run:
+        catalog.mark_processed(consumer)
+    result['timings'] = {**timings, **result['timings']}
+    result['total_api'] = len(stock_map)
+    result['payload_bytes'] = catalog.size
+    result['dry_run'] = dry_run
+    return result
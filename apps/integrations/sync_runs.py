@@ -0,0 +1,30 @@
+"""
+Registro de ejecuciones de sincronización (SyncRun).
+
+    with track_sync_run('tersa_stock', 'command') as run:
+        result = sync_tersa_stock()
+        run.record(result)
+
+Si el bloque lanza una excepción la ejecución queda como 'error' con el mensaje.
+"""
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def track_sync_run(source, trigger):
+    from .models import SyncRun
+
+    run = SyncRun.objects.create(source=source, trigger=trigger)
+    try:
+        yield run
+    except Exception as exc:
+        run.fail(exc)
+        raise
+    finally:
+        try:
+            run.finish()
+        except Exception:
+            logger.exception('No se pudo guardar la ejecución de sincronización %s', run.pk)
@@ -0,0 +1,132 @@
+"""
+Descarga cacheada del catálogo público de Tersa (productos-publicos).
+
+- La última respuesta se guarda en disco (TERSA_CACHE_DIR) con su ETag /
+  Last-Modified y el SHA-256 del contenido; la siguiente descarga es un GET
+  condicional y un 304 reutiliza el archivo.
+- Dentro de la ventana TERSA_CATALOG_WINDOW (segundos) no se vuelve a pedir: la
+  sincronización de productos y la de stock comparten una sola descarga.
+- El array se recorre elemento a elemento desde el archivo (iter_json_array), así la
+  lista completa no se tiene en memoria.
+- Cada consumidor (sync de productos, sync de stock) registra el hash que procesó:
+  si el catálogo no cambió desde entonces la sincronización puede omitirse.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+from django.conf import settings
+
+from apps.core.json_stream import iter_json_array
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE = 'productos-publicos.json'
+META_FILE = 'productos-publicos.meta.json'
+CHUNK_SIZE = 64 * 1024
+
+_lock = threading.Lock()
+
+
+def _cache_dir():
+    path = str(getattr(settings, 'TERSA_CACHE_DIR', '') or os.path.join(settings.BASE_DIR, 'var', 'tersa'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _read_meta():
+    try:
+        with open(os.path.join(_cache_dir(), META_FILE), encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(meta):
+    directory = _cache_dir()
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, os.path.join(directory, META_FILE))
+
+
+class TersaCatalog:
+    """Catálogo descargado (en disco). Iterable: devuelve cada producto de la API."""
+
+    def __init__(self, path, meta, not_modified):
+        self.path = path
+        self.sha256 = meta.get('sha256', '')
+        self.fetched_at = meta.get('fetched_at', 0)
+        self.not_modified = not_modified
+        self.size = os.path.getsize(path)
+
+    def __iter__(self):
+        with open(self.path, 'rb') as fh:
+            yield from iter_json_array(fh)
+
+    def is_processed(self, consumer):
+        """True si `consumer` ya sincronizó exactamente este contenido."""
+        return bool(self.sha256) and _read_meta().get('processed', {}).get(consumer) == self.sha256
+
+    def mark_processed(self, consumer):
+        with _lock:
+            meta = _read_meta()
+            meta.setdefault('processed', {})[consumer] = self.sha256
+            _write_meta(meta)
+
+
+def get_tersa_catalog(url, max_age=None, timeout=60):
+    """
+    Devuelve el TersaCatalog de `url`: el archivo en disco si se descargó hace menos
+    de max_age segundos (TERSA_CATALOG_WINDOW), si no un GET condicional.
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'TERSA_CATALOG_WINDOW', 300)
+    path = os.path.join(_cache_dir(), CATALOG_FILE)
+    with _lock:
+        meta = _read_meta()
+        cached = os.path.exists(path) and meta.get('url') == url and meta.get('sha256')
+        if cached and time.time() - meta.get('fetched_at', 0) < max_age:
+            return TersaCatalog(path, meta, not_modified=True)
+
+        headers = {}
+        if cached and meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if cached and meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        with requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and cached:
+                meta['fetched_at'] = time.time()
+                _write_meta(meta)
+                return TersaCatalog(path, meta, not_modified=True)
+            response.raise_for_status()
+            digest = hashlib.sha256()
+            fd, tmp = tempfile.mkstemp(dir=_cache_dir(), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as fh:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        digest.update(chunk)
+                        fh.write(chunk)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+        sha256 = digest.hexdigest()
+        not_modified = sha256 == meta.get('sha256')
+        meta.update({
+            'url': url,
+            'etag': response.headers.get('ETag', ''),
+            'last_modified': response.headers.get('Last-Modified', ''),
+            'sha256': sha256,
+            'fetched_at': time.time(),
+        })
+        _write_meta(meta)
+        logger.info('Catálogo Tersa descargado (%s, %s)', sha256[:12], 'sin cambios' if not_modified else 'nuevo')
+        return TersaCatalog(path, meta, not_modified=not_modified)
@@ -0,0 +1,50 @@
+"""
+Tests del upsert masivo de productos de Tersa.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.integrations.services import sync_tersa_products
+from apps.products.catalog import get_catalog_version
+from apps.products.models import Product
+
+
+def tersa_item(pk, price, name='Cera'):
+    return {
+        'id': pk, 'nombre_producto': name, 'codigo': f'C{pk}', 'precio5': price,
+        'nombre_marca': 'BARBERSHOP', 'estado': True, 'imagen': '',
+        'ficha_tecnica': {'descripcion': 'Fijación fuerte', 'categoria': 'Ceras'},
+    }
+
+
+class BulkImportTest(TestCase):
+    """Crea en bloque, omite lo que no cambió y actualiza solo lo modificado."""
+
+    def sync(self, data):
+        catalog = mock.Mock(**{'is_processed.return_value': False})
+        with mock.patch('apps.integrations.services._get_tersa_catalog', return_value=catalog), \
+                mock.patch('apps.integrations.services.fetch_tersa_products', return_value=data):
+            return sync_tersa_products(download_images=False)
+
+    def test_create_unchanged_update(self):
+        result = self.sync([tersa_item(1, 10000), tersa_item(2, 20000, 'Gel')])
+        self.assertEqual((result['created'], result['updated']), (2, 0))
+        self.assertIn('write', result['timings'])
+        product = Product.objects.get(external_id='1')
+        self.assertEqual(product.effective_price, Decimal('10000'))
+        self.assertEqual(product.brand.slug, 'barbershop')
+        self.assertEqual(list(product.categories.values_list('slug', flat=True)), ['ceras'])
+        self.assertIn('fijacion', product.search_document)
+
+        version = get_catalog_version()
+        with self.assertNumQueries(6):
+            result = self.sync([tersa_item(1, 10000), tersa_item(2, 20000, 'Gel')])
+        self.assertEqual((result['unchanged'], result['updated']), (2, 0))
+        self.assertEqual(get_catalog_version(), version)
+
+        result = self.sync([tersa_item(1, 12000), tersa_item(2, 20000, 'Gel'), tersa_item(2, 1, 'Dup')])
+        self.assertEqual((result['updated'], result['unchanged'], result['skipped']), (1, 1, 1))
+        self.assertEqual(Product.objects.get(external_id='1').effective_price, Decimal('12000'))
+        self.assertNotEqual(get_catalog_version(), version)
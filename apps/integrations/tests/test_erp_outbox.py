@@ -0,0 +1,124 @@
+"""
+Tests de la cola de pedidos al ERP contra un ERP local de prueba.
+"""
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.integrations.erp_outbox import enqueue_order, process_outbox
+from apps.integrations.models import ErpOrderOutbox
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product
+
+
+class FakeErpHandler(BaseHTTPRequestHandler):
+    """ERP de prueba: /orders/ (uno) y /orders/batch/ (varios). `fail` respuestas 503 primero."""
+    requests = []
+    fail = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        type(self).requests.append((self.path, body, self.headers.get('X-API-Key')))
+        if type(self).fail:
+            type(self).fail -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.path == '/orders/batch/':
+            data = {'results': [
+                {'order_number': o['order_number'], 'id': f'ERP-{o["order_number"]}'}
+                for o in body['orders']
+            ]}
+        else:
+            data = {'id': f'ERP-{body["order_number"]}'}
+        payload = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class ErpOutboxTest(TestCase):
+    """Envío por lotes, reintento con espera exponencial y erp_order_id."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeErpHandler)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FakeErpHandler.requests = []
+        FakeErpHandler.fail = 0
+        product = Product.objects.create(name='Gel', sku='GEL-1', regular_price=Decimal('10'))
+        self.orders = []
+        for i in range(3):
+            order = Order.objects.create(
+                billing_first_name='Ana', billing_email=f'ana{i}@test.com', total=Decimal('20'),
+            )
+            OrderItem.objects.create(
+                order=order, product=product, product_name='Gel',
+                quantity=2, price=Decimal('10'), total=Decimal('20'),
+            )
+            self.orders.append(order)
+
+    def test_batches_and_records_erp_id(self):
+        with override_settings(ERP_API_URL=f'{self.base_url}/orders/',
+                               ERP_API_BATCH_URL=f'{self.base_url}/orders/batch/', ERP_BATCH_SIZE=2):
+            for order in self.orders:
+                enqueue_order(order)
+            enqueue_order(self.orders[0])
+            self.assertEqual(ErpOrderOutbox.objects.count(), 3)
+
+            result = process_outbox()
+        self.assertEqual((result['sent'], result['requests']), (3, 2))
+        self.assertEqual([len(body['orders']) for _, body, _key in FakeErpHandler.requests], [2, 1])
+        self.assertEqual(FakeErpHandler.requests[0][1]['orders'][0]['items'][0]['quantity'], 2)
+        order = Order.objects.get(pk=self.orders[0].pk)
+        self.assertEqual(order.erp_order_id, f'ERP-{order.order_number}')
+        self.assertFalse(ErpOrderOutbox.objects.exclude(status='sent').exists())
+
+    @override_settings(ERP_API_BATCH_URL='', ERP_OUTBOX_BACKOFF=60, ERP_OUTBOX_MAX_ATTEMPTS=2)
+    def test_single_posts_with_backoff(self):
+        with override_settings(ERP_API_URL=f'{self.base_url}/orders/'):
+            enqueue_order(self.orders[0])
+            FakeErpHandler.fail = 1
+            result = process_outbox()
+            self.assertEqual((result['retried'], result['sent']), (1, 0))
+            entry = ErpOrderOutbox.objects.get()
+            self.assertEqual(entry.attempts, 1)
+            self.assertGreater(entry.next_attempt_at, timezone.now() + timedelta(seconds=50))
+            # Aún no vence: no se reintenta
+            self.assertEqual(process_outbox()['requests'], 0)
+
+            ErpOrderOutbox.objects.update(next_attempt_at=timezone.now())
+            result = process_outbox()
+        self.assertEqual(result['sent'], 1)
+        self.assertEqual(FakeErpHandler.requests[-1][0], '/orders/')
+        self.assertTrue(Order.objects.get(pk=self.orders[0].pk).erp_order_id)
+
+    @override_settings(ERP_API_BATCH_URL='')
+    def test_api_key_change_reaches_running_worker(self):
+        with override_settings(ERP_API_URL=f'{self.base_url}/orders/', ERP_API_KEY='clave-1'):
+            enqueue_order(self.orders[0])
+            process_outbox()
+        with override_settings(ERP_API_URL=f'{self.base_url}/orders/', ERP_API_KEY='clave-2'):
+            enqueue_order(self.orders[1])
+            process_outbox()
+        self.assertEqual([key for _, _, key in FakeErpHandler.requests], ['clave-1', 'clave-2'])
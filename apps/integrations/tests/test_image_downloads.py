@@ -0,0 +1,104 @@
+"""
+Tests de la descarga concurrente de imágenes (peticiones condicionales y deduplicación).
+"""
+import io
+import shutil
+import tempfile
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from apps.integrations.downloads import download_product_images
+from apps.integrations.models import RemoteImage
+from apps.products.models import Product, ProductImage
+
+
+def make_png():
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new('RGB', (40, 40), color='red').save(buf, format='PNG')
+    return buf.getvalue()
+
+
+PNG = make_png()
+ETAG = '"img-1"'
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """Sirve la misma imagen en cualquier ruta, con ETag y soporte de 304."""
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(PNG)))
+        self.send_header('ETag', ETAG)
+        self.end_headers()
+        self.wfile.write(PNG)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageDownloadTest(TestCase):
+    """Misma imagen en dos URLs se guarda una vez; la segunda pasada usa 304."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        ImageHandler.requests_seen = []
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.products = [
+            Product.objects.create(name=f'Cera {i}', sku=f'DL-{i}', regular_price=Decimal('10'))
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_dedup_and_conditional_refetch(self):
+        a, b, c = self.products
+        stats = download_product_images([
+            (a.pk, f'{self.base_url}/a.png', 'A'),
+            (b.pk, f'{self.base_url}/b.png', 'B'),
+        ], max_workers=2)
+        self.assertEqual(stats['downloaded'] + stats['deduplicated'], 2)
+        self.assertEqual(stats['deduplicated'], 1)
+        self.assertEqual(stats['assigned'], 2)
+        files = set(ProductImage.objects.values_list('image', flat=True))
+        self.assertEqual(len(files), 1)
+        self.assertTrue(default_storage.exists(files.pop()))
+
+        # Producto sin imágenes con una URL ya conocida: petición condicional -> 304
+        stats = download_product_images([
+            (a.pk, f'{self.base_url}/a.png', 'A'),
+            (c.pk, f'{self.base_url}/a.png', 'C'),
+        ])
+        self.assertEqual(stats['not_modified'], 1)
+        self.assertEqual(stats['assigned'], 1)
+        self.assertEqual(ImageHandler.requests_seen[-1], ('/a.png', ETAG))
+        self.assertEqual(
+            c.images.get().image.name, RemoteImage.objects.get(url=f'{self.base_url}/a.png').file,
+        )
@@ -0,0 +1,43 @@
+"""
+Tests de la sincronización de stock desde Tersa.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.integrations.services import sync_tersa_stock
+from apps.products.models import Product
+
+
+class StockSyncTest(TestCase):
+    """La diferencia se calcula en memoria y se aplica en bloque."""
+
+    def setUp(self):
+        for i in range(1, 4):
+            Product.objects.create(
+                name=f'Cera {i}', sku=f'TERSA-{i}', external_id=str(i), source='api',
+                regular_price=Decimal('10'), manage_stock=True, stock_quantity=5,
+            )
+
+    def sync(self, stock_map, **kwargs):
+        catalog = mock.Mock(**{'is_processed.return_value': False})
+        with mock.patch('apps.integrations.services._get_tersa_catalog', return_value=catalog), \
+                mock.patch('apps.integrations.services.fetch_tersa_stock', return_value=stock_map):
+            return sync_tersa_stock(**kwargs)
+
+    def test_dry_run_does_not_write(self):
+        result = self.sync({'1': 0, '2': 5, '9': 3}, dry_run=True)
+        self.assertEqual((result['updated'], result['unchanged'], result['not_found']), (1, 1, 1))
+        self.assertEqual(Product.objects.get(external_id='1').stock_quantity, 5)
+
+    def test_bulk_update_refreshes_availability(self):
+        with self.assertNumQueries(8):
+            result = self.sync({'1': 0, '2': 7, '3': 5})
+        self.assertEqual((result['updated'], result['unchanged']), (2, 1))
+        first = Product.objects.get(external_id='1')
+        self.assertEqual(first.stock_quantity, 0)
+        self.assertFalse(first.is_available)
+        self.assertEqual(Product.objects.get(external_id='2').stock_quantity, 7)
+        updated = next(r for r in result['results'] if r['external_id'] == '2')
+        self.assertEqual((updated['old_stock'], updated['new_stock']), (5, 7))
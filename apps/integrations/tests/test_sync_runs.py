@@ -0,0 +1,57 @@
+"""
+Tests del registro de ejecuciones de sincronización y su página en el panel.
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.integrations.models import SyncRun
+from apps.integrations.sync_runs import track_sync_run
+from apps.products.models import Product
+
+
+class SyncRunTest(TestCase):
+    """Cada sincronización deja un SyncRun con conteos y tiempos por fase."""
+
+    def test_track_sync_run_records_result_and_errors(self):
+        with track_sync_run('tersa_products', 'command') as run:
+            run.record({
+                'created': 2, 'updated': 1, 'unchanged': 5, 'skipped': 0, 'total': 8,
+                'payload_bytes': 1024, 'images': {'failed': 1},
+                'timings': {'fetch': 1.5, 'preload': 0.1, 'prepare': 0.2, 'write': 0.3, 'index': 0.1},
+            })
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.total_rows, run.created, run.errors), ('ok', 8, 2, 1))
+        self.assertEqual((run.fetch_seconds, run.parse_seconds, run.db_seconds), (1.5, 0.2, 0.5))
+        self.assertIsNotNone(run.duration)
+
+        with self.assertRaises(RuntimeError):
+            with track_sync_run('tersa_stock', 'command'):
+                raise RuntimeError('API caída')
+        failed = SyncRun.objects.get(source='tersa_stock')
+        self.assertEqual((failed.status, failed.error), ('error', 'API caída'))
+
+    @override_settings(STOCK_SYNC_API_KEY='clave')
+    def test_endpoint_run_and_dashboard_page(self):
+        Product.objects.create(
+            name='Cera', sku='TERSA-1', external_id='1', source='api', regular_price=Decimal('10'),
+        )
+        self.client.post(
+            reverse('integrations:sync_stock'), data=json.dumps([{'external_id': '1', 'stock': 4}]),
+            content_type='application/json', secure=True, headers={'X-Sync-Api-Key': 'clave'},
+        )
+        run = SyncRun.objects.get(source='stock_push')
+        self.assertEqual((run.trigger, run.updated, run.total_rows), ('api', 1, 1))
+        self.assertIsNotNone(run.db_seconds)
+
+        user = get_user_model().objects.create_user(
+            username='staff@test.com', email='staff@test.com', password='testpass123', role='staff',
+        )
+        self.client.force_login(user)
+        response = self.client.get(reverse('core:admin_panel:sync_run_list'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Stock recibido (endpoint)')
+        self.assertEqual(response.context['trend'][0]['runs'], 1)
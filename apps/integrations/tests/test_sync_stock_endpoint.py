@@ -0,0 +1,89 @@
+"""
+Tests del endpoint de stock /api/integraciones/sync-stock/.
+"""
+import gzip
+import json
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.products.models import Product
+
+
+@override_settings(STOCK_SYNC_API_KEY='clave')
+class SyncStockEndpointTest(TestCase):
+    """Acepta JSON y NDJSON (también gzip) y actualiza en bloque."""
+
+    def setUp(self):
+        self.url = reverse('integrations:sync_stock')
+        for i in range(1, 4):
+            Product.objects.create(
+                name=f'Cera {i}', sku=f'TERSA-{i}', external_id=str(i), source='api',
+                regular_price=Decimal('10'), manage_stock=True, stock_quantity=5,
+            )
+
+    def post(self, body, content_type='application/json', **headers):
+        return self.client.post(
+            self.url, data=body, content_type=content_type, secure=True,
+            headers={'X-Sync-Api-Key': 'clave', **headers},
+        )
+
+    def test_json_array(self):
+        body = json.dumps([
+            {'external_id': '1', 'stock': 0}, {'external_id': '2', 'stock': 5},
+            {'external_id': '9', 'stock': 1}, {'stock': 3},
+        ])
+        with self.assertNumQueries(11):
+            data = self.post(body).json()
+        self.assertEqual(
+            [data[k] for k in ('updated', 'unchanged', 'not_found', 'errors', 'total_received')],
+            [1, 1, 1, 1, 4],
+        )
+        self.assertFalse(Product.objects.get(external_id='1').is_available)
+
+    def test_gzip_ndjson(self):
+        lines = '\n'.join(json.dumps({'external_id': str(i), 'stock': 20 + i}) for i in range(1, 4))
+        data = self.post(
+            gzip.compress(lines.encode()), content_type='application/x-ndjson', **{'Content-Encoding': 'gzip'},
+        ).json()
+        self.assertEqual((data['updated'], data['total_received']), (3, 3))
+        self.assertEqual(Product.objects.get(external_id='3').stock_quantity, 23)
+
+    def test_rejects_bad_key_and_bad_body(self):
+        response = self.client.post(
+            self.url, data='[]', content_type='application/json', secure=True,
+            headers={'X-Sync-Api-Key': 'otra'},
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.post('{"a": 1}').status_code, 400)
+        self.assertEqual(self.post('no json').status_code, 400)
+        with override_settings(STOCK_SYNC_MAX_BYTES=10):
+            self.assertEqual(self.post(json.dumps([{'external_id': '1', 'stock': 1}])).status_code, 413)
+
+    @override_settings(STOCK_SYNC_MAX_BYTES=1000)
+    def test_gzip_ndjson_single_line_over_limit(self):
+        line = json.dumps({'external_id': '1', 'stock': 1, 'pad': 'x' * 100_000})
+        response = self.post(
+            gzip.compress(line.encode()), content_type='application/x-ndjson', **{'Content-Encoding': 'gzip'},
+        )
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(Product.objects.get(external_id='1').stock_quantity, 5)
+
+    def test_manifest_and_idempotent_batch(self):
+        from apps.integrations.services import stock_checksum
+
+        manifest = self.client.get(
+            reverse('integrations:stock_manifest'), secure=True, headers={'X-Sync-Api-Key': 'clave'},
+        ).json()
+        self.assertEqual(manifest['stock'], {'1': 5, '2': 5, '3': 5})
+        self.assertEqual(manifest['checksum'], stock_checksum({'3': 5, '2': 5, '1': 5}))
+
+        body = json.dumps([{'external_id': '1', 'stock': 8}])
+        first = self.post(body, **{'X-Sync-Batch-Id': 'lote-1'}).json()
+        self.assertEqual(first['updated'], 1)
+        Product.objects.filter(external_id='1').update(stock_quantity=2)
+        retry = self.post(body, **{'X-Sync-Batch-Id': 'lote-1'}).json()
+        self.assertTrue(retry['duplicate'])
+        self.assertEqual(retry['updated'], 1)
+        self.assertEqual(Product.objects.get(external_id='1').stock_quantity, 2)
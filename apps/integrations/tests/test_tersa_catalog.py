@@ -0,0 +1,105 @@
+"""
+Tests de la descarga cacheada del catálogo de Tersa.
+"""
+import io
+import json
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.integrations.tersa_catalog import get_tersa_catalog, iter_json_array
+
+ITEMS = [
+    {'id': 1, 'nombre_producto': 'Cera "mate"', 'nombre_marca': 'BARBERSHOP', 'existencia': 3},
+    {'id': 2, 'nombre_producto': 'Gel ñ', 'nombre_marca': 'OTRA', 'existencia': 12345},
+]
+BODY = json.dumps(ITEMS, ensure_ascii=False).encode()
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    """Sirve el catálogo con ETag; responde 304 si coincide."""
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class TersaCatalogTest(SimpleTestCase):
+    """Lectura incremental, GET condicional y ventana compartida."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), CatalogHandler)
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/productos-publicos/'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        CatalogHandler.hits = []
+        self.cache_dir = tempfile.mkdtemp()
+        self.override = override_settings(TERSA_CACHE_DIR=self.cache_dir)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_iter_json_array_small_chunks(self):
+        self.assertEqual(list(iter_json_array(io.BytesIO(BODY), chunk_size=7)), ITEMS)
+        self.assertEqual(list(iter_json_array(io.BytesIO(b'{"detail": "x"}'))), [])
+
+    def test_window_and_conditional_get(self):
+        first = get_tersa_catalog(self.url)
+        self.assertEqual(list(first), ITEMS)
+        self.assertFalse(first.not_modified)
+        # Dentro de la ventana no hay petición
+        get_tersa_catalog(self.url)
+        self.assertEqual(CatalogHandler.hits, [None])
+        # Fuera de la ventana: GET condicional -> 304, mismo contenido
+        second = get_tersa_catalog(self.url, max_age=0)
+        self.assertEqual(CatalogHandler.hits, [None, '"v1"'])
+        self.assertTrue(second.not_modified)
+        self.assertEqual(second.sha256, first.sha256)
+
+        self.assertFalse(second.is_processed('stock:x'))
+        second.mark_processed('stock:x')
+        self.assertTrue(get_tersa_catalog(self.url).is_processed('stock:x'))
+
+    def test_unchanged_catalog_short_circuits_stock_sync(self):
+        from apps.integrations import services
+
+        with mock.patch.object(services, 'TERSA_API_URL', self.url), \
+                mock.patch.object(services, 'apply_stock_map', return_value={
+                    'updated': 0, 'unchanged': 0, 'not_found': 1, 'results': [], 'timings': {},
+                }) as apply:
+            result = services.sync_tersa_stock()
+            self.assertEqual(apply.call_args.args[0], {'1': 3})
+            self.assertEqual(result['total_api'], 1)
+            result = services.sync_tersa_stock()
+            self.assertTrue(result['catalog_unchanged'])
+            self.assertEqual(apply.call_count, 1)
+            services.sync_tersa_stock(force=True)
+            self.assertEqual(apply.call_count, 2)
@@ -5,4 +5,5 @@ app_name = 'integrations'
 
 urlpatterns = [
     path('sync-stock/', views.sync_stock_endpoint, name='sync_stock'),
+    path('sync-stock/manifest/', views.stock_manifest_endpoint, name='stock_manifest'),
 ]
@@ -2,18 +2,33 @@
 Endpoints de integración para sincronización externa.
 
 POST /api/integraciones/sync-stock/
-  Recibe un JSON con stock desde sistemas externos (TersaSoft, ERP, etc.)
-  y actualiza stock_quantity de los productos locales por external_id.
+  Recibe stock desde sistemas externos (TersaSoft, ERP, etc.) y actualiza
+  stock_quantity de los productos locales por external_id, en bloque.
+  Cuerpo: array JSON o NDJSON (Content-Type: application/x-ndjson, un objeto por
+  línea), opcionalmente comprimido (Content-Encoding: gzip).
+  Con X-Sync-Batch-Id un lote reintentado no se vuelve a aplicar: se devuelve el
+  resultado guardado con "duplicate": true.
+
+GET /api/integraciones/sync-stock/manifest/
+  Stock actual por external_id y su checksum, para que el emisor envíe solo lo que
+  cambió (protocolo delta de push_stock_barbershop).
 
 Autenticación: Header  X-Sync-Api-Key: <STOCK_SYNC_API_KEY>
 """
+import gzip
 import json
 import logging
+import time
+import zlib
+from datetime import timedelta
 
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.http import JsonResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET, require_POST
 
 logger = logging.getLogger(__name__)
 
@@ -31,13 +46,80 @@ def _check_api_key(request):
     return provided == expected
 
 
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+# Cuánto se recuerdan los X-Sync-Batch-Id ya aplicados
+BATCH_RETENTION = timedelta(days=7)
+
+
+class PayloadTooLarge(Exception):
+    pass
+
+
+def _open_body(request):
+    """Cuerpo como stream (sin cargarlo entero en request.body), descomprimiendo gzip."""
+    if 'gzip' in request.headers.get('Content-Encoding', '').lower():
+        return gzip.GzipFile(fileobj=request, mode='rb')
+    return request
+
+
+def _iter_payload(request):
+    """
+    Recorre los items del cuerpo: NDJSON línea a línea o un array JSON.
+    Lanza ValueError si el formato es inválido y PayloadTooLarge si se supera
+    STOCK_SYNC_MAX_BYTES (ya descomprimido).
+    """
+    max_bytes = getattr(settings, 'STOCK_SYNC_MAX_BYTES', 50 * 1024 * 1024)
+    stream = _open_body(request)
+    content_type = request.content_type or ''
+    try:
+        if content_type in NDJSON_CONTENT_TYPES:
+            size = 0
+            while True:
+                # readline acotado: una línea sin salto no se carga entera en memoria
+                line = stream.readline(max_bytes - size + 1)
+                if not line:
+                    return
+                size += len(line)
+                if size > max_bytes:
+                    raise PayloadTooLarge
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        body = stream.read(max_bytes + 1)
+        if len(body) > max_bytes:
+            raise PayloadTooLarge
+        payload = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError('Invalid JSON')
+    except (OSError, EOFError, zlib.error):
+        raise ValueError('Invalid gzip body')
+    if not isinstance(payload, list):
+        raise ValueError('Expected a JSON array')
+    yield from payload
+
+
+def _parse_stock_item(item):
+    """(external_id, stock) de un item, o None si es inválido."""
+    if not isinstance(item, dict):
+        return None
+    ext_id = str(item.get('external_id', '')).strip()
+    if not ext_id:
+        return None
+    try:
+        return ext_id, max(0, int(item.get('stock', 0)))
+    except (TypeError, ValueError):
+        logger.warning("sync_stock: valor de stock inválido para external_id=%s", ext_id)
+        return None
+
+
 @csrf_exempt
 @require_POST
 def sync_stock_endpoint(request):
     """
-    Recibe un array JSON con items de stock y actualiza los productos locales.
+    Recibe items de stock y actualiza los productos locales en bloque
+    (una consulta external_id__in y un bulk_update por lote, ver apply_stock_map).
 
-    Payload esperado:
+    Payload esperado (array JSON, o los mismos objetos uno por línea en NDJSON):
         [
             {"external_id": "200233", "stock": 15},
             {"external_id": "200691", "stock": 0},
@@ -61,64 +143,98 @@ def sync_stock_endpoint(request):
         )
         return JsonResponse({'ok': False, 'error': 'Unauthorized'}, status=401)
 
-    try:
-        payload = json.loads(request.body)
-    except (json.JSONDecodeError, UnicodeDecodeError):
-        return JsonResponse({'ok': False, 'error': 'Invalid JSON'}, status=400)
+    batch_id = request.headers.get('X-Sync-Batch-Id', '').strip()[:64]
+    if batch_id:
+        from .models import StockSyncBatch
+        if StockSyncBatch.objects.filter(batch_id=batch_id).exists():
+            return _duplicate_batch_response(batch_id)
 
-    if not isinstance(payload, list):
-        return JsonResponse(
-            {'ok': False, 'error': 'Expected a JSON array'},
-            status=400,
-        )
+    from .models import StockSyncBatch, SyncRun
+    from .services import apply_stock_map
 
-    from apps.products.models import Product
-
-    updated = unchanged = not_found = errors = 0
-
-    for item in payload:
-        ext_id = str(item.get('external_id', '')).strip()
-        if not ext_id:
-            errors += 1
-            continue
-
-        try:
-            new_stock = max(0, int(item.get('stock', 0)))
-        except (TypeError, ValueError):
-            errors += 1
-            logger.warning("sync_stock: valor de stock inválido para external_id=%s", ext_id)
-            continue
-
-        product = Product.objects.filter(external_id=ext_id, source='api').first()
-        if not product:
-            not_found += 1
-            continue
-
-        if product.stock_quantity == new_stock:
-            unchanged += 1
-            continue
-
-        try:
-            product.stock_quantity = new_stock
-            product.manage_stock = True
-            product.save(update_fields=['stock_quantity', 'manage_stock', 'updated_at'])
-            updated += 1
-        except Exception as exc:
-            errors += 1
-            logger.error(
-                "sync_stock: error guardando producto external_id=%s: %s", ext_id, exc
-            )
+    run = SyncRun(source='stock_push', trigger='api')
+    run.payload_bytes = int(request.META.get('CONTENT_LENGTH') or 0) or None
+    parse_start = time.perf_counter()
+    stock_map = {}
+    errors = total = 0
+    try:
+        for item in _iter_payload(request):
+            total += 1
+            parsed = _parse_stock_item(item)
+            if parsed is None:
+                errors += 1
+                continue
+            # Si un external_id llega repetido gana el último
+            stock_map[parsed[0]] = parsed[1]
+    except PayloadTooLarge:
+        run.fail('Payload too large')
+        run.finish()
+        return JsonResponse({'ok': False, 'error': 'Payload too large'}, status=413)
+    except ValueError as exc:
+        run.fail(exc)
+        run.finish()
+        return JsonResponse({'ok': False, 'error': str(exc)}, status=400)
+    run.parse_seconds = round(time.perf_counter() - parse_start, 3)
+
+    try:
+        # El lote se registra en la misma transacción: si algo falla el emisor puede reintentarlo
+        with transaction.atomic():
+            batch = None
+            if batch_id:
+                try:
+                    with transaction.atomic():
+                        batch = StockSyncBatch.objects.create(batch_id=batch_id)
+                except IntegrityError:
+                    return _duplicate_batch_response(batch_id)
+            result = apply_stock_map(stock_map)
+            response = {
+                'ok': True,
+                'updated': result['updated'],
+                'unchanged': result['unchanged'],
+                'not_found': result['not_found'],
+                'errors': errors,
+                'total_received': total,
+            }
+            if batch:
+                batch.result = response
+                batch.save(update_fields=['result'])
+                StockSyncBatch.objects.filter(received_at__lt=timezone.now() - BATCH_RETENTION).delete()
+    except Exception as exc:
+        logger.exception("sync_stock: error aplicando stock")
+        run.fail(exc)
+        run.finish()
+        return JsonResponse({'ok': False, 'error': f'Error saving stock: {exc}'}, status=500)
+    run.record({**response, 'timings': result['timings']})
+    run.finish()
 
     logger.info(
-        "sync_stock: updated=%d unchanged=%d not_found=%d errors=%d total=%d",
-        updated, unchanged, not_found, errors, len(payload),
+        "sync_stock: batch=%s updated=%d unchanged=%d not_found=%d errors=%d total=%d",
+        batch_id or '-', result['updated'], result['unchanged'], result['not_found'], errors, total,
     )
 
-    return JsonResponse({
-        'ok': True,
-        'updated': updated,
-        'unchanged': unchanged,
-        'not_found': not_found,
-        'errors': errors,
-        'total_received': len(payload),
-    })
+    return JsonResponse(response)
+
+
+def _duplicate_batch_response(batch_id):
+    from .models import StockSyncBatch
+
+    batch = StockSyncBatch.objects.filter(batch_id=batch_id).first()
+    logger.info("sync_stock: lote %s ya aplicado, se ignora", batch_id)
+    return JsonResponse({**(batch.result if batch else {'ok': True}), 'duplicate': True})
+
+
+@gzip_page
+@require_GET
+def stock_manifest_endpoint(request):
+    """
+    Manifiesto del stock actual para el push delta.
+
+    Respuesta (200, gzip si el cliente lo acepta):
+        {"ok": true, "count": 2, "checksum": "<sha1>", "stock": {"200233": 15, "200691": 0}}
+    """
+    if not _check_api_key(request):
+        return JsonResponse({'ok': False, 'error': 'Unauthorized'}, status=401)
+
+    from .services import stock_manifest
+
+    return JsonResponse({'ok': True, **stock_manifest()})
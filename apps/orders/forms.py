@@ -37,6 +37,7 @@ class CheckoutForm(forms.Form):
     billing_country = forms.CharField(max_length=100)
     billing_postal_code = forms.CharField(required=False, max_length=20)
     coupon_code = forms.CharField(required=False, max_length=40)
+    idempotency_key = forms.CharField(required=False, max_length=64, widget=forms.HiddenInput)
     accept_terms = forms.BooleanField(required=True)
     accept_privacy = forms.BooleanField(required=True)
 
@@ -73,6 +73,8 @@ class Order(models.Model):
     total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
     # Coupon
     coupon_code = models.CharField(max_length=50, blank=True)
+    # Clave del formulario de checkout: evita pedidos duplicados por doble envío
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
     # ERP sync
     erp_order_id = models.CharField(max_length=100, blank=True, db_index=True)
     # Timestamps
@@ -141,6 +143,13 @@ class Order(models.Model):
     def __str__(self):
         return f"Orden {self.order_number}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
     def save(self, *args, **kwargs):
         from django.utils import timezone
         if not self.order_number:
@@ -148,7 +157,16 @@ class Order(models.Model):
             self.order_number = f"ORD-{timezone.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}"
         if self.status == 'completed' and not self.completed_at:
             self.completed_at = timezone.now()
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if not adding and not hasattr(self, '_loaded_status'):
+            return
+        old_status = None if adding else self._loaded_status
+        if old_status != self.status:
+            # Ranking de más vendidos: sumar/restar al entrar/salir de estados de venta
+            from apps.products.sales import order_status_changed
+            order_status_changed(self, old_status)
+            self._loaded_status = self.status
 
 
 class OrderItem(models.Model):
@@ -0,0 +1,124 @@
+"""
+Creación de pedidos desde el checkout.
+
+OrderPlacementService valida el carrito, calcula los totales (envío y cupón) y crea
+el pedido con todas sus líneas (bulk_create) en una sola transacción. La clave de
+idempotencia del formulario evita pedidos duplicados por doble envío: si ya existe
+un pedido con esa clave se devuelve ese pedido.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+
+from .models import Order, OrderItem
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+
+class OrderPlacementError(Exception):
+    """Error de validación del checkout; el mensaje se muestra al cliente."""
+
+
+class OrderPlacementService:
+
+    def __init__(self, cart, idempotency_key=''):
+        self.cart = cart
+        self.idempotency_key = (idempotency_key or '').strip()[:IDEMPOTENCY_KEY_MAX_LENGTH]
+        self.coupon_invalid = False
+
+    def existing_order(self):
+        """Pedido ya creado con esta clave (doble envío), o None."""
+        if not self.idempotency_key:
+            return None
+        return Order.objects.filter(idempotency_key=self.idempotency_key).first()
+
+    def validate_cart(self):
+        items = list(self.cart)
+        if not items:
+            raise OrderPlacementError('Tu carrito está vacío.')
+        for item in items:
+            if not item['product'].is_active:
+                raise OrderPlacementError(
+                    f'"{item["product"].name}" ya no está disponible. Quítalo del carrito para continuar.'
+                )
+        return items
+
+    def shipping_total(self, subtotal, city_name, state_name, country_name):
+        """Costo de envío de la ciudad (0 si aplica envío gratis)."""
+        from apps.core.models import ShippingPrice, SiteSettings
+
+        free_shipping_min_amount = SiteSettings.get().free_shipping_min_amount or Decimal('0.00')
+        if free_shipping_min_amount > 0 and subtotal >= free_shipping_min_amount:
+            return Decimal('0.00')
+        if not city_name or not country_name:
+            raise OrderPlacementError('Debes seleccionar una ciudad válida para calcular el envío.')
+        price = (
+            ShippingPrice.objects.filter(
+                is_active=True,
+                city__name__iexact=city_name,
+                city__state__name__iexact=state_name,
+                city__state__country__name__iexact=country_name,
+            )
+            .values_list('price', flat=True)
+            .first()
+        )
+        if price is None:
+            raise OrderPlacementError(
+                'No hay costo de envío configurado para la ciudad seleccionada. '
+                'Por favor elige otra ciudad o configura el envío en el panel.'
+            )
+        return price
+
+    def totals(self, shipping_total, coupon_code=''):
+        """subtotal, discount_total, shipping_total, total y coupon_code del pedido."""
+        from apps.coupons.models import Coupon
+
+        subtotal = self.cart.get_total_price()
+        totals = {
+            'subtotal': subtotal,
+            'discount_total': Decimal('0.00'),
+            'shipping_total': shipping_total,
+            'total': subtotal + shipping_total,
+            'coupon_code': '',
+        }
+        coupon_code = (coupon_code or '').strip()
+        if coupon_code:
+            coupon = Coupon.objects.filter(code__iexact=coupon_code, is_active=True).first()
+            if coupon is None:
+                self.coupon_invalid = True
+            else:
+                discount = coupon.get_discount(subtotal)
+                totals.update(
+                    discount_total=discount,
+                    total=subtotal - discount + shipping_total,
+                    coupon_code=coupon.code,
+                )
+        return totals
+
+    def place(self, items, **order_fields):
+        """
+        Crea el pedido y sus líneas. Devuelve (order, created); created es False si
+        otro envío con la misma clave ya lo había creado.
+        """
+        order = Order(idempotency_key=self.idempotency_key or None, **order_fields)
+        try:
+            with transaction.atomic():
+                order.save()
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        product=item['product'],
+                        variant=item.get('variant'),
+                        product_name=item['product'].name,
+                        quantity=item['quantity'],
+                        price=item['price'],
+                        total=item['total_price'],
+                    )
+                    for item in items
+                ])
+        except IntegrityError:
+            existing = self.existing_order()
+            if existing is None:
+                raise
+            return existing, False
+        return order, True
@@ -0,0 +1,75 @@
+"""
+Tests de la creación de pedidos desde el checkout (transacción, bulk_create e idempotencia).
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.core.models import City, Country, ShippingPrice, State
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product
+
+
+@mock.patch('apps.orders.views.notify_order_created')
+@mock.patch('apps.core.meta_conversions.send_initiate_checkout')
+class OrderPlacementTest(TestCase):
+    """Un pedido por clave de idempotencia, con todas sus líneas o ninguna."""
+
+    def setUp(self):
+        country = Country.objects.create(name='Colombia', iso2='CO')
+        city = City.objects.create(state=State.objects.create(country=country, name='Antioquia'), name='Medellín')
+        ShippingPrice.objects.create(city=city, price=Decimal('8000'))
+        self.products = [
+            Product.objects.create(name=f'Cera {i}', sku=f'CERA-{i}', regular_price=Decimal('10000'))
+            for i in range(3)
+        ]
+        for product in self.products:
+            self.client.post(reverse('cart:add', args=[product.id]), {'quantity': 2}, secure=True)
+        self.data = {
+            'billing_customer_type': 'person',
+            'billing_document_type': 'CC',
+            'billing_document_number': '1020304050',
+            'billing_first_name': 'Ana',
+            'billing_last_name': 'Pérez',
+            'billing_email': 'ana@test.com',
+            'billing_phone': '3001234567',
+            'billing_address': 'Calle 1 # 2-3',
+            'billing_city': 'Medellín',
+            'billing_state': 'Antioquia',
+            'billing_country': 'Colombia',
+            'accept_terms': 'on',
+            'accept_privacy': 'on',
+            'idempotency_key': 'b7c1d2e3f4a5',
+        }
+
+    def checkout(self):
+        return self.client.post(reverse('orders:checkout'), self.data, secure=True)
+
+    def test_double_submit_returns_same_order(self, *mocks):
+        first = self.checkout()
+        order = Order.objects.get()
+        self.assertRedirects(
+            first, reverse('payments:payment_page', args=[order.order_number]), fetch_redirect_response=False,
+        )
+        self.assertEqual(order.items.count(), 3)
+        self.assertEqual((order.subtotal, order.shipping_total, order.total),
+                         (Decimal('60000'), Decimal('8000'), Decimal('68000')))
+
+        second = self.checkout()
+        self.assertEqual(second['Location'], first['Location'])
+        self.assertEqual((Order.objects.count(), OrderItem.objects.count()), (1, 3))
+
+    def test_failed_items_roll_back_order(self, *mocks):
+        with mock.patch.object(OrderItem.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.checkout()
+        self.assertFalse(Order.objects.exists())
+
+    def test_missing_shipping_keeps_cart(self, *mocks):
+        ShippingPrice.objects.update(is_active=False)
+        response = self.checkout()
+        self.assertRedirects(response, reverse('orders:checkout'), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(len(self.client.session['cart']), 3)
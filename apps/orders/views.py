@@ -1,4 +1,3 @@
-from decimal import Decimal
 import logging
 import uuid
 
@@ -12,7 +11,7 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 
 from .models import Order, OrderItem
-from apps.cart.cart import Cart
+from apps.cart.cart import get_cart
 from apps.coupons.models import Coupon
 from apps.accounts.forms import (
     AddressBookForm,
@@ -20,6 +19,7 @@ from apps.accounts.forms import (
     CustomerProfileForm,
 )
 from .forms import CheckoutForm
+from .services import OrderPlacementError, OrderPlacementService
 from apps.accounts.models import UserAddress
 from apps.products.models import ProductFavorite
 from apps.core.emails import notify_order_created, notify_new_customer
@@ -50,7 +50,16 @@ def checkout_view(request):
     import json
     from apps.accounts.models import UserAddress
 
-    cart = Cart(request)
+    cart = get_cart(request)
+    placement = OrderPlacementService(
+        cart,
+        idempotency_key=request.POST.get('idempotency_key', '') if request.method == 'POST' else '',
+    )
+    if request.method == 'POST':
+        # Doble envío del formulario: el pedido ya existe (y el carrito ya se vació)
+        existing_order = placement.existing_order()
+        if existing_order and _can_access_order(request, existing_order):
+            return redirect('payments:payment_page', order_number=existing_order.order_number)
     if not cart:
         messages.warning(request, 'Tu carrito está vacío.')
         return redirect('products:list')
@@ -59,6 +68,7 @@ def checkout_view(request):
         if request.method == 'POST'
         else ''
     ) or str(uuid.uuid4())
+    idempotency_key = placement.idempotency_key or uuid.uuid4().hex
 
     def build_checkout_prefill(user):
         prefill = {
@@ -107,46 +117,23 @@ def checkout_view(request):
                 'initial_city': checkout_prefill.get('city', ''),
                 'checkout_prefill': checkout_prefill,
                 'checkout_event_id': checkout_event_id,
+                'idempotency_key': idempotency_key,
             })
         cleaned = checkout_form.cleaned_data
         billing_type = cleaned.get('billing_customer_type', 'person')
         billing_dob = cleaned.get('billing_date_of_birth')
         billing_last = cleaned.get('billing_last_name', '') if billing_type == 'person' else ''
         billing_doctype = cleaned.get('billing_document_type', '')
-        subtotal = cart.get_total_price()
-        shipping_total = Decimal('0.00')
-        from apps.core.models import City, ShippingPrice, SiteSettings
-        free_shipping_min_amount = SiteSettings.get().free_shipping_min_amount or Decimal('0.00')
-        is_free_shipping = free_shipping_min_amount > 0 and subtotal >= free_shipping_min_amount
         billing_city_name = cleaned.get('billing_city', '').strip()
         billing_state_name = cleaned.get('billing_state', '').strip()
         billing_country_name = cleaned.get('billing_country', '').strip()
-        shipping_city_found = False
-        shipping_configured = False
-        if not is_free_shipping and billing_city_name and billing_country_name:
-            city = City.objects.filter(
-                name__iexact=billing_city_name,
-                state__name__iexact=billing_state_name,
-                state__country__name__iexact=billing_country_name,
-            ).first()
-            if city:
-                shipping_city_found = True
-                try:
-                    sp = ShippingPrice.objects.get(city=city, is_active=True)
-                    shipping_total = sp.price
-                    shipping_configured = True
-                except ShippingPrice.DoesNotExist:
-                    pass
-        elif not is_free_shipping:
-            messages.error(request, 'Debes seleccionar una ciudad válida para calcular el envío.')
-            return redirect('orders:checkout')
-
-        if not is_free_shipping and (not shipping_city_found or not shipping_configured):
-            messages.error(
-                request,
-                'No hay costo de envío configurado para la ciudad seleccionada. '
-                'Por favor elige otra ciudad o configura el envío en el panel.',
+        try:
+            order_items = placement.validate_cart()
+            shipping_total = placement.shipping_total(
+                cart.get_total_price(), billing_city_name, billing_state_name, billing_country_name,
             )
+        except OrderPlacementError as e:
+            messages.error(request, str(e))
             return redirect('orders:checkout')
 
         # Usuario para asociar al pedido (guest, autenticado o login en este flujo).
@@ -204,7 +191,11 @@ def checkout_view(request):
                     'Detectamos una cuenta existente y ya iniciaste sesión.',
                 )
 
-        order = Order(
+        totals = placement.totals(shipping_total, cleaned.get('coupon_code', ''))
+        if placement.coupon_invalid:
+            messages.error(request, 'Cupón inválido.')
+        order, created = placement.place(
+            order_items,
             user=account_user,
             billing_customer_type=billing_type,
             billing_document_type=billing_doctype,
@@ -219,26 +210,15 @@ def checkout_view(request):
             billing_state=billing_state_name,
             billing_country=billing_country_name,
             billing_postal_code=cleaned.get('billing_postal_code', ''),
-            subtotal=subtotal,
-            shipping_total=shipping_total,
-            total=subtotal + shipping_total,
+            **totals,
             meta_client_ip=(request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip() or request.META.get('REMOTE_ADDR', '') or '')[:45],
             meta_client_user_agent=(request.META.get('HTTP_USER_AGENT') or '')[:256],
             meta_fbp=(request.COOKIES.get('_fbp') or '')[:255],
             meta_fbc=(request.COOKIES.get('_fbc') or '')[:255],
             meta_referrer_url=(request.META.get('HTTP_REFERER') or '')[:512],
         )
-        coupon_code = cleaned.get('coupon_code', '').strip()
-        if coupon_code:
-            try:
-                coupon = Coupon.objects.get(code__iexact=coupon_code, is_active=True)
-                discount = coupon.get_discount(subtotal)
-                order.discount_total = discount
-                order.total = subtotal - discount + shipping_total
-                order.coupon_code = coupon.code
-            except Coupon.DoesNotExist:
-                messages.error(request, 'Cupón inválido.')
-        order.save()
+        if not created:
+            return redirect('payments:payment_page', order_number=order.order_number)
         if order.user_id is None:
             _remember_guest_order(request, order.order_number)
 
@@ -276,18 +256,6 @@ def checkout_view(request):
         except Exception as e:
             logger.warning('Meta CAPI InitiateCheckout no enviado en checkout POST: %s', e)
 
-        # Crear líneas
-        for item in cart:
-            OrderItem.objects.create(
-                order=order,
-                product=item['product'],
-                variant=item.get('variant'),
-                product_name=item['product'].name,
-                quantity=item['quantity'],
-                price=item['price'],
-                total=item['total_price'],
-            )
-
         import threading
 
         def _send_email():
@@ -356,6 +324,7 @@ def checkout_view(request):
         'initial_city': checkout_prefill.get('city', ''),
         'checkout_prefill': checkout_prefill,
         'checkout_event_id': checkout_event_id,
+        'idempotency_key': idempotency_key,
     })
 
 
@@ -471,7 +440,7 @@ def validate_coupon(request):
     if not code:
         return JsonResponse({'valid': False, 'error': 'Ingresa un código.'})
 
-    cart = Cart(request)
+    cart = get_cart(request)
     subtotal = cart.get_total_price()
     if not subtotal:
         return JsonResponse({'valid': False, 'error': 'El carrito está vacío.'})
@@ -212,8 +212,10 @@ def _fulfill_order(order: Order, tx_data: dict):
 
     # 2. Descontar inventario
     low_stock_alerts = []
+    touched_product_ids = set()
     for item in order.items.select_related('product', 'variant').all():
         qty = item.quantity
+        touched_product_ids.add(item.product_id)
 
         if item.variant:
             from apps.products.models import ProductVariant
@@ -249,6 +251,11 @@ def _fulfill_order(order: Order, tx_data: dict):
                         f"Producto {current_product.name} con stock {current_product.stock_quantity}"
                     )
 
+    # Disponibilidad/precio desnormalizados tras los update() con F()
+    if touched_product_ids:
+        from apps.products.models import Product
+        Product.refresh_denormalized_for(touched_product_ids)
+
     # 3. Incrementar uso de cupón
     if order.coupon_code:
         from apps.coupons.models import Coupon
@@ -256,6 +263,10 @@ def _fulfill_order(order: Order, tx_data: dict):
             usage_count=models.F('usage_count') + 1
         )
 
+    # 4. Encolar para el ERP (lo envía process_erp_outbox)
+    from apps.integrations.erp_outbox import enqueue_order
+    enqueue_order(order)
+
     logger.info(
         "Orden %s procesada: pago aprobado (Wompi %s).",
         order.order_number,
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     Category, Product, ProductImage, ProductAttribute,
-    ProductVariant, ProductReview, ProductView, ProductFavorite
+    ProductVariant, ProductReview, ProductView, ProductFavorite, ProductSalesStats
 )
 
 
@@ -46,7 +46,9 @@ class ProductAdmin(admin.ModelAdmin):
     @admin.action(description='Sincronizar desde API')
     def sync_from_api(self, request, queryset):
         from apps.integrations.services import sync_products_from_api
-        sync_products_from_api()
+        from apps.integrations.sync_runs import track_sync_run
+        with track_sync_run('products_api', 'admin') as run:
+            run.record(sync_products_from_api())
         self.message_user(request, 'Sincronización iniciada.')
 
 
@@ -71,3 +73,14 @@ class ProductFavoriteAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['product__name', 'user__email']
     readonly_fields = ['product', 'user', 'created_at']
+
+
+@admin.register(ProductSalesStats)
+class ProductSalesStatsAdmin(admin.ModelAdmin):
+    list_display = ['product', 'units_sold', 'revenue', 'units_30d', 'last_sold_at']
+    search_fields = ['product__name', 'product__sku']
+    ordering = ['-units_sold']
+    readonly_fields = [
+        'product', 'units_sold', 'revenue', 'last_sold_at',
+        'units_7d', 'units_30d', 'units_90d', 'updated_at',
+    ]
@@ -5,3 +5,12 @@ class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.products'
     verbose_name = 'Productos'
+
+    def ready(self):
+        from django.db.models.signals import m2m_changed
+        from .catalog import categories_changed
+        from .models import Product
+        m2m_changed.connect(
+            categories_changed, sender=Product.categories.through,
+            dispatch_uid='products_catalog_categories_changed',
+        )
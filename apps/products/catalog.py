@@ -0,0 +1,124 @@
+"""
+Versión del catálogo y facetas cacheadas de la tienda.
+
+La versión se guarda en caché y se incrementa cuando cambia algo que afecta a los
+listados (producto activo/disponible, precio efectivo, marca, categorías o las propias
+categorías/marcas). Las claves derivadas incluyen la versión, así que no hace falta
+borrar nada: al subir la versión las entradas viejas simplemente dejan de usarse.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Min, Q
+
+CATALOG_VERSION_KEY = 'catalog:version'
+# TTL de las facetas como red de seguridad ante cambios por queryset.update()
+FACETS_TIMEOUT = 60 * 60
+
+
+def get_catalog_version():
+    """Versión actual del catálogo (se inicializa con un timestamp si no existe)."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATALOG_VERSION_KEY) or 0
+    return version
+
+
+def bump_catalog_version():
+    """Invalida todo lo cacheado por versión del catálogo."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+    bump_pricing_version()
+
+
+# Versión de precios: sube con la del catálogo y además con cambios que no afectan a
+# los listados (variantes, precio mayorista, ofertas que empiezan o terminan). Los
+# carritos guardan la versión con la que se calcularon sus precios, así que debe ser la
+# misma en todos los procesos: se guarda en la base de datos (PricingVersion), no en la
+# caché, que puede ser local a cada worker o perder la clave.
+
+def get_pricing_version():
+    """Versión actual de precios (una consulta)."""
+    from .models import PricingVersion
+
+    version = PricingVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_pricing_version():
+    """Marca como desactualizados los precios guardados en los carritos."""
+    from .models import PricingVersion
+
+    versions = PricingVersion.objects.filter(pk=1)
+    if not versions.update(version=F('version') + 1):
+        _, created = PricingVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+        if not created:
+            versions.update(version=F('version') + 1)
+
+
+def _compute_facets(show_out_of_stock):
+    from .models import Brand, Category, Product
+
+    base_filter = Q(is_active=True)
+    if not show_out_of_stock:
+        base_filter &= Product.q_in_stock()
+
+    # Total visible y rango de precios (de todo el catálogo activo) en una consulta
+    agg = Product.objects.filter(is_active=True).aggregate(
+        total=Count('id', filter=None if show_out_of_stock else Product.q_in_stock()),
+        min_p=Min('effective_price'),
+        max_p=Max('effective_price'),
+    )
+    through = Product.categories.through
+    category_counts = dict(
+        through.objects.filter(
+            product__in=Product.objects.filter(base_filter).values('pk'),
+            category__is_active=True,
+        ).values_list('category_id').annotate(n=Count('product_id', distinct=True))
+    )
+    brand_counts = dict(
+        Product.objects.filter(base_filter, brand__is_active=True)
+        .values_list('brand_id').annotate(n=Count('id')).order_by()
+    )
+    categories = list(Category.objects.filter(pk__in=category_counts.keys()))
+    for category in categories:
+        category.product_count = category_counts[category.pk]
+    brands = list(Brand.objects.filter(pk__in=brand_counts.keys()))
+    for brand in brands:
+        brand.product_count = brand_counts[brand.pk]
+    return {
+        'total': agg['total'] or 0,
+        'categories': categories,
+        'brands': brands,
+        'price_min': agg['min_p'],
+        'price_max': agg['max_p'],
+    }
+
+
+def get_catalog_facets(show_out_of_stock=False):
+    """
+    Conteos por categoría y marca, total de productos visibles y rango de precios.
+    Devuelve {'total', 'categories', 'brands', 'price_min', 'price_max'}; categories/brands
+    son instancias con `product_count` (solo las que tienen productos).
+    """
+    key = f'catalog:facets:{get_catalog_version()}:{int(bool(show_out_of_stock))}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = _compute_facets(show_out_of_stock)
+        cache.set(key, facets, FACETS_TIMEOUT)
+    return facets
+
+
+def categories_changed(sender, instance, action, **kwargs):
+    """Receptor de m2m_changed para Product.categories."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        from .detail_snapshot import invalidate_product_detail
+        bump_catalog_version()
+        if kwargs.get('reverse'):
+            for product_id in kwargs.get('pk_set') or ():
+                invalidate_product_detail(product_id)
+        else:
+            invalidate_product_detail(instance.pk)
@@ -0,0 +1,219 @@
+"""
+Snapshot cacheado de la ficha de producto.
+
+Reúne una sola vez todo lo que no depende del usuario (imágenes, reseñas aprobadas,
+valoración, categorías, JSON-LD de producto y breadcrumb) y lo guarda en caché. La
+clave incluye updated_at, precio/disponibilidad/valoración guardados y una versión
+por producto que suben los cambios de variantes, imágenes, reseñas y categorías
+(invalidate_product_detail). Lo propio de cada visita (favorito, event_id de Meta)
+lo sigue calculando la vista.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+VERSION_KEY = 'product_detail:version:{}'
+SNAPSHOT_KEY = 'product_detail:{}:{}:{}'
+# TTL como red de seguridad (cambios por queryset.update/delete, ajustes del sitio)
+SNAPSHOT_TIMEOUT = 60 * 60
+
+
+def invalidate_product_detail(product_id):
+    """Descarta el snapshot del producto (sube su versión)."""
+    key = VERSION_KEY.format(product_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _product_version(product_id):
+    return cache.get(VERSION_KEY.format(product_id)) or 0
+
+
+class ProductDetailSnapshot:
+    """Datos de la ficha de producto independientes del usuario."""
+
+    def __init__(self, images, main_image, categories, primary_category, approved_reviews,
+                 rating_stats, product_schema_json, breadcrumb_schema_json):
+        self.images = images
+        self.main_image = main_image
+        self.categories = categories
+        self.primary_category = primary_category
+        self.approved_reviews = approved_reviews
+        self.rating_stats = rating_stats
+        self.product_schema_json = product_schema_json
+        self.breadcrumb_schema_json = breadcrumb_schema_json
+
+    @classmethod
+    def cache_key(cls, product, site, share_url):
+        """Clave derivada del estado del producto, su versión y la URL/ajustes del sitio."""
+        state = '|'.join(str(v) for v in (
+            product.updated_at.timestamp() if product.updated_at else '',
+            product.effective_price, product.is_available, product.pricing_expires_at,
+            product.rating_avg, product.rating_count,
+            site.updated_at.timestamp() if site.updated_at else '',
+            share_url,
+        ))
+        digest = hashlib.md5(state.encode()).hexdigest()
+        return SNAPSHOT_KEY.format(product.pk, _product_version(product.pk), digest)
+
+    @classmethod
+    def get(cls, product, site, base_url, share_url):
+        """Snapshot desde caché o recién construido."""
+        key = cls.cache_key(product, site, share_url)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = cls.build(product, site, base_url, share_url)
+            timeout = SNAPSHOT_TIMEOUT
+            if product.pricing_expires_at:
+                # La oferta cambia el precio del JSON-LD: no cachear más allá
+                remaining = (product.pricing_expires_at - timezone.now()).total_seconds()
+                timeout = max(1, min(timeout, int(remaining)))
+            cache.set(key, snapshot, timeout)
+        return snapshot
+
+    @classmethod
+    def build(cls, product, site, base_url, share_url):
+        images = list(product.images.all())
+        main_image = next((img for img in images if img.is_primary), images[0] if images else None)
+        categories = list(product.categories.all())
+        primary_category = next((c for c in categories if c.is_active), None)
+        approved_reviews = list(product.reviews.filter(is_approved=True).order_by('-created_at'))
+        rating_stats = product.get_rating_stats()
+        return cls(
+            images=images,
+            main_image=main_image,
+            categories=categories,
+            primary_category=primary_category,
+            approved_reviews=approved_reviews,
+            rating_stats=rating_stats,
+            product_schema_json=_build_product_schema_json(
+                product, site, base_url, share_url, images, main_image, approved_reviews, rating_stats
+            ),
+            breadcrumb_schema_json=_build_breadcrumb_schema_json(
+                product, base_url, share_url, primary_category
+            ),
+        )
+
+    @property
+    def rating_stars(self):
+        """0-5 para pintar estrellas."""
+        return round(self.rating_stats['average'])
+
+
+def _build_product_schema_json(product, site, base, share_url, images, main_image,
+                               approved_reviews, rating_stats):
+    """Schema.org Product + AggregateRating + Review para SEO (JSON-LD)."""
+    image_urls = [f"{base}{img.image.url}" for img in images[:5]]
+    if not image_urls and main_image:
+        image_urls = [f"{base}{main_image.image.url}"]
+    if not image_urls:
+        if site.logo:
+            image_urls = [f"{base}{site.logo.url}"]
+        else:
+            static_path = (settings.STATIC_URL or 'static/') + 'logo-768x317.png'
+            image_urls = [f"{base.rstrip('/')}/{static_path.lstrip('/')}"]
+    description = product.short_description or product.name
+    if product.description:
+        description = Truncator(strip_tags(product.description)).words(50)
+    raw_currency = (site.currency or "COP").strip() or "COP"
+    currency = raw_currency if len(raw_currency) == 3 and raw_currency.isalpha() else "COP"
+    offer = {
+        "@type": "Offer",
+        "price": str(product.price),
+        "priceCurrency": currency,
+        "availability": "https://schema.org/InStock" if product.in_stock else "https://schema.org/OutOfStock",
+    }
+    if product.sale_price_end:
+        offer["priceValidUntil"] = product.sale_price_end.strftime("%Y-%m-%d")
+    else:
+        offer["priceValidUntil"] = (
+            timezone.now() + timedelta(days=30)
+        ).strftime("%Y-%m-%d")
+    schema = {
+        "@context": "https://schema.org",
+        "@type": "Product",
+        "name": product.name,
+        "description": description,
+        "url": share_url,
+        "image": image_urls,
+        "offers": offer,
+    }
+    if product.sku:
+        schema["sku"] = product.sku
+    if rating_stats["count"] > 0:
+        schema["aggregateRating"] = {
+            "@type": "AggregateRating",
+            "ratingValue": str(rating_stats["average"]),
+            "bestRating": "5",
+            "worstRating": "1",
+            "ratingCount": str(rating_stats["count"]),
+        }
+        schema["review"] = [
+            {
+                "@type": "Review",
+                "author": {"@type": "Person", "name": r.author_name},
+                "datePublished": r.created_at.strftime("%Y-%m-%d"),
+                "reviewRating": {
+                    "@type": "Rating",
+                    "ratingValue": str(r.rating),
+                    "bestRating": "5",
+                    "worstRating": "1",
+                },
+                "reviewBody": r.comment[:500],
+            }
+            for r in approved_reviews[:10]
+        ]
+    return json.dumps(schema, ensure_ascii=False)
+
+
+def _build_breadcrumb_schema_json(product, base, share_url, category):
+    shop_url = f"{base}{reverse('products:list')}"
+    item_list = [
+        {
+            "@type": "ListItem",
+            "position": 1,
+            "name": "Inicio",
+            "item": f"{base}{reverse('core:home')}",
+        },
+        {
+            "@type": "ListItem",
+            "position": 2,
+            "name": "Tienda",
+            "item": shop_url,
+        },
+    ]
+    position = 3
+    if category:
+        item_list.append(
+            {
+                "@type": "ListItem",
+                "position": position,
+                "name": category.name,
+                "item": f"{shop_url}?{urlencode({'category': category.slug})}",
+            }
+        )
+        position += 1
+    item_list.append(
+        {
+            "@type": "ListItem",
+            "position": position,
+            "name": product.name,
+            "item": share_url,
+        }
+    )
+    schema = {
+        "@context": "https://schema.org",
+        "@type": "BreadcrumbList",
+        "itemListElement": item_list,
+    }
+    return json.dumps(schema, ensure_ascii=False)
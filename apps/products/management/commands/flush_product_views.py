@@ -0,0 +1,36 @@
+"""
+Vuelca en la base de datos las vistas de producto encoladas en caché.
+
+Necesario por cron (cada minuto) si PRODUCT_VIEWS_FLUSH_INTERVAL=0 o si se quiere
+volcar desde un proceso aparte con caché compartida (Redis/Memcached).
+
+Uso:
+  python manage.py flush_product_views
+"""
+from django.core.management.base import BaseCommand
+
+from apps.products.view_tracking import flush_views, pending_views
+
+
+class Command(BaseCommand):
+    help = 'Guarda en lote las vistas de producto pendientes (ProductView y view_count).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-items',
+            type=int,
+            default=5000,
+            help='Máximo de vistas encoladas a procesar por lote (por defecto 5000).',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        pending = pending_views()
+        while pending:
+            total += flush_views(max_items=options['max_items'])
+            remaining = pending_views()
+            if remaining >= pending:
+                # Sin avance: otro proceso está volcando o quedan vistas en curso
+                break
+            pending = remaining
+        self.stdout.write(self.style.SUCCESS(f'Vistas guardadas: {total}'))
@@ -0,0 +1,22 @@
+"""
+Regenera el texto de búsqueda de todos los productos y el índice del backend.
+
+Uso:
+  python manage.py rebuild_product_search
+"""
+from django.core.management.base import BaseCommand
+
+from apps.products.models import Product
+from apps.products.search import get_search_backend, reindex_search_documents
+
+
+class Command(BaseCommand):
+    help = 'Regenera search_document y el índice de búsqueda de productos.'
+
+    def handle(self, *args, **options):
+        total = reindex_search_documents(Product.objects.all(), changed_only=True, update_index=False)
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Textos actualizados: {total}. Índice reconstruido ({backend.__class__.__name__}).'
+        ))
@@ -0,0 +1,19 @@
+"""
+Reconstruye ProductSalesStats (ranking de más vendidos) desde los pedidos.
+
+Las ventanas de 7/30/90 días solo se recortan al reconstruir: programar a diario.
+
+Uso:
+  python manage.py rebuild_sales_stats
+"""
+from django.core.management.base import BaseCommand
+
+from apps.products.sales import rebuild_sales_stats
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las estadísticas de ventas por producto (más vendidos).'
+
+    def handle(self, *args, **options):
+        total = rebuild_sales_stats()
+        self.stdout.write(self.style.SUCCESS(f'Estadísticas de ventas recalculadas: {total} producto(s).'))
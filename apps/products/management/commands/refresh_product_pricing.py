@@ -0,0 +1,40 @@
+"""
+Recalcula las columnas desnormalizadas de precio y disponibilidad de Product.
+
+Por defecto solo procesa productos cuya oferta empezó o terminó desde el último
+cálculo (pricing_expires_at vencido). Pensado para cron cada pocos minutos.
+
+Uso:
+  python manage.py refresh_product_pricing
+  python manage.py refresh_product_pricing --all
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Recalcula precio efectivo y disponibilidad guardados en los productos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalcular todos los productos (no solo los de ofertas vencidas/iniciadas).',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            product_ids = None
+        else:
+            product_ids = list(
+                Product.objects.filter(
+                    pricing_expires_at__lte=timezone.now()
+                ).values_list('pk', flat=True)
+            )
+            if not product_ids:
+                self.stdout.write('No hay productos con precios por recalcular.')
+                return
+        changed = Product.refresh_denormalized_for(product_ids)
+        self.stdout.write(self.style.SUCCESS(f'Productos actualizados: {changed}'))
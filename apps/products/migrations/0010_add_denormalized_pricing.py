@@ -0,0 +1,115 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:14
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+DENORMALIZED_FIELDS = [
+    'effective_price', 'min_variant_price', 'max_variant_price',
+    'effective_wholesale_price', 'is_available', 'pricing_expires_at',
+]
+
+
+def _price_at(obj, now):
+    if obj.sale_price and obj.sale_price < obj.regular_price:
+        if obj.sale_price_start and now < obj.sale_price_start:
+            return obj.regular_price
+        if obj.sale_price_end and now > obj.sale_price_end:
+            return obj.regular_price
+        return obj.sale_price
+    return obj.regular_price
+
+
+def backfill_denormalized_pricing(apps, schema_editor):
+    """Rellena precio efectivo y disponibilidad de los productos existentes."""
+    Product = apps.get_model('products', 'Product')
+    now = timezone.now()
+    batch = []
+    for product in Product.objects.prefetch_related('variants').iterator(chunk_size=500):
+        variants = list(product.variants.all()) if product.product_type == 'variable' else []
+        product.min_variant_price = None
+        product.max_variant_price = None
+        if variants:
+            active = [v for v in variants if v.is_active]
+            prices = [p for p in (_price_at(v, now) for v in active) if p]
+            product.effective_price = min(prices) if prices else product.regular_price
+            if prices:
+                product.min_variant_price = min(prices)
+                product.max_variant_price = max(prices)
+            wholesale = [
+                v.wholesale_price if v.wholesale_price is not None else _price_at(v, now)
+                for v in active
+            ]
+            product.effective_wholesale_price = (
+                min(wholesale) if wholesale else (product.wholesale_price or product.regular_price)
+            )
+            product.is_available = any(v.stock_quantity > 0 for v in active)
+            sources = active
+        else:
+            product.effective_price = _price_at(product, now)
+            product.effective_wholesale_price = (
+                product.wholesale_price if product.wholesale_price is not None else product.effective_price
+            )
+            product.is_available = not product.manage_stock or product.stock_quantity > 0
+            sources = [product]
+        boundaries = [
+            dt for src in sources if src.sale_price
+            for dt in (src.sale_price_start, src.sale_price_end)
+            if dt and dt > now
+        ]
+        product.pricing_expires_at = min(boundaries) if boundaries else None
+        batch.append(product)
+        if len(batch) >= 500:
+            Product.objects.bulk_update(batch, DENORMALIZED_FIELDS)
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, DENORMALIZED_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_add_product_stock_alert'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True, verbose_name='Precio efectivo'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='effective_wholesale_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True, verbose_name='Precio mayorista efectivo'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='is_available',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Disponible'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='max_variant_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True, verbose_name='Precio máximo variantes'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='min_variant_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True, verbose_name='Precio mínimo variantes'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='pricing_expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Próximo inicio/fin de oferta que cambia el precio efectivo', null=True, verbose_name='Recalcular precio en'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'is_available'], name='products_active_avail_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'effective_price'], name='products_active_price_idx'),
+        ),
+        migrations.RunPython(backfill_denormalized_pricing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+import unicodedata
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# Copias congeladas de apps.products.search: la migración no debe cambiar si cambia el módulo
+FTS_TABLE = 'products_product_fts'
+
+
+def normalize_search_text(text):
+    """Minúsculas, sin HTML ni tildes y con espacios colapsados."""
+    if not text:
+        return ''
+    text = strip_tags(str(text))
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def backfill_search_document(apps, schema_editor):
+    """Genera search_document para los productos existentes."""
+    Product = apps.get_model('products', 'Product')
+    batch = []
+    for product in Product.objects.select_related('brand').iterator(chunk_size=500):
+        parts = [
+            product.name, product.sku, product.codigo,
+            product.brand.name if product.brand_id else '',
+            product.short_description, product.description,
+        ]
+        product.search_document = normalize_search_text(' '.join(p for p in parts if p))
+        batch.append(product)
+        if len(batch) >= 500:
+            Product.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_index(apps, schema_editor):
+    """
+    PostgreSQL: tsvector generado + GIN y trigramas (pg_trgm).
+    SQLite: tabla FTS5 (si la compilación de SQLite la soporta).
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            "ALTER TABLE products_product ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', search_document)) STORED"
+        )
+        schema_editor.execute(
+            'CREATE INDEX products_search_vector_gin ON products_product USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            'CREATE INDEX products_search_document_trgm ON products_product '
+            'USING gin (search_document gin_trgm_ops)'
+        )
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"document, tokenize='unicode61 remove_diacritics 2')"
+            )
+        except Exception:
+            # SQLite sin FTS5: la búsqueda usa el backend básico
+            return
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, document) SELECT id, search_document FROM products_product'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS products_search_document_trgm')
+        schema_editor.execute('DROP INDEX IF EXISTS products_search_vector_gin')
+        schema_editor.execute('ALTER TABLE products_product DROP COLUMN IF EXISTS search_vector')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_add_denormalized_pricing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Texto de búsqueda'),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:19
+
+import django.db.models.deletion
+from datetime import timedelta
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+
+def backfill_sales_stats(apps, schema_editor):
+    """Carga inicial desde los pedidos completados/procesando/enviados."""
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    ProductSalesStats = apps.get_model('products', 'ProductSalesStats')
+    now = timezone.now()
+    rows = (
+        OrderItem.objects.filter(order__status__in=['completed', 'processing', 'shipped'])
+        .values('product_id')
+        .annotate(
+            units=Sum('quantity'),
+            revenue=Sum('total'),
+            last_sold_at=Max('order__created_at'),
+            units_7d=Sum('quantity', filter=Q(order__created_at__gte=now - timedelta(days=7))),
+            units_30d=Sum('quantity', filter=Q(order__created_at__gte=now - timedelta(days=30))),
+            units_90d=Sum('quantity', filter=Q(order__created_at__gte=now - timedelta(days=90))),
+        )
+        .order_by()
+    )
+    ProductSalesStats.objects.bulk_create([
+        ProductSalesStats(
+            product_id=row['product_id'],
+            units_sold=row['units'] or 0,
+            revenue=row['revenue'] or Decimal('0.00'),
+            last_sold_at=row['last_sold_at'],
+            units_7d=row['units_7d'] or 0,
+            units_30d=row['units_30d'] or 0,
+            units_90d=row['units_90d'] or 0,
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_add_product_search'),
+        ('orders', '0012_add_meta_referrer_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_stats', serialize=False, to='products.product')),
+                ('units_sold', models.PositiveIntegerField(default=0, verbose_name='Unidades vendidas')),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Ingresos')),
+                ('last_sold_at', models.DateTimeField(blank=True, null=True, verbose_name='Última venta')),
+                ('units_7d', models.PositiveIntegerField(default=0, verbose_name='Unidades 7 días')),
+                ('units_30d', models.PositiveIntegerField(default=0, verbose_name='Unidades 30 días')),
+                ('units_90d', models.PositiveIntegerField(default=0, verbose_name='Unidades 90 días')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadística de ventas',
+                'verbose_name_plural': 'Estadísticas de ventas',
+                'indexes': [models.Index(fields=['-units_sold'], name='products_sales_units_idx'), models.Index(fields=['-units_30d'], name='products_sales_units30_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_sales_stats, migrations.RunPython.noop),
+    ]
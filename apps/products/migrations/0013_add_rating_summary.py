@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:22
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def backfill_rating_summary(apps, schema_editor):
+    """Calcula el resumen de reseñas aprobadas de los productos existentes."""
+    Product = apps.get_model('products', 'Product')
+    ProductReview = apps.get_model('products', 'ProductReview')
+    rows = (
+        ProductReview.objects.filter(is_approved=True)
+        .values('product_id')
+        .annotate(avg=Avg('rating'), count=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        Product.objects.filter(pk=row['product_id']).update(
+            rating_avg=Decimal(str(round(row['avg'] or 0, 2))),
+            rating_count=row['count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_add_product_sales_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=3, verbose_name='Valoración media'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reseñas aprobadas'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', '-rating_avg', '-rating_count'], name='products_active_rating_idx'),
+        ),
+        migrations.RunPython(backfill_rating_summary, migrations.RunPython.noop),
+    ]
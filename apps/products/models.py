@@ -5,7 +5,7 @@ Soporta: productos simples, variables, stock, API externa, ERP.
 from decimal import Decimal
 
 from django.db import models
-from django.db.models import Q, Exists, OuterRef
+from django.db.models import Q
 from django.urls import reverse
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator
@@ -37,7 +37,17 @@ class Category(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        from apps.core.images import normalize_field_file
+        normalize_field_file(self.image)
         super().save(*args, **kwargs)
+        from .catalog import bump_catalog_version
+        bump_catalog_version()
+
+    def delete(self, *args, **kwargs):
+        from .catalog import bump_catalog_version
+        result = super().delete(*args, **kwargs)
+        bump_catalog_version()
+        return result
 
 
 class Brand(models.Model):
@@ -59,10 +69,34 @@ class Brand(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_name = instance.__dict__.get('name')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        from apps.core.images import normalize_field_file
+        normalize_field_file(self.logo)
         super().save(*args, **kwargs)
+        from .catalog import bump_catalog_version
+        bump_catalog_version()
+        if getattr(self, '_loaded_name', self.name) != self.name:
+            # El nombre de la marca forma parte del texto de búsqueda de sus productos
+            from .search import reindex_search_documents
+            reindex_search_documents(self.products.all())
+        self._loaded_name = self.name
+
+    def delete(self, *args, **kwargs):
+        from .catalog import bump_catalog_version
+        from .search import reindex_search_documents
+        product_ids = list(self.products.values_list('pk', flat=True))
+        result = super().delete(*args, **kwargs)
+        bump_catalog_version()
+        reindex_search_documents(Product.objects.filter(pk__in=product_ids))
+        return result
 
 
 class Product(models.Model):
@@ -120,22 +154,97 @@ class Product(models.Model):
     stock_quantity = models.PositiveIntegerField(default=0)
     low_stock_threshold = models.PositiveIntegerField(null=True, blank=True)
     view_count = models.PositiveIntegerField(default=0, db_index=True, verbose_name='Vistas')
+    # Columnas desnormalizadas (ver compute_denormalized); se recalculan al guardar
+    # el producto o sus variantes y en sincronizaciones/descuentos de stock.
+    effective_price = models.DecimalField(
+        'Precio efectivo', max_digits=12, decimal_places=2, null=True, blank=True, editable=False
+    )
+    min_variant_price = models.DecimalField(
+        'Precio mínimo variantes', max_digits=12, decimal_places=2, null=True, blank=True, editable=False
+    )
+    max_variant_price = models.DecimalField(
+        'Precio máximo variantes', max_digits=12, decimal_places=2, null=True, blank=True, editable=False
+    )
+    effective_wholesale_price = models.DecimalField(
+        'Precio mayorista efectivo', max_digits=12, decimal_places=2, null=True, blank=True, editable=False
+    )
+    is_available = models.BooleanField('Disponible', default=True, editable=False)
+    pricing_expires_at = models.DateTimeField(
+        'Recalcular precio en', null=True, blank=True, editable=False, db_index=True,
+        help_text='Próximo inicio/fin de oferta que cambia el precio efectivo'
+    )
+    # Resumen de reseñas aprobadas (ver refresh_rating_summary)
+    rating_avg = models.DecimalField(
+        'Valoración media', max_digits=3, decimal_places=2, default=Decimal('0.00'), editable=False
+    )
+    rating_count = models.PositiveIntegerField('Reseñas aprobadas', default=0, editable=False)
+    # Texto normalizado para búsqueda (ver apps/products/search.py)
+    search_document = models.TextField('Texto de búsqueda', blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    DENORMALIZED_FIELDS = (
+        'effective_price', 'min_variant_price', 'max_variant_price',
+        'effective_wholesale_price', 'is_available', 'pricing_expires_at',
+    )
+    # Campos de los que dependen las columnas desnormalizadas
+    PRICING_SOURCE_FIELDS = frozenset({
+        'regular_price', 'sale_price', 'sale_price_start', 'sale_price_end',
+        'wholesale_price', 'product_type', 'manage_stock', 'stock_quantity',
+    })
+    SEARCH_SOURCE_FIELDS = frozenset({
+        'name', 'sku', 'codigo', 'brand', 'short_description', 'description',
+    })
+    # Campos que afectan a listados/facetas: si cambian se sube la versión del catálogo
+    CATALOG_STATE_FIELDS = ('is_active', 'is_available', 'brand_id', 'effective_price')
+
     class Meta:
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'is_available'], name='products_active_avail_idx'),
+            models.Index(fields=['is_active', 'effective_price'], name='products_active_price_idx'),
+            models.Index(fields=['is_active', '-rating_avg', '-rating_count'], name='products_active_rating_idx'),
+        ]
 
     @classmethod
     def q_in_stock(cls):
         """Q filter para productos con stock (para listados según configuración)."""
-        simple = Q(product_type='simple') & (Q(manage_stock=False) | Q(stock_quantity__gt=0))
-        variable = Q(product_type='variable') & Exists(
-            ProductVariant.objects.filter(product=OuterRef('pk'), is_active=True, stock_quantity__gt=0)
-        )
-        return simple | variable
+        return Q(is_available=True)
+
+    @classmethod
+    def refresh_denormalized_for(cls, product_ids=None, batch_size=500):
+        """
+        Recalcula precio efectivo y disponibilidad de varios productos (todos si
+        product_ids es None) con las variantes precargadas. Devuelve cuántos cambiaron.
+        """
+        from django.utils import timezone
+        now = timezone.now()
+        qs = cls.objects.order_by('pk').prefetch_related('variants')
+        if product_ids is not None:
+            qs = qs.filter(pk__in=list(product_ids))
+        changed = []
+        total = 0
+        for product in qs.iterator(chunk_size=batch_size):
+            values = product.compute_denormalized(
+                variants=list(product.variants.all()), now=now
+            )
+            if any(getattr(product, k) != v for k, v in values.items()):
+                for k, v in values.items():
+                    setattr(product, k, v)
+                changed.append(product)
+            if len(changed) >= batch_size:
+                cls.objects.bulk_update(changed, cls.DENORMALIZED_FIELDS)
+                total += len(changed)
+                changed = []
+        if changed:
+            cls.objects.bulk_update(changed, cls.DENORMALIZED_FIELDS)
+            total += len(changed)
+        if total:
+            from .catalog import bump_catalog_version
+            bump_catalog_version()
+        return total
 
     def __str__(self):
         return self.name
@@ -143,6 +252,29 @@ class Product(models.Model):
     def get_absolute_url(self):
         return reverse('products:detail', kwargs={'slug': self.slug})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._catalog_state = instance._get_catalog_state()
+        instance._wholesale_state = instance.__dict__.get('effective_wholesale_price')
+        return instance
+
+    def _get_catalog_state(self):
+        return tuple(self.__dict__.get(f) for f in self.CATALOG_STATE_FIELDS)
+
+    def _sync_catalog_state(self):
+        """Sube la versión del catálogo si cambió algo visible en listados (o la de precios si cambió el mayorista)."""
+        state = self._get_catalog_state()
+        wholesale = self.__dict__.get('effective_wholesale_price')
+        if getattr(self, '_catalog_state', None) != state:
+            from .catalog import bump_catalog_version
+            bump_catalog_version()
+            self._catalog_state = state
+        elif getattr(self, '_wholesale_state', None) != wholesale:
+            from .catalog import bump_pricing_version
+            bump_pricing_version()
+        self._wholesale_state = wholesale
+
     def save(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(self.name)
@@ -152,39 +284,139 @@ class Product(models.Model):
                 slug = f'{base_slug}-{counter}'
                 counter += 1
             self.slug = slug
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.apply_denormalized()
+        elif self.PRICING_SOURCE_FIELDS.intersection(update_fields):
+            self.apply_denormalized()
+            kwargs['update_fields'] = set(update_fields) | set(self.DENORMALIZED_FIELDS)
+        reindex = update_fields is None or bool(self.SEARCH_SOURCE_FIELDS.intersection(update_fields))
+        if reindex:
+            from .search import build_search_document
+            self.search_document = build_search_document(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'search_document'}
         super().save(*args, **kwargs)
+        if reindex:
+            from .search import get_search_backend
+            get_search_backend().index([self])
+        self._sync_catalog_state()
+        from .detail_snapshot import invalidate_product_detail
+        invalidate_product_detail(self.pk)
+
+    def delete(self, *args, **kwargs):
+        from .catalog import bump_catalog_version
+        from .search import get_search_backend
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        get_search_backend().remove([pk])
+        bump_catalog_version()
+        return result
+
+    def compute_denormalized(self, variants=None, now=None):
+        """
+        Calcula las columnas desnormalizadas a partir del producto y sus variantes.
+        variants: lista con todas las variantes (activas e inactivas); si es None se consultan.
+        """
+        from django.utils import timezone
+        now = now or timezone.now()
+        if self.product_type != 'variable':
+            variants = []
+        elif variants is None:
+            variants = list(self.variants.all()) if self.pk else []
+        values = {
+            'min_variant_price': None,
+            'max_variant_price': None,
+        }
+        if variants:
+            active = [v for v in variants if v.is_active]
+            prices = [p for p in (v._price_at(now) for v in active) if p]
+            values['effective_price'] = min(prices) if prices else self.regular_price
+            if prices:
+                values['min_variant_price'] = min(prices)
+                values['max_variant_price'] = max(prices)
+            wholesale = [
+                v.wholesale_price if v.wholesale_price is not None else v._price_at(now)
+                for v in active
+            ]
+            values['effective_wholesale_price'] = (
+                min(wholesale) if wholesale else (self.wholesale_price or self.regular_price)
+            )
+            values['is_available'] = any(v.in_stock for v in active)
+            sources = active
+        else:
+            values['effective_price'] = self._price_at(now)
+            values['effective_wholesale_price'] = (
+                self.wholesale_price if self.wholesale_price is not None else values['effective_price']
+            )
+            values['is_available'] = not self.manage_stock or self.stock_quantity > 0
+            sources = [self]
+        # Próximo cambio de vigencia de una oferta: a partir de ahí el precio guardado caduca
+        boundaries = [
+            dt for src in sources if src.sale_price
+            for dt in (src.sale_price_start, src.sale_price_end)
+            if dt and dt > now
+        ]
+        values['pricing_expires_at'] = min(boundaries) if boundaries else None
+        return values
+
+    def apply_denormalized(self, variants=None):
+        """Asigna en memoria las columnas desnormalizadas (sin guardar)."""
+        for field, value in self.compute_denormalized(variants=variants).items():
+            setattr(self, field, value)
+
+    def refresh_denormalized(self):
+        """Recalcula y persiste las columnas desnormalizadas sin tocar updated_at."""
+        if not self.pk:
+            return
+        self.apply_denormalized()
+        Product.objects.filter(pk=self.pk).update(
+            **{field: getattr(self, field) for field in self.DENORMALIZED_FIELDS}
+        )
+        self._sync_catalog_state()
+
+    def _denormalized_is_fresh(self):
+        """True si las columnas guardadas sirven (calculadas y sin oferta que haya cambiado)."""
+        if self.effective_price is None:
+            return False
+        if self.pricing_expires_at is None:
+            return True
+        from django.utils import timezone
+        return timezone.now() < self.pricing_expires_at
 
     def get_price(self, user=None):
         """Precio según tipo de usuario. Mayoristas ven wholesale_price si existe."""
         if user and getattr(user, 'is_wholesale', False):
-            if self.product_type == 'variable' and self.variants.exists():
-                prices = [v.get_price(user) for v in self.variants.filter(is_active=True)]
-                return min(prices) if prices else (self.wholesale_price or self.regular_price)
-            if self.wholesale_price is not None:
-                return self.wholesale_price
+            if self._denormalized_is_fresh():
+                return self.effective_wholesale_price
+            return self.compute_denormalized()['effective_wholesale_price']
         return self.price
 
     @property
     def price(self):
         """Precio actual (sale si existe y está en vigencia, sino regular). Para variables: mínimo de variantes."""
-        if self.product_type == 'variable' and self.variants.exists():
-            prices = [v.price for v in self.variants.filter(is_active=True) if v.price]
-            return min(prices) if prices else self.regular_price
-        if self.sale_price and self.sale_price < self.regular_price and self._sale_price_active:
+        if self._denormalized_is_fresh():
+            return self.effective_price
+        return self.compute_denormalized()['effective_price']
+
+    def _price_at(self, now):
+        if self.sale_price and self.sale_price < self.regular_price and self._sale_active_at(now):
             return self.sale_price
         return self.regular_price
 
-    @property
-    def _sale_price_active(self):
-        """Verifica si la oferta está vigente según fechas."""
-        from django.utils import timezone
-        now = timezone.now()
+    def _sale_active_at(self, now):
         if self.sale_price_start and now < self.sale_price_start:
             return False
         if self.sale_price_end and now > self.sale_price_end:
             return False
         return True
 
+    @property
+    def _sale_price_active(self):
+        """Verifica si la oferta está vigente según fechas."""
+        from django.utils import timezone
+        return self._sale_active_at(timezone.now())
+
     @property
     def is_on_sale(self):
         """True si el producto está actualmente en oferta."""
@@ -194,36 +426,41 @@ class Product(models.Model):
 
     @property
     def in_stock(self):
-        if self.product_type == 'variable' and self.variants.exists():
-            return any(v.in_stock for v in self.variants.filter(is_active=True))
-        if not self.manage_stock:
-            return True
-        return self.stock_quantity > 0
+        if self.effective_price is not None:
+            return self.is_available
+        return self.compute_denormalized()['is_available']
 
     def _approved_reviews(self):
         """Reseñas aprobadas (solo estas cuentan para valoración y SEO)."""
         return self.reviews.filter(is_approved=True)
 
+    def refresh_rating_summary(self):
+        """Recalcula rating_avg/rating_count desde las reseñas aprobadas y los guarda."""
+        agg = self._approved_reviews().aggregate(
+            avg=models.Avg('rating'),
+            count=models.Count('id')
+        )
+        self.rating_avg = Decimal(str(round(agg['avg'] or 0, 2)))
+        self.rating_count = agg['count'] or 0
+        Product.objects.filter(pk=self.pk).update(
+            rating_avg=self.rating_avg, rating_count=self.rating_count
+        )
+
     @property
     def average_rating(self):
         """Puntuación media (1-5) solo de reseñas aprobadas."""
-        result = self._approved_reviews().aggregate(avg=models.Avg('rating'))
-        return result['avg'] or 0
+        return float(self.rating_avg or 0)
 
     @property
     def review_count(self):
         """Número de reseñas aprobadas."""
-        return self._approved_reviews().count()
+        return self.rating_count
 
     def get_rating_stats(self):
         """Devuelve {average, count} de reseñas aprobadas para mostrar y SEO."""
-        agg = self._approved_reviews().aggregate(
-            avg=models.Avg('rating'),
-            count=models.Count('id')
-        )
         return {
-            'average': round(float(agg['avg'] or 0), 1),
-            'count': agg['count'] or 0,
+            'average': round(float(self.rating_avg or 0), 1),
+            'count': self.rating_count,
         }
 
     def get_main_image(self):
@@ -251,6 +488,20 @@ class ProductImage(models.Model):
     def __str__(self):
         return f"{self.product.name} - Imagen {self.order}"
 
+    def save(self, *args, **kwargs):
+        from apps.core.images import normalize_field_file
+        from .detail_snapshot import invalidate_product_detail
+        normalize_field_file(self.image)
+        super().save(*args, **kwargs)
+        invalidate_product_detail(self.product_id)
+
+    def delete(self, *args, **kwargs):
+        from .detail_snapshot import invalidate_product_detail
+        product_id = self.product_id
+        result = super().delete(*args, **kwargs)
+        invalidate_product_detail(product_id)
+        return result
+
 
 class ProductAttribute(models.Model):
     """Atributos para productos variables (talla, color, etc)."""
@@ -316,27 +567,53 @@ class ProductVariant(models.Model):
         attrs = ', '.join(f"{k}: {v}" for k, v in self.attributes.items())
         return f"{self.product.name} - {attrs or 'Default'}"
 
+    def save(self, *args, **kwargs):
+        from apps.core.images import normalize_field_file
+        from .detail_snapshot import invalidate_product_detail
+        normalize_field_file(self.image)
+        super().save(*args, **kwargs)
+        self.product.refresh_denormalized()
+        invalidate_product_detail(self.product_id)
+        from .catalog import bump_pricing_version
+        bump_pricing_version()
+
+    def delete(self, *args, **kwargs):
+        from .detail_snapshot import invalidate_product_detail
+        product = self.product
+        result = super().delete(*args, **kwargs)
+        product.refresh_denormalized()
+        invalidate_product_detail(product.pk)
+        from .catalog import bump_pricing_version
+        bump_pricing_version()
+        return result
+
     @property
     def price(self):
-        if self.sale_price and self.sale_price < self.regular_price and self._sale_price_active:
-            return self.sale_price
-        return self.regular_price
+        from django.utils import timezone
+        return self._price_at(timezone.now())
 
     def get_price(self, user=None):
         if user and user.is_wholesale and self.wholesale_price is not None:
             return self.wholesale_price
         return self.price
 
-    @property
-    def _sale_price_active(self):
-        from django.utils import timezone
-        now = timezone.now()
+    def _price_at(self, now):
+        if self.sale_price and self.sale_price < self.regular_price and self._sale_active_at(now):
+            return self.sale_price
+        return self.regular_price
+
+    def _sale_active_at(self, now):
         if self.sale_price_start and now < self.sale_price_start:
             return False
         if self.sale_price_end and now > self.sale_price_end:
             return False
         return True
 
+    @property
+    def _sale_price_active(self):
+        from django.utils import timezone
+        return self._sale_active_at(timezone.now())
+
     @property
     def in_stock(self):
         return self.stock_quantity > 0
@@ -365,6 +642,61 @@ class ProductReview(models.Model):
         verbose_name_plural = 'Reseñas'
         ordering = ['-created_at']
 
+    def save(self, *args, **kwargs):
+        from .detail_snapshot import invalidate_product_detail
+        super().save(*args, **kwargs)
+        self.product.refresh_rating_summary()
+        invalidate_product_detail(self.product_id)
+
+    def delete(self, *args, **kwargs):
+        from .detail_snapshot import invalidate_product_detail
+        product = self.product
+        result = super().delete(*args, **kwargs)
+        product.refresh_rating_summary()
+        invalidate_product_detail(product.pk)
+        return result
+
+
+class PricingVersion(models.Model):
+    """
+    Versión de precios del catálogo (fila única). Vive en la base de datos y no en caché
+    para que todos los procesos vean la misma: los carritos guardan la versión con la
+    que se calcularon (ver apps/products/catalog.py).
+    """
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Versión de precios'
+        verbose_name_plural = 'Versión de precios'
+
+    def __str__(self):
+        return str(self.version)
+
+
+class ProductSalesStats(models.Model):
+    """Ventas acumuladas por producto, mantenidas desde los pedidos (ver apps/products/sales.py)."""
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name='sales_stats'
+    )
+    units_sold = models.PositiveIntegerField('Unidades vendidas', default=0)
+    revenue = models.DecimalField('Ingresos', max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    last_sold_at = models.DateTimeField('Última venta', null=True, blank=True)
+    units_7d = models.PositiveIntegerField('Unidades 7 días', default=0)
+    units_30d = models.PositiveIntegerField('Unidades 30 días', default=0)
+    units_90d = models.PositiveIntegerField('Unidades 90 días', default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estadística de ventas'
+        verbose_name_plural = 'Estadísticas de ventas'
+        indexes = [
+            models.Index(fields=['-units_sold'], name='products_sales_units_idx'),
+            models.Index(fields=['-units_30d'], name='products_sales_units30_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} - {self.units_sold} uds"
+
 
 class ProductView(models.Model):
     """Registro de vistas únicas por usuario o sesión."""
@@ -0,0 +1,111 @@
+"""
+Estadísticas de ventas por producto (ProductSalesStats).
+
+Se actualizan de forma incremental cuando un pedido entra o sale de los estados que
+cuentan como venta (Order.save) y se pueden reconstruir por completo con
+`python manage.py rebuild_sales_stats` (recomendado a diario para que las ventanas
+de 7/30/90 días descarten las ventas antiguas).
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, Q, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+# Estados de pedido que cuentan como venta (mismos que usaba el ranking de más vendidos)
+SALES_STATUSES = ('completed', 'processing', 'shipped')
+WINDOWS = (('units_7d', 7), ('units_30d', 30), ('units_90d', 90))
+
+
+def is_sales_status(status):
+    return status in SALES_STATUSES
+
+
+def apply_order_sales(order, sign=1):
+    """
+    Suma (sign=1) o resta (sign=-1) las líneas del pedido a las estadísticas.
+    Llamar cuando el pedido entra/sale de SALES_STATUSES.
+    """
+    from .models import ProductSalesStats
+
+    per_product = defaultdict(lambda: [0, Decimal('0.00')])
+    for product_id, quantity, total in order.items.values_list('product_id', 'quantity', 'total'):
+        per_product[product_id][0] += quantity
+        per_product[product_id][1] += total or Decimal('0.00')
+    if not per_product:
+        return
+
+    now = timezone.now()
+    sold_at = order.created_at or now
+    in_window = {field: sold_at >= now - timedelta(days=days) for field, days in WINDOWS}
+
+    with transaction.atomic():
+        existing = set(
+            ProductSalesStats.objects.filter(product_id__in=per_product.keys())
+            .values_list('product_id', flat=True)
+        )
+        missing = [pid for pid in per_product if pid not in existing]
+        if missing and sign > 0:
+            ProductSalesStats.objects.bulk_create(
+                [ProductSalesStats(product_id=pid) for pid in missing], ignore_conflicts=True
+            )
+        for product_id, (units, revenue) in per_product.items():
+            delta = units * sign
+            updates = {
+                'units_sold': Greatest(F('units_sold') + delta, Value(0)),
+                'revenue': Greatest(F('revenue') + revenue * sign, Value(Decimal('0.00'))),
+                'updated_at': now,
+            }
+            for field, _days in WINDOWS:
+                if in_window[field]:
+                    updates[field] = Greatest(F(field) + delta, Value(0))
+            if sign > 0:
+                updates['last_sold_at'] = sold_at
+            ProductSalesStats.objects.filter(product_id=product_id).update(**updates)
+
+
+def order_status_changed(order, old_status):
+    """Mantiene las estadísticas cuando un pedido cambia de estado."""
+    was_sale, is_sale = is_sales_status(old_status), is_sales_status(order.status)
+    if was_sale != is_sale:
+        apply_order_sales(order, sign=1 if is_sale else -1)
+
+
+def rebuild_sales_stats():
+    """Recalcula todas las estadísticas desde OrderItem. Devuelve cuántos productos tienen ventas."""
+    from apps.orders.models import OrderItem
+    from .models import ProductSalesStats
+
+    now = timezone.now()
+    aggregates = {
+        'units': Sum('quantity'),
+        'revenue': Sum('total'),
+        'last_sold_at': Max('order__created_at'),
+    }
+    for field, days in WINDOWS:
+        aggregates[field] = Sum('quantity', filter=Q(order__created_at__gte=now - timedelta(days=days)))
+    rows = (
+        OrderItem.objects.filter(order__status__in=SALES_STATUSES)
+        .values('product_id')
+        .annotate(**aggregates)
+        .order_by()
+    )
+    stats = [
+        ProductSalesStats(
+            product_id=row['product_id'],
+            units_sold=row['units'] or 0,
+            revenue=row['revenue'] or Decimal('0.00'),
+            last_sold_at=row['last_sold_at'],
+            units_7d=row['units_7d'] or 0,
+            units_30d=row['units_30d'] or 0,
+            units_90d=row['units_90d'] or 0,
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        ProductSalesStats.objects.all().delete()
+        ProductSalesStats.objects.bulk_create(stats, batch_size=500)
+    return len(stats)
@@ -0,0 +1,214 @@
+"""
+Búsqueda de productos con backends intercambiables.
+
+- PostgreSQL: columna tsvector generada sobre Product.search_document con índice GIN
+  y pg_trgm (word_similarity) para tolerar errores de tipeo.
+- SQLite: tabla virtual FTS5 (products_product_fts) mantenida desde Product.save().
+- Otros motores: icontains sobre search_document (sin índice).
+
+Product.search_document guarda el texto ya normalizado (minúsculas, sin tildes ni
+HTML), así que "maquina" encuentra "Máquina" en todos los backends.
+Se puede forzar un backend con settings.PRODUCT_SEARCH_BACKEND ('postgres', 'sqlite',
+'basic' o ruta a una clase).
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from apps.core.text import normalize_text as normalize_search_text
+
+FTS_TABLE = 'products_product_fts'
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def search_tokens(query):
+    """Términos de búsqueda normalizados (máximo 8 para acotar la consulta)."""
+    return _TOKEN_RE.findall(normalize_search_text(query))[:8]
+
+
+def build_search_document(product):
+    """Texto indexable del producto: nombre, códigos, marca y descripciones."""
+    brand = product.brand.name if product.brand_id else ''
+    parts = [
+        product.name, product.sku, product.codigo, brand,
+        product.short_description, product.description,
+    ]
+    return normalize_search_text(' '.join(p for p in parts if p))
+
+
+def reindex_search_documents(products, batch_size=500, changed_only=False, update_index=True):
+    """
+    Recalcula y guarda search_document de un queryset de productos en lote (ej. al
+    renombrar o eliminar su marca) y actualiza el índice del backend. Con changed_only
+    solo se escriben los que cambian; con update_index=False no se toca el índice (para
+    reconstruirlo después). Devuelve cuántos productos se guardaron.
+    """
+    from .models import Product
+
+    products = products.select_related('brand').only(
+        'id', 'name', 'sku', 'codigo', 'brand', 'short_description', 'description', 'search_document', 'brand__name',
+    ).order_by('pk')
+    total = 0
+    batch = []
+
+    def save(batch):
+        Product.objects.bulk_update(batch, ['search_document'])
+        if update_index:
+            get_search_backend().index(batch)
+        return len(batch)
+
+    for product in products.iterator(chunk_size=batch_size):
+        document = build_search_document(product)
+        if changed_only and document == product.search_document:
+            continue
+        product.search_document = document
+        batch.append(product)
+        if len(batch) >= batch_size:
+            total += save(batch)
+            batch = []
+    if batch:
+        total += save(batch)
+    return total
+
+
+class BaseSearchBackend:
+    """Interfaz común. search() filtra y anota `search_rank` (mayor = más relevante)."""
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def index(self, products):
+        """Actualiza el índice externo para los productos dados (si el backend lo usa)."""
+
+    def remove(self, product_ids):
+        """Elimina productos del índice externo (si el backend lo usa)."""
+
+    def rebuild(self):
+        """Reconstruye el índice externo a partir de search_document."""
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    """Fallback sin índice: todos los términos deben aparecer en search_document."""
+
+    def search(self, queryset, query):
+        tokens = search_tokens(query)
+        if not tokens:
+            return queryset.none()
+        for token in tokens:
+            queryset = queryset.filter(search_document__icontains=token)
+        return queryset.annotate(search_rank=Value(1.0, output_field=FloatField()))
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """tsvector generado + GIN y similitud de trigramas para errores de tipeo."""
+
+    def search(self, queryset, query):
+        tokens = search_tokens(query)
+        if not tokens:
+            return queryset.none()
+        # Prefijos: "maqu" encuentra "maquina". Los tokens son \w+, seguros en to_tsquery.
+        tsquery = ' & '.join(f'{t}:*' for t in tokens)
+        text = ' '.join(tokens)
+        table = queryset.model._meta.db_table
+        vector = f'"{table}"."search_vector"'
+        document = f'"{table}"."search_document"'
+        # `<%` usa el índice GIN de trigramas (umbral pg_trgm.word_similarity_threshold)
+        match = RawSQL(
+            f"({vector} @@ to_tsquery('simple', %s) OR %s <%% {document})",
+            (tsquery, text),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"(ts_rank({vector}, to_tsquery('simple', %s)) + word_similarity(%s, {document}))",
+            (tsquery, text),
+            output_field=FloatField(),
+        )
+        return queryset.annotate(search_match=match, search_rank=rank).filter(search_match=True)
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """Tabla FTS5 (rowid = id del producto) ordenada por bm25."""
+
+    def search(self, queryset, query):
+        tokens = search_tokens(query)
+        if not tokens:
+            return queryset.none()
+        match = ' '.join(f'"{t}"*' for t in tokens)
+        table = queryset.model._meta.db_table
+        ids = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        rank = RawSQL(
+            f'(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id")',
+            (match,),
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=ids).annotate(search_rank=rank)
+
+    def index(self, products):
+        rows = [(p.pk, p.search_document) for p in products if p.pk]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk, _ in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, document) VALUES (%s, %s)', rows
+            )
+
+    def remove(self, product_ids):
+        ids = [(pk,) for pk in product_ids]
+        if ids:
+            with connection.cursor() as cursor:
+                cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', ids)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, document) '
+                f'SELECT id, search_document FROM products_product'
+            )
+
+
+BACKENDS = {
+    'postgres': PostgresSearchBackend,
+    'sqlite': SQLiteFTSSearchBackend,
+    'basic': BasicSearchBackend,
+}
+
+_backend = None
+
+
+def _sqlite_fts_available():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def get_search_backend():
+    """Backend configurado o, por defecto, el adecuado para el motor de base de datos."""
+    global _backend
+    if _backend is not None:
+        return _backend
+    name = getattr(settings, 'PRODUCT_SEARCH_BACKEND', '') or ''
+    if name:
+        backend_cls = BACKENDS.get(name) or import_string(name)
+    elif connection.vendor == 'postgresql':
+        backend_cls = PostgresSearchBackend
+    elif connection.vendor == 'sqlite' and _sqlite_fts_available():
+        backend_cls = SQLiteFTSSearchBackend
+    else:
+        backend_cls = BasicSearchBackend
+    _backend = backend_cls()
+    return _backend
+
+
+def search_products(queryset, query):
+    """Filtra `queryset` por `query` y anota `search_rank`."""
+    return get_search_backend().search(queryset, query)
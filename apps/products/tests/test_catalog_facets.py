@@ -0,0 +1,40 @@
+"""
+Tests de las facetas de la tienda cacheadas por versión de catálogo.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.products.catalog import get_catalog_facets
+from apps.products.models import Brand, Category, Product
+
+
+class CatalogFacetsTest(TestCase):
+    """Conteos correctos, sin consultas en caché e invalidación al cambiar stock/categorías."""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Máquinas', slug='maquinas')
+        self.brand = Brand.objects.create(name='Wahl', slug='wahl')
+        self.product = Product.objects.create(
+            name='Clipper', sku='CL-1', regular_price=100, brand=self.brand,
+            manage_stock=True, stock_quantity=2,
+        )
+        self.product.categories.add(self.category)
+
+    def test_counts_and_cache_hit(self):
+        facets = get_catalog_facets()
+        self.assertEqual(facets['total'], 1)
+        self.assertEqual([(c.slug, c.product_count) for c in facets['categories']], [('maquinas', 1)])
+        self.assertEqual([(b.slug, b.product_count) for b in facets['brands']], [('wahl', 1)])
+        with self.assertNumQueries(0):
+            get_catalog_facets()
+
+    def test_invalidated_on_stock_and_membership(self):
+        get_catalog_facets()
+        self.product.stock_quantity = 0
+        self.product.save(update_fields=['stock_quantity', 'updated_at'])
+        self.assertEqual(get_catalog_facets()['total'], 0)
+        self.assertEqual(get_catalog_facets(show_out_of_stock=True)['total'], 1)
+
+        self.product.categories.clear()
+        self.assertEqual(get_catalog_facets(show_out_of_stock=True)['categories'], [])
@@ -0,0 +1,67 @@
+"""
+Tests de las columnas desnormalizadas de precio y disponibilidad de Product.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.products.models import Product, ProductVariant
+
+
+class DenormalizedPricingTest(TestCase):
+    """Precio efectivo y disponibilidad se mantienen al guardar producto/variantes."""
+
+    def test_simple_product_sale_and_stock(self):
+        """Producto simple: precio de oferta vigente y stock gestionado."""
+        product = Product.objects.create(
+            name='Simple', sku='S-1', regular_price=Decimal('100'),
+            sale_price=Decimal('80'), manage_stock=True, stock_quantity=0,
+        )
+        product.refresh_from_db()
+        self.assertEqual(product.effective_price, Decimal('80'))
+        self.assertFalse(product.is_available)
+
+        product.stock_quantity = 3
+        product.save(update_fields=['stock_quantity', 'updated_at'])
+        self.assertTrue(Product.objects.filter(Product.q_in_stock(), pk=product.pk).exists())
+
+    def test_variable_product_tracks_variants(self):
+        """Producto variable: mínimo/máximo de variantes activas y stock por variante."""
+        product = Product.objects.create(
+            name='Variable', sku='V-1', product_type='variable', regular_price=Decimal('50'),
+        )
+        ProductVariant.objects.create(product=product, sku='V-1-A', regular_price=Decimal('30'), stock_quantity=0)
+        variant = ProductVariant.objects.create(
+            product=product, sku='V-1-B', regular_price=Decimal('45'),
+            wholesale_price=Decimal('20'), stock_quantity=2,
+        )
+        product.refresh_from_db()
+        self.assertEqual(product.min_variant_price, Decimal('30'))
+        self.assertEqual(product.max_variant_price, Decimal('45'))
+        self.assertEqual(product.effective_wholesale_price, Decimal('20'))
+        self.assertTrue(product.is_available)
+
+        variant.delete()
+        product.refresh_from_db()
+        self.assertEqual(product.effective_price, Decimal('30'))
+        self.assertFalse(product.in_stock)
+
+    def test_expired_sale_falls_back_to_live_price(self):
+        """Si la oferta terminó después del cálculo, price no usa el valor guardado."""
+        product = Product.objects.create(
+            name='Oferta', sku='O-1', regular_price=Decimal('100'), sale_price=Decimal('60'),
+            sale_price_end=timezone.now() + timedelta(hours=1),
+        )
+        self.assertIsNotNone(product.pricing_expires_at)
+        Product.objects.filter(pk=product.pk).update(
+            sale_price_end=timezone.now() - timedelta(minutes=1),
+            pricing_expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        product.refresh_from_db()
+        self.assertEqual(product.price, Decimal('100'))
+        self.assertEqual(Product.refresh_denormalized_for([product.pk]), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.effective_price, Decimal('100'))
+        self.assertIsNone(product.pricing_expires_at)
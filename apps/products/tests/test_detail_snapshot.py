@@ -0,0 +1,52 @@
+"""
+Tests del snapshot cacheado de la ficha de producto.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.models import SiteSettings
+from apps.products.detail_snapshot import ProductDetailSnapshot
+from apps.products.models import Category, Product, ProductReview
+
+
+class ProductDetailSnapshotTest(TestCase):
+    """El snapshot se reutiliza hasta que cambia el producto o sus reseñas."""
+
+    def setUp(self):
+        cache.clear()
+        self.site = SiteSettings.get()
+        self.product = Product.objects.create(name='Cera', sku='CER-1', regular_price=Decimal('15'))
+        self.category = Category.objects.create(name='Ceras', slug='ceras')
+        self.product.categories.add(self.category)
+
+    def _snapshot(self):
+        product = Product.objects.get(pk=self.product.pk)
+        return ProductDetailSnapshot.get(
+            product, self.site, 'https://tienda.test', 'https://tienda.test/p/cera/'
+        )
+
+    def test_cached_until_review_changes(self):
+        first = self._snapshot()
+        self.assertEqual(first.primary_category, self.category)
+        self.assertIn('"Ceras"', first.breadcrumb_schema_json)
+        with self.assertNumQueries(1):  # solo el producto
+            self._snapshot()
+
+        review = ProductReview.objects.create(
+            product=self.product, author_name='Ana', author_email='ana@test.com',
+            rating=4, comment='Buena', is_approved=False,
+        )
+        self.assertEqual(self._snapshot().approved_reviews, [])
+        review.is_approved = True
+        review.save()
+        snapshot = self._snapshot()
+        self.assertEqual(snapshot.approved_reviews, [review])
+        self.assertIn('aggregateRating', snapshot.product_schema_json)
+
+    def test_detail_page_uses_snapshot(self):
+        response = self.client.get(self.product.get_absolute_url(), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['product_primary_category'], self.category)
+        self.assertIn('"@type": "BreadcrumbList"', response.context['product_breadcrumb_schema_json'])
@@ -0,0 +1,60 @@
+"""
+Tests de la búsqueda de productos (backend según motor de base de datos).
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.products.models import Brand, Product
+from apps.products.search import normalize_search_text, search_products
+
+
+class ProductSearchTest(TestCase):
+    """Búsqueda sin tildes, por prefijo y ordenada por relevancia."""
+
+    def setUp(self):
+        self.machine = Product.objects.create(
+            name='Máquina de corte Pro', sku='MAQ-1', regular_price=100,
+            description='<p>Motor rotativo</p>',
+        )
+        self.oil = Product.objects.create(
+            name='Aceite para cuchillas', sku='ACE-1', regular_price=20,
+            description='Para mantener la máquina lubricada',
+        )
+
+    def test_normalize_search_text(self):
+        self.assertEqual(normalize_search_text('<b>Máquina</b>  ÑANDÚ'), 'maquina nandu')
+
+    def test_accent_insensitive_and_ranked(self):
+        """'maquina' encuentra ambos, con el que la tiene en el nombre primero."""
+        results = list(search_products(Product.objects.all(), 'maquina').order_by('-search_rank'))
+        self.assertEqual(results[0], self.machine)
+        self.assertIn(self.oil, results)
+
+    def test_index_follows_updates(self):
+        """Al renombrar el producto cambia lo que encuentra la búsqueda."""
+        self.oil.name = 'Lubricante'
+        self.oil.description = ''
+        self.oil.save()
+        self.assertFalse(search_products(Product.objects.all(), 'aceite').exists())
+        self.assertTrue(search_products(Product.objects.all(), 'lubri').exists())
+
+    def test_brand_rename_reindexes_products(self):
+        """Renombrar o eliminar la marca actualiza el texto de búsqueda de sus productos."""
+        brand = Brand.objects.create(name='Wahl')
+        self.machine.brand = brand
+        self.machine.save()
+        self.assertTrue(search_products(Product.objects.all(), 'wahl').exists())
+
+        brand = Brand.objects.get(pk=brand.pk)
+        brand.name = 'Andis'
+        brand.save()
+        self.assertFalse(search_products(Product.objects.all(), 'wahl').exists())
+        self.assertEqual(list(search_products(Product.objects.all(), 'andis')), [self.machine])
+
+        brand.delete()
+        self.assertFalse(search_products(Product.objects.all(), 'andis').exists())
+
+    def test_shop_search(self):
+        response = self.client.get(reverse('products:list'), {'q': 'MAQUINA corte'}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['products']), [self.machine])
@@ -0,0 +1,38 @@
+"""
+Tests del resumen de valoraciones guardado en Product.
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.products.models import Product, ProductReview
+
+
+class RatingSummaryTest(TestCase):
+    """rating_avg/rating_count siguen a las reseñas aprobadas."""
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Cera', sku='CER-1', regular_price=Decimal('15'))
+
+    def _review(self, rating, approved):
+        return ProductReview.objects.create(
+            product=self.product, author_name='Ana', author_email='ana@test.com',
+            rating=rating, comment='Ok', is_approved=approved,
+        )
+
+    def test_summary_follows_moderation(self):
+        first = self._review(5, approved=True)
+        pending = self._review(2, approved=False)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_avg, self.product.rating_count), (Decimal('5.00'), 1))
+
+        pending.is_approved = True
+        pending.save()
+        self.product.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.product.get_rating_stats(), {'average': 3.5, 'count': 2})
+
+        first.delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_count, 1)
+        self.assertEqual(self.product.average_rating, 2.0)
@@ -0,0 +1,45 @@
+"""
+Tests del ranking materializado de más vendidos (ProductSalesStats).
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product, ProductSalesStats
+from apps.products.sales import rebuild_sales_stats
+
+
+class ProductSalesStatsTest(TestCase):
+    """Las estadísticas siguen los cambios de estado del pedido."""
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Gel', sku='GEL-1', regular_price=Decimal('10'))
+        self.order = Order.objects.create(
+            billing_first_name='Ana', billing_email='ana@test.com',
+            subtotal=Decimal('30'), total=Decimal('30'),
+        )
+        OrderItem.objects.create(
+            order=self.order, product=self.product, product_name='Gel',
+            quantity=3, price=Decimal('10'), total=Decimal('30'),
+        )
+
+    def test_status_changes_update_stats(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'processing'
+        order.save(update_fields=['status', 'updated_at'])
+        stats = ProductSalesStats.objects.get(product=self.product)
+        self.assertEqual((stats.units_sold, stats.units_7d, stats.revenue), (3, 3, Decimal('30')))
+
+        order.status = 'completed'
+        order.save()
+        self.assertEqual(ProductSalesStats.objects.get(product=self.product).units_sold, 3)
+
+        order.status = 'refunded'
+        order.save()
+        self.assertEqual(ProductSalesStats.objects.get(product=self.product).units_sold, 0)
+
+    def test_rebuild_matches_orders(self):
+        Order.objects.filter(pk=self.order.pk).update(status='shipped')
+        self.assertEqual(rebuild_sales_stats(), 1)
+        self.assertEqual(ProductSalesStats.objects.get(product=self.product).units_30d, 3)
@@ -0,0 +1,44 @@
+"""
+Tests del registro diferido de vistas de producto.
+"""
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.products.models import Product, ProductView
+from apps.products.view_tracking import QUEUE_CACHE, SEEN_CACHE, SEQ_KEY, flush_views
+
+
+@override_settings(PRODUCT_VIEWS_FLUSH_INTERVAL=0)
+class ViewTrackingTest(TestCase):
+    """La ficha no escribe vistas; el volcado las guarda deduplicadas y en lote."""
+
+    def setUp(self):
+        for alias in (QUEUE_CACHE, SEEN_CACHE):
+            caches[alias].clear()
+        self.product = Product.objects.create(name='Tijera', sku='TIJ-1', regular_price=50)
+
+    def test_detail_defers_and_dedupes(self):
+        url = reverse('products:detail', kwargs={'slug': self.product.slug})
+        for _ in range(3):
+            self.assertEqual(self.client.get(url, secure=True).status_code, 200)
+        self.assertFalse(ProductView.objects.exists())
+
+        self.assertEqual(flush_views(), 1)
+        self.assertEqual(flush_views(), 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.view_count, 1)
+        self.assertEqual(ProductView.objects.count(), 1)
+
+    def test_lost_sequence_does_not_stall_queue(self):
+        url = reverse('products:detail', kwargs={'slug': self.product.slug})
+        self.client.get(url, secure=True)
+        self.assertEqual(flush_views(), 1)
+
+        # El contador se perdió (caché reiniciada/descartada): la cola sigue desde lo volcado
+        caches[QUEUE_CACHE].delete(SEQ_KEY)
+        other = Product.objects.create(name='Peine', sku='PEI-1', regular_price=20)
+        self.client.get(reverse('products:detail', kwargs={'slug': other.slug}), secure=True)
+        self.assertEqual(flush_views(), 1)
+        other.refresh_from_db()
+        self.assertEqual(other.view_count, 1)
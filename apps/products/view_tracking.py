@@ -0,0 +1,229 @@
+"""
+Registro diferido (write-behind) de vistas de producto.
+
+La ficha de producto no escribe en la base de datos: record_view() deduplica la vista
+(una por visitante y producto en cada ventana de tiempo) y la encola. flush_views()
+vuelca la cola en lote: INSERT masivo de ProductView y un UPDATE
+view_count = view_count + n por producto.
+
+La cola vive en su propia caché (alias "product_views"), que no debe descartar entradas
+y en producción debe ser compartida; la deduplicación usa otra ("product_views_seen")
+para que las marcas por visitante no desplacen la cola ni la caché por defecto. Si aun
+así se pierde el contador o alguna vista, el volcado se recupera y lo deja en el log.
+
+El volcado lo hace un hilo en segundo plano de cada proceso (cada
+PRODUCT_VIEWS_FLUSH_INTERVAL segundos) y/o `python manage.py flush_product_views`
+por cron.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, models, transaction
+
+logger = logging.getLogger(__name__)
+
+QUEUE_CACHE = 'product_views'
+SEEN_CACHE = 'product_views_seen'
+
+SEQ_KEY = 'product_views:seq'
+FLUSHED_KEY = 'product_views:flushed'
+LOCK_KEY = 'product_views:flush_lock'
+ITEM_KEY = 'product_views:item:{}'
+SEEN_KEY = 'product_views:seen:{}:{}:{}'
+# Las vistas encoladas caducan si nadie las vuelca en este tiempo
+ITEM_TIMEOUT = 7 * 24 * 3600
+# Últimas posiciones de la cola que pueden estar escribiéndose todavía
+IN_FLIGHT_MARGIN = 50
+
+_flusher_lock = threading.Lock()
+_flusher_started = False
+
+
+def _queue():
+    return caches[QUEUE_CACHE]
+
+
+def _dedupe_window():
+    return getattr(settings, 'PRODUCT_VIEWS_DEDUPE_WINDOW', 24 * 3600)
+
+
+def _visitor_key(request):
+    """
+    Huella IP+UA del visitante anónimo (40 caracteres, cabe en session_key).
+    No se usa la sesión: crearla sería una escritura y cambiaría entre la primera
+    visita y las siguientes, duplicando la vista.
+    """
+    ip = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip() or request.META.get('REMOTE_ADDR', '')
+    ua = request.META.get('HTTP_USER_AGENT', '')
+    return hashlib.sha1(f'{ip}|{ua}'.encode()).hexdigest()
+
+
+def _next_seq():
+    queue = _queue()
+    try:
+        return queue.incr(SEQ_KEY)
+    except ValueError:
+        # Sin contador (primera vista o se perdió): seguir desde lo ya volcado, no desde
+        # 0, para no reutilizar posiciones que el volcado ya dio por procesadas
+        queue.add(SEQ_KEY, queue.get(FLUSHED_KEY) or 0, None)
+        return queue.incr(SEQ_KEY)
+
+
+def record_view(request, product_id):
+    """Encola una vista única del producto. Devuelve True si es nueva en la ventana actual."""
+    if request.user.is_authenticated:
+        user_id, session_key = request.user.pk, request.session.session_key or ''
+    else:
+        user_id, session_key = None, _visitor_key(request)
+    ident = f'u{user_id}' if user_id else f's{session_key}'
+    window = _dedupe_window()
+    bucket = int(time.time() // window)
+    if not caches[SEEN_CACHE].add(SEEN_KEY.format(bucket, product_id, ident), 1, window):
+        return False
+    _queue().set(ITEM_KEY.format(_next_seq()), (product_id, user_id, session_key), ITEM_TIMEOUT)
+    _ensure_flusher()
+    return True
+
+
+def _existing_views(rows):
+    """Pares (producto, visitante) ya registrados en ProductView."""
+    from .models import ProductView
+
+    product_ids = {r[0] for r in rows}
+    user_ids = {r[1] for r in rows if r[1]}
+    session_keys = {r[2] for r in rows if not r[1]}
+    existing = set()
+    if user_ids:
+        existing.update(
+            (pid, ('u', uid)) for pid, uid in ProductView.objects.filter(
+                product_id__in=product_ids, user_id__in=user_ids
+            ).values_list('product_id', 'user_id')
+        )
+    if session_keys:
+        existing.update(
+            (pid, ('s', sk)) for pid, sk in ProductView.objects.filter(
+                product_id__in=product_ids, user__isnull=True, session_key__in=session_keys
+            ).values_list('product_id', 'session_key')
+        )
+    return existing
+
+
+def pending_views():
+    """Número de vistas encoladas pendientes de volcar."""
+    queue = _queue()
+    return max(0, (queue.get(SEQ_KEY) or 0) - (queue.get(FLUSHED_KEY) or 0))
+
+
+def flush_views(max_items=5000):
+    """
+    Vuelca hasta max_items vistas encoladas. Devuelve cuántas vistas nuevas se guardaron.
+    Un candado en caché evita volcados simultáneos.
+    """
+    from .models import Product, ProductView
+
+    queue = _queue()
+    if not queue.add(LOCK_KEY, 1, 300):
+        return 0
+    try:
+        seq = queue.get(SEQ_KEY) or 0
+        flushed = queue.get(FLUSHED_KEY)
+        if flushed is None and seq > max_items:
+            # Se perdió la posición volcada: retomar solo el último lote
+            logger.warning('Cola de vistas sin posición volcada; se retoma desde %s', seq - max_items)
+            flushed = seq - max_items
+        start = (flushed or 0) + 1
+        end = min(seq, start + max_items - 1)
+        if end < start:
+            return 0
+        keys = [ITEM_KEY.format(n) for n in range(start, end + 1)]
+        items = queue.get_many(keys)
+        rows = []
+        lost = 0
+        done = start - 1
+        for n, key in zip(range(start, end + 1), keys):
+            item = items.get(key)
+            if item is None and n > seq - IN_FLIGHT_MARGIN:
+                # Posiblemente aún se está escribiendo: se reintenta en el próximo volcado
+                break
+            done = n
+            if item is None:
+                lost += 1
+            else:
+                rows.append(tuple(item))
+        if done < start:
+            return 0
+        if lost:
+            logger.warning('%s vistas de producto encoladas se perdieron (caché %s)', lost, QUEUE_CACHE)
+
+        existing = _existing_views(rows) if rows else set()
+        new_views = []
+        seen = set()
+        for product_id, user_id, session_key in rows:
+            ident = ('u', user_id) if user_id else ('s', session_key)
+            if (product_id, ident) in existing or (product_id, ident) in seen:
+                continue
+            seen.add((product_id, ident))
+            new_views.append(ProductView(product_id=product_id, user_id=user_id, session_key=session_key or ''))
+
+        if new_views:
+            valid_ids = set(
+                Product.objects.filter(pk__in={v.product_id for v in new_views}).values_list('pk', flat=True)
+            )
+            new_views = [v for v in new_views if v.product_id in valid_ids]
+            per_product = Counter(v.product_id for v in new_views)
+            by_increment = {}
+            for product_id, n in per_product.items():
+                by_increment.setdefault(n, []).append(product_id)
+            with transaction.atomic():
+                ProductView.objects.bulk_create(new_views, batch_size=500, ignore_conflicts=True)
+                for n, product_ids in by_increment.items():
+                    Product.objects.filter(pk__in=product_ids).update(
+                        view_count=models.F('view_count') + n
+                    )
+
+        queue.set(FLUSHED_KEY, done, None)
+        queue.delete_many(keys[:done - start + 1])
+        return len(new_views)
+    finally:
+        queue.delete(LOCK_KEY)
+
+
+def _flusher_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            close_old_connections()
+            flush_views()
+        except Exception:
+            logger.exception('Error volcando vistas de producto')
+        finally:
+            close_old_connections()
+
+
+def _flush_at_exit():
+    try:
+        flush_views()
+    except Exception:
+        logger.exception('Error volcando vistas de producto al salir')
+
+
+def _ensure_flusher():
+    """Arranca (una vez por proceso) el hilo que vuelca las vistas periódicamente."""
+    global _flusher_started
+    interval = getattr(settings, 'PRODUCT_VIEWS_FLUSH_INTERVAL', 60)
+    if _flusher_started or not interval:
+        return
+    with _flusher_lock:
+        if _flusher_started:
+            return
+        threading.Thread(
+            target=_flusher_loop, args=(interval,), name='product-views-flusher', daemon=True
+        ).start()
+        atexit.register(_flush_at_exit)
+        _flusher_started = True
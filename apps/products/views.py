@@ -1,22 +1,20 @@
-import json
 import logging
 import uuid
-from datetime import timedelta
 from urllib.parse import urlencode
 from django.db import models
-from django.db import IntegrityError
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from django.views.generic import ListView, DetailView
 from django.contrib import messages
 from django.contrib.auth.views import redirect_to_login
 from django.utils.http import url_has_allowed_host_and_scheme
-from django.utils.html import strip_tags
-from django.utils.text import Truncator
 from django.views.decorators.http import require_POST
 
+from apps.core.page_cache import AnonymousPageCacheMixin
+from apps.core.pagination import KeysetPaginationMixin
+
 from .models import (
-    Product, Category, Brand, ProductReview, ProductView, ProductFavorite,
+    Product, Category, Brand, ProductReview, ProductFavorite,
     ProductStockAlert,
 )
 
@@ -33,13 +31,14 @@ def _safe_next_url(request, candidate, fallback):
     return fallback
 
 
-class ProductListView(ListView):
+class ProductListView(AnonymousPageCacheMixin, KeysetPaginationMixin, ListView):
     model = Product
     template_name = 'products/shop.html'
     context_object_name = 'products'
     paginate_by = 12
+    page_cache_params = {'q', 'sort', 'category', 'brand', 'min_price', 'max_price', 'page', 'cursor'}
 
-    def paginate_queryset(self, queryset, page_size):
+    def paginate_queryset_by_number(self, queryset, page_size):
         from django.core.paginator import Paginator, InvalidPage, Page
         paginator = Paginator(queryset, page_size)
         page_kwarg = self.page_kwarg
@@ -75,44 +74,36 @@ class ProductListView(ListView):
         max_price = self.request.GET.get('max_price')
         try:
             if min_price:
-                qs = qs.filter(regular_price__gte=Decimal(min_price))
+                qs = qs.filter(effective_price__gte=Decimal(min_price))
             if max_price:
-                qs = qs.filter(regular_price__lte=Decimal(max_price))
+                qs = qs.filter(effective_price__lte=Decimal(max_price))
         except Exception:
             pass
-        search = self.request.GET.get('q')
+        search = (self.request.GET.get('q') or '').strip()
         if search:
-            qs = qs.filter(
-                models.Q(name__icontains=search) |
-                models.Q(description__icontains=search) |
-                models.Q(sku__icontains=search) |
-                models.Q(codigo__icontains=search)
-            )
-        from django.db.models import Sum, Q, Value, IntegerField
+            from .search import search_products
+            qs = search_products(qs, search)
+        from django.db.models import Value
         from django.db.models.functions import Coalesce
 
-        sort = self.request.GET.get('sort', 'bestsellers')
+        # Con búsqueda, por defecto se ordena por relevancia
+        sort = self.request.GET.get('sort') or ('relevance' if search else 'bestsellers')
         order_fields = None
-        if sort == 'price_asc':
-            order_fields = ['sale_price', 'regular_price']
+        if sort == 'relevance' and search:
+            order_fields = ['-search_rank', '-created_at']
+        elif sort == 'price_asc':
+            order_fields = ['effective_price', 'id']
         elif sort == 'price_desc':
-            order_fields = ['-sale_price', '-regular_price']
+            order_fields = ['-effective_price', '-id']
+        elif sort == 'rating':
+            order_fields = ['-rating_avg', '-rating_count', '-created_at']
         elif sort == 'name':
             order_fields = ['name']
         elif sort == 'newest':
             order_fields = ['-created_at']
         elif sort == 'bestsellers' or sort == 'default':
-            # Más vendidos primero (pedidos completados/procesando/enviados)
-            qs = qs.annotate(
-                total_sold=Coalesce(
-                    Sum(
-                        'orderitem__quantity',
-                        filter=Q(orderitem__order__status__in=['completed', 'processing', 'shipped'])
-                    ),
-                    Value(0),
-                    output_field=IntegerField()
-                )
-            )
+            # Más vendidos primero (ProductSalesStats, mantenida desde los pedidos)
+            qs = qs.annotate(total_sold=Coalesce('sales_stats__units_sold', Value(0)))
             if category_slug == 'kit':
                 qs = qs.order_by('-is_featured', '-total_sold', '-created_at')
             else:
@@ -126,27 +117,19 @@ class ProductListView(ListView):
         return qs.distinct()
 
     def get_context_data(self, **kwargs):
-        from django.db.models import Count
         from decimal import Decimal
         context = super().get_context_data(**kwargs)
-        # Conteo de la lista actual (filtrada) — siempre coherente con lo que se muestra
-        context['products_count'] = context['page_obj'].paginator.count
-        # Total sin filtro de categoría (para el enlace "Todas las categorías")
+        # Conteo de la lista actual (filtrada) — siempre coherente con lo que se muestra.
+        # En modo cursor (?cursor=) no se cuenta: es la carga incremental del scroll.
+        paginator = context['paginator']
+        context['products_count'] = paginator.count if paginator is not None else None
+        # Facetas (total, conteos por categoría/marca, rango de precios) cacheadas por versión de catálogo
         from apps.core.models import SiteSettings
-        base_qs = Product.objects.filter(is_active=True)
-        if not SiteSettings.get().show_out_of_stock_products:
-            base_qs = base_qs.filter(Product.q_in_stock())
-        context['total_products_count'] = base_qs.count()
-        # Misma lógica que la lista: contar solo productos que aparecerían en el listado
-        count_filter = models.Q(products__is_active=True)
-        if not SiteSettings.get().show_out_of_stock_products:
-            count_filter = models.Q(products__in=base_qs)
-        context['categories'] = Category.objects.filter(is_active=True).annotate(
-            product_count=Count('products', filter=count_filter)
-        ).filter(product_count__gt=0)
-        context['brands'] = Brand.objects.filter(is_active=True).annotate(
-            product_count=Count('products', filter=count_filter)
-        ).filter(product_count__gt=0)
+        from .catalog import get_catalog_facets
+        facets = get_catalog_facets(SiteSettings.get().show_out_of_stock_products)
+        context['total_products_count'] = facets['total']
+        context['categories'] = facets['categories']
+        context['brands'] = facets['brands']
         filter_category = self.request.GET.get('category')
         if not filter_category:
             filter_category = self.kwargs.get('category_slug', '')
@@ -155,14 +138,14 @@ class ProductListView(ListView):
         context['filter_q'] = self.request.GET.get('q', '')
         context['selected_category_obj'] = None
         if context['filter_category']:
-            context['selected_category_obj'] = Category.objects.filter(
-                is_active=True, slug=context['filter_category']
-            ).first()
+            context['selected_category_obj'] = next(
+                (c for c in facets['categories'] if c.slug == context['filter_category']), None
+            ) or Category.objects.filter(is_active=True, slug=context['filter_category']).first()
         context['selected_brand_obj'] = None
         if context['filter_brand']:
-            context['selected_brand_obj'] = Brand.objects.filter(
-                is_active=True, slug=context['filter_brand']
-            ).first()
+            context['selected_brand_obj'] = next(
+                (b for b in facets['brands'] if b.slug == context['filter_brand']), None
+            ) or Brand.objects.filter(is_active=True, slug=context['filter_brand']).first()
         context['filter_min_price'] = self.request.GET.get('min_price', '')
         context['filter_max_price'] = self.request.GET.get('max_price', '')
         context['favorite_product_ids'] = set()
@@ -172,12 +155,8 @@ class ProductListView(ListView):
             ).values_list('product_id', flat=True)
             context['favorite_product_ids'] = set(favorite_ids)
         # Rango de precios en catálogo (para placeholder en el form)
-        price_range = Product.objects.filter(is_active=True).aggregate(
-            min_p=models.Min('regular_price'),
-            max_p=models.Max('regular_price')
-        )
-        context['price_min_catalog'] = int(price_range['min_p'] or 0)
-        context['price_max_catalog'] = int(price_range['max_p'] or 1000000)
+        context['price_min_catalog'] = int(facets['price_min'] or 0)
+        context['price_max_catalog'] = int(facets['price_max'] or 1000000)
         site_name = getattr(self.request, 'site_settings', None)
         site_name = getattr(site_name, 'site_name', '') or 'The Barbershop'
         seo_scope = 'productos de barbería'
@@ -200,7 +179,7 @@ class ProductListView(ListView):
             key not in facet_filter_keys and key != 'page' for key in query_dict.keys()
         )
         page_obj = context.get('page_obj')
-        is_paginated_page = bool(page_obj and page_obj.number > 1)
+        is_paginated_page = bool(page_obj and page_obj.number and page_obj.number > 1)
 
         canonical_url = self.request.build_absolute_uri(self.request.path)
         if not has_facet_filters and not has_extra_params and is_paginated_page:
@@ -253,31 +232,25 @@ class ProductDetailView(DetailView):
         return self.render_to_response(context)
 
     def get_queryset(self):
-        return Product.objects.filter(is_active=True).prefetch_related(
-            'images', 'variants', 'reviews', 'categories'
-        )
+        return Product.objects.filter(is_active=True).select_related('brand')
 
     def get_context_data(self, **kwargs):
+        from apps.core.models import SiteSettings
+        from .detail_snapshot import ProductDetailSnapshot
         context = super().get_context_data(**kwargs)
         view_content_event_id = str(uuid.uuid4())
         context['view_content_event_id'] = view_content_event_id
-        context['approved_reviews'] = self.object.reviews.filter(is_approved=True).order_by('-created_at')
-        from apps.core.models import SiteSettings
         site = SiteSettings.get()
         base = (site.site_url or '').strip().rstrip('/') or self.request.build_absolute_uri('/').rstrip('/')
         context['share_url'] = f"{base}{self.request.path}"
-        stats = self.object.get_rating_stats()
-        context['product_rating_stats'] = stats
-        context['rating_stars'] = round(stats['average'])  # 0-5 para pintar estrellas
-        context['product_schema_json'] = self._build_product_schema_json(
-            self.object, context['approved_reviews'], context['share_url'], stats
-        )
-        context['product_breadcrumb_schema_json'] = self._build_breadcrumb_schema_json(
-            self.object
-        )
-        context['product_primary_category'] = self.object.categories.filter(
-            is_active=True
-        ).first()
+        detail = ProductDetailSnapshot.get(self.object, site, base, context['share_url'])
+        context['product_detail'] = detail
+        context['approved_reviews'] = detail.approved_reviews
+        context['product_rating_stats'] = detail.rating_stats
+        context['rating_stars'] = detail.rating_stars
+        context['product_schema_json'] = detail.product_schema_json
+        context['product_breadcrumb_schema_json'] = detail.breadcrumb_schema_json
+        context['product_primary_category'] = detail.primary_category
         try:
             from apps.core.meta_conversions import send_view_content
             user = self.request.user if self.request.user.is_authenticated else None
@@ -320,162 +293,9 @@ class ProductDetailView(DetailView):
         return context
 
     def _track_unique_view(self, product):
-        """Cuenta una vista real (única) por usuario o sesión."""
-        if self.request.user.is_authenticated:
-            already_viewed = ProductView.objects.filter(
-                product=product, user=self.request.user
-            ).exists()
-            if already_viewed:
-                return
-            create_kwargs = {
-                'product': product,
-                'user': self.request.user,
-                'session_key': self.request.session.session_key or '',
-            }
-        else:
-            session_key = self.request.session.session_key
-            if not session_key:
-                self.request.session.create()
-                session_key = self.request.session.session_key
-            already_viewed = ProductView.objects.filter(
-                product=product, user__isnull=True, session_key=session_key
-            ).exists()
-            if already_viewed:
-                return
-            create_kwargs = {
-                'product': product,
-                'session_key': session_key,
-            }
-
-        try:
-            ProductView.objects.create(**create_kwargs)
-        except IntegrityError:
-            # Otra petición paralela pudo registrar la vista.
-            return
-
-        Product.objects.filter(pk=product.pk).update(
-            view_count=models.F('view_count') + 1
-        )
-        product.refresh_from_db(fields=['view_count'])
-
-    def _build_product_schema_json(self, product, approved_reviews, share_url, rating_stats):
-        """Schema.org Product + AggregateRating + Review para SEO (JSON-LD)."""
-        from apps.core.models import SiteSettings
-        from django.utils import timezone
-        request = self.request
-        site = SiteSettings.get()
-        base = (site.site_url or '').strip().rstrip('/') or f"{request.scheme}://{request.get_host()}"
-        images = [f"{base}{img.image.url}" for img in product.images.all()[:5]]
-        if not images and product.get_main_image():
-            img = product.get_main_image()
-            images = [f"{base}{img.image.url}"]
-        if not images:
-            if site.logo:
-                images = [f"{base}{site.logo.url}"]
-            else:
-                from django.conf import settings
-                static_path = (settings.STATIC_URL or 'static/') + 'logo-768x317.png'
-                images = [f"{base.rstrip('/')}/{static_path.lstrip('/')}"]
-        description = product.short_description or product.name
-        if product.description:
-            description = Truncator(strip_tags(product.description)).words(50)
-        raw_currency = (site.currency or "COP").strip() or "COP"
-        currency = raw_currency if len(raw_currency) == 3 and raw_currency.isalpha() else "COP"
-        offer = {
-            "@type": "Offer",
-            "price": str(product.price),
-            "priceCurrency": currency,
-            "availability": "https://schema.org/InStock" if product.in_stock else "https://schema.org/OutOfStock",
-        }
-        if product.sale_price_end:
-            offer["priceValidUntil"] = product.sale_price_end.strftime("%Y-%m-%d")
-        else:
-            offer["priceValidUntil"] = (
-                timezone.now() + timedelta(days=30)
-            ).strftime("%Y-%m-%d")
-        schema = {
-            "@context": "https://schema.org",
-            "@type": "Product",
-            "name": product.name,
-            "description": description,
-            "url": share_url,
-            "image": images,
-            "offers": offer,
-        }
-        if product.sku:
-            schema["sku"] = product.sku
-        if rating_stats["count"] > 0:
-            schema["aggregateRating"] = {
-                "@type": "AggregateRating",
-                "ratingValue": str(rating_stats["average"]),
-                "bestRating": "5",
-                "worstRating": "1",
-                "ratingCount": str(rating_stats["count"]),
-            }
-            schema["review"] = [
-                {
-                    "@type": "Review",
-                    "author": {"@type": "Person", "name": r.author_name},
-                    "datePublished": r.created_at.strftime("%Y-%m-%d"),
-                    "reviewRating": {
-                        "@type": "Rating",
-                        "ratingValue": str(r.rating),
-                        "bestRating": "5",
-                        "worstRating": "1",
-                    },
-                    "reviewBody": r.comment[:500],
-                }
-                for r in approved_reviews[:10]
-            ]
-        return json.dumps(schema, ensure_ascii=False)
-
-    def _build_breadcrumb_schema_json(self, product):
-        from apps.core.models import SiteSettings
-        request = self.request
-        site = SiteSettings.get()
-        base = (site.site_url or '').strip().rstrip('/') or f"{request.scheme}://{request.get_host()}"
-        shop_url = f"{base}{reverse('products:list')}"
-        category = product.categories.filter(is_active=True).first()
-        item_list = [
-            {
-                "@type": "ListItem",
-                "position": 1,
-                "name": "Inicio",
-                "item": f"{base}{reverse('core:home')}",
-            },
-            {
-                "@type": "ListItem",
-                "position": 2,
-                "name": "Tienda",
-                "item": shop_url,
-            },
-        ]
-        position = 3
-        if category:
-            item_list.append(
-                {
-                    "@type": "ListItem",
-                    "position": position,
-                    "name": category.name,
-                    "item": f"{shop_url}?{urlencode({'category': category.slug})}",
-                }
-            )
-            position += 1
-        product_url = f"{base}{self.request.path}"
-        item_list.append(
-            {
-                "@type": "ListItem",
-                "position": position,
-                "name": product.name,
-                "item": product_url,
-            }
-        )
-        schema = {
-            "@context": "https://schema.org",
-            "@type": "BreadcrumbList",
-            "itemListElement": item_list,
-        }
-        return json.dumps(schema, ensure_ascii=False)
+        """Cuenta una vista real (única) por usuario o visitante (se guarda en diferido)."""
+        from .view_tracking import record_view
+        record_view(self.request, product.pk)
 
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
@@ -148,6 +148,21 @@ DATABASES = {
     'default': env.db('DATABASE_URL')
 }
 
+# Caché: locmem por defecto solo para desarrollo. La invalidación por versión de catálogo
+# (facetas, caché de página, ficha de producto) depende de ella, así que con varios workers
+# debe ser compartida (ej. CACHE_URL=redis://...); production.py lo exige.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+    # Cola de vistas de producto: no debe descartar entradas (en producción compartida,
+    # ej. redis con maxmemory-policy noeviction). La deduplicación puede descartar.
+    'product_views': env.cache('PRODUCT_VIEWS_CACHE_URL', default='locmemcache://product-views'),
+    'product_views_seen': env.cache('PRODUCT_VIEWS_SEEN_CACHE_URL', default='locmemcache://product-views-seen'),
+}
+# locmem descarta entradas a partir de 300 por defecto: subir el límite
+for _alias, _max_entries in (('default', 20_000), ('product_views', 1_000_000), ('product_views_seen', 200_000)):
+    if CACHES[_alias]['BACKEND'].endswith('LocMemCache'):
+        CACHES[_alias].setdefault('OPTIONS', {}).setdefault('MAX_ENTRIES', _max_entries)
+
 # Password validation - Security
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -233,6 +248,18 @@ PRODUCTS_API_URL = env('PRODUCTS_API_URL')
 PRODUCTS_API_KEY = env('PRODUCTS_API_KEY')
 ERP_API_URL = env('ERP_API_URL')
 ERP_API_KEY = env('ERP_API_KEY')
+# Cola de pedidos al ERP (process_erp_outbox): endpoint por lotes opcional, pedidos por
+# petición y reintentos con espera exponencial (segundos)
+ERP_API_BATCH_URL = env('ERP_API_BATCH_URL', default='')
+ERP_BATCH_SIZE = env.int('ERP_BATCH_SIZE', default=20)
+ERP_TIMEOUT = env.int('ERP_TIMEOUT', default=30)
+ERP_OUTBOX_MAX_ATTEMPTS = env.int('ERP_OUTBOX_MAX_ATTEMPTS', default=10)
+ERP_OUTBOX_BACKOFF = env.int('ERP_OUTBOX_BACKOFF', default=60)
+ERP_OUTBOX_MAX_BACKOFF = env.int('ERP_OUTBOX_MAX_BACKOFF', default=3600)
+# Endpoint de stock (/api/integraciones/sync-stock/): clave y tamaño máximo del cuerpo
+# ya descomprimido (JSON o NDJSON, opcionalmente gzip)
+STOCK_SYNC_API_KEY = env('STOCK_SYNC_API_KEY', default='')
+STOCK_SYNC_MAX_BYTES = env.int('STOCK_SYNC_MAX_BYTES', default=50 * 1024 * 1024)
 
 # Wompi payment gateway (Colombia)
 # Obtén tus llaves en: https://comercios.wompi.co/
@@ -265,6 +292,31 @@ SERVER_EMAIL = _default_from
 # Cart session key
 CART_SESSION_ID = 'cart'
 
+# Vistas de producto (registro diferido): ventana de deduplicación y volcado en segundo plano.
+# PRODUCT_VIEWS_FLUSH_INTERVAL=0 desactiva el hilo (volcar con `manage.py flush_product_views`).
+PRODUCT_VIEWS_DEDUPE_WINDOW = env.int('PRODUCT_VIEWS_DEDUPE_WINDOW', default=24 * 3600)
+PRODUCT_VIEWS_FLUSH_INTERVAL = env.int('PRODUCT_VIEWS_FLUSH_INTERVAL', default=60)
+
+# Caché de página completa (tienda, categorías y home) para anónimos, en segundos. 0 = desactivada.
+PAGE_CACHE_TIMEOUT = env.int('PAGE_CACHE_TIMEOUT', default=300)
+
+# Imágenes: lado máximo del original al subir/descargar y anchos de los derivados responsive
+IMAGE_MAX_DIMENSION = env.int('IMAGE_MAX_DIMENSION', default=2400)
+IMAGE_DERIVATIVE_WIDTHS = (320, 480, 800, 1200, 1920)
+IMAGE_DERIVATIVE_QUALITY = env.int('IMAGE_DERIVATIVE_QUALITY', default=80)
+# Derivados que faltan al renderizar: en segundo plano (True) o en la misma petición
+IMAGE_DERIVATIVES_ASYNC = env.bool('IMAGE_DERIVATIVES_ASYNC', default=True)
+
+# Descargas concurrentes de imágenes al importar desde Tersa
+TERSA_IMAGE_WORKERS = env.int('TERSA_IMAGE_WORKERS', default=8)
+# Catálogo público de Tersa: copia en disco (GET condicional) y ventana en segundos en la
+# que la sincronización de productos y la de stock reutilizan la misma descarga
+TERSA_CACHE_DIR = env('TERSA_CACHE_DIR', default=str(BASE_DIR / 'var' / 'tersa'))
+TERSA_CATALOG_WINDOW = env.int('TERSA_CATALOG_WINDOW', default=300)
+
+# Búsqueda de productos: '' = según motor (PostgreSQL/SQLite FTS5), o 'postgres' | 'sqlite' | 'basic'
+PRODUCT_SEARCH_BACKEND = env('PRODUCT_SEARCH_BACKEND', default='')
+
 # CKEditor 5 - editor HTML para descripciones
 CKEDITOR_5_CONFIGS = {
     'default': {
@@ -43,6 +43,17 @@ if not ALLOWED_HOSTS:
         'ALLOWED_HOSTS vacío en producción. Define al menos un dominio real.'
     )
 
+# Las versiones de catálogo y la cola de vistas de producto deben ser compartidas entre
+# procesos (ver CACHES en base.py): locmem no sirve con varios workers de gunicorn.
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    raise ImproperlyConfigured(
+        'CACHE_URL debe apuntar a una caché compartida en producción (ej. redis://).'
+    )
+if CACHES['product_views']['BACKEND'].endswith('LocMemCache'):
+    raise ImproperlyConfigured(
+        'PRODUCT_VIEWS_CACHE_URL debe apuntar a una caché compartida en producción (ej. redis://).'
+    )
+
 # Wompi hard checks (mandatory for production mode of the gateway).
 if (WOMPI_ENV or '').strip().lower() == 'production':
     required_wompi = {
@@ -2,6 +2,11 @@
 Comando Django para el sistema TersaSoft.
 Lee el stock de productoBodega y lo empuja al Barbershop via API.
 
+Protocolo delta: primero pide al Barbershop el manifiesto de stock actual
+(sync-stock/manifest/) y envía solo las filas que cambiaron; si no cambió ninguna no
+envía nada. Cada lote lleva un X-Sync-Batch-Id que se
+conserva en los reintentos, así un lote repetido no se aplica dos veces.
+
 INSTALACIÓN en el sistema TersaSoft:
   1. Copiar este archivo a:
         <tersa_project>/prod/management/commands/push_stock_barbershop.py
@@ -15,8 +20,12 @@ USO:
   python manage.py push_stock_barbershop --marca 1
   python manage.py push_stock_barbershop --dry-run
   python manage.py push_stock_barbershop --dry-run --verbose
+  python manage.py push_stock_barbershop --full      # envía todo (sin manifiesto)
 """
+import gzip
+import json
 import time
+import uuid
 
 import requests
 from django.conf import settings
@@ -27,10 +36,16 @@ BARBERSHOP_API_URL = getattr(
     settings, 'BARBERSHOP_API_URL',
     'https://barbershop.com.co/api/integraciones/sync-stock/',
 )
+BARBERSHOP_MANIFEST_URL = getattr(
+    settings, 'BARBERSHOP_MANIFEST_URL',
+    BARBERSHOP_API_URL.rstrip('/') + '/manifest/',
+)
 BARBERSHOP_API_KEY = getattr(settings, 'BARBERSHOP_API_KEY', '')
 
-BATCH_SIZE  = 200   # productos por request
-SLEEP_BATCH = 0.3   # segundos entre batches
+# El endpoint resuelve cada request en bloque: con 5000 la bodega completa suele
+# caber en una o dos peticiones (NDJSON comprimido con gzip).
+BATCH_SIZE = 5000   # productos por request
+MAX_RETRIES = 3     # intentos por lote (mismo X-Sync-Batch-Id)
 
 
 # ---------- Helpers ----------
@@ -63,9 +78,41 @@ def _build_stock_payload(marca_id=None, bodega_id=2):
     return payload
 
 
-def _push_batch(batch, dry_run=False):
+def _check_api_key():
+    if not BARBERSHOP_API_KEY:
+        raise ValueError(
+            "BARBERSHOP_API_KEY no configurado en settings. "
+            "Agrega BARBERSHOP_API_KEY al .env del sistema Tersa."
+        )
+
+
+def _fetch_manifest():
+    """Stock actual del Barbershop: {'count', 'checksum', 'stock': {external_id: stock}}."""
+    _check_api_key()
+    resp = requests.get(
+        BARBERSHOP_MANIFEST_URL,
+        headers={'X-Sync-Api-Key': BARBERSHOP_API_KEY, 'Accept-Encoding': 'gzip'},
+        timeout=60,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _delta(payload, manifest):
+    """
+    Filas cuyo stock difiere del manifiesto. Los external_id que el Barbershop no
+    tiene se omiten (el endpoint solo los contaría como not_found).
+    """
+    remote = manifest.get('stock') or {}
+    return [
+        item for item in payload
+        if item['external_id'] in remote and remote[item['external_id']] != item['stock']
+    ]
+
+
+def _push_batch(batch, dry_run=False, batch_id=None):
     """
-    Envía un batch al endpoint del Barbershop.
+    Envía un batch al endpoint del Barbershop, reintentando con el mismo batch_id.
     Retorna el dict de respuesta o lanza excepción.
     """
     if dry_run:
@@ -76,23 +123,34 @@ def _push_batch(batch, dry_run=False):
             'total_received': len(batch),
         }
 
-    if not BARBERSHOP_API_KEY:
-        raise ValueError(
-            "BARBERSHOP_API_KEY no configurado en settings. "
-            "Agrega BARBERSHOP_API_KEY al .env del sistema Tersa."
-        )
+    _check_api_key()
 
-    resp = requests.post(
-        BARBERSHOP_API_URL,
-        json=batch,
-        headers={
-            'Content-Type': 'application/json',
-            'X-Sync-Api-Key': BARBERSHOP_API_KEY,
-        },
-        timeout=30,
+    batch_id = batch_id or uuid.uuid4().hex
+    body = gzip.compress(
+        '\n'.join(json.dumps(item, separators=(',', ':')) for item in batch).encode('utf-8')
     )
-    resp.raise_for_status()
-    return resp.json()
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            resp = requests.post(
+                BARBERSHOP_API_URL,
+                data=body,
+                headers={
+                    'Content-Type': 'application/x-ndjson',
+                    'Content-Encoding': 'gzip',
+                    'X-Sync-Api-Key': BARBERSHOP_API_KEY,
+                    'X-Sync-Batch-Id': batch_id,
+                },
+                timeout=120,
+            )
+            if resp.status_code < 500:
+                resp.raise_for_status()
+                return resp.json()
+            error = requests.HTTPError(f'{resp.status_code} {resp.reason}', response=resp)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            error = exc
+        if attempt < MAX_RETRIES:
+            time.sleep(2 ** attempt)
+    raise error
 
 
 # ---------- Command ----------
@@ -122,6 +180,12 @@ class Command(BaseCommand):
             default=False,
             help='Construye el payload sin enviarlo al Barbershop.',
         )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            default=False,
+            help='Envía el stock de todos los productos sin consultar el manifiesto.',
+        )
         parser.add_argument(
             '--verbose',
             action='store_true',
@@ -158,6 +222,25 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('No se encontraron productos.'))
             return
 
+        # Delta: solo lo que difiere del stock actual del Barbershop
+        if not options['full']:
+            try:
+                manifest = _fetch_manifest()
+            except Exception as exc:
+                manifest = None
+                self.stdout.write(self.style.WARNING(
+                    f'No se pudo leer el manifiesto ({exc}); se envía el stock completo.'
+                ))
+            if manifest is not None:
+                read = len(payload)
+                payload = _delta(payload, manifest)
+                if not payload:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Stock al día ({read} productos leídos): no hay cambios que enviar.'
+                    ))
+                    return
+                self.stdout.write(f'Delta contra el manifiesto: {len(payload)} productos con cambios')
+
         self.stdout.write(f'{len(payload)} productos a procesar → batches de {BATCH_SIZE}')
 
         if verbose:
@@ -189,9 +272,6 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f'✗ Error: {exc}'))
                 total_errors += len(batch)
 
-            if idx < len(batches):
-                time.sleep(SLEEP_BATCH)
-
         # Resumen
         self.stdout.write('')
         self.stdout.write('─' * 52)